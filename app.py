@@ -2,10 +2,12 @@
 
 import streamlit as st
 
+from src.api_keys import configure_key_pool, load_api_keys
 from src.constants import DEFAULT_SEARCH_QUERY, PERIOD_OPTIONS
 from src.logger import setup_logger
+from src.quota_ledger import quota_scope
+from src.ui_components import render_cache_admin, render_quota_status
 from src.tabs import tab_trending, tab_genre, tab_suggest, tab_buzz, tab_trends, tab_google_ranking, tab_sns_buzz
-from src.youtube_api import get_quota_tracker
 
 setup_logger()
 
@@ -20,16 +22,18 @@ st.title("YouTube トレンド＆競合分析ツール")
 
 # ─── APIキーチェック ──────────────────────────────────
 try:
-    api_key = st.secrets["YOUTUBE_API_KEY"]
-except (KeyError, FileNotFoundError):
-    api_key = ""
+    api_keys = load_api_keys(st.secrets)
+except FileNotFoundError:
+    api_keys = []
 
-if not api_key:
+if not api_keys:
     st.error(
         "YouTube API キーが未設定です。\n\n"
         "**ローカル環境の場合:**\n"
         "`.streamlit/secrets.toml` に以下を追加:\n"
-        '```\nYOUTUBE_API_KEY = "YOUR_API_KEY"\n```\n\n'
+        '```\nYOUTUBE_API_KEY = "YOUR_API_KEY"\n```\n'
+        "複数のキーを使う場合（クォータはキーごとに10,000ユニット/日）:\n"
+        '```\nYOUTUBE_API_KEYS = ["KEY_1", "KEY_2"]\n```\n\n'
         "**Streamlit Community Cloud の場合:**\n"
         "アプリ設定 → Secrets に上記と同じ内容を入力\n\n"
         "**APIキー取得手順:**\n"
@@ -39,6 +43,10 @@ if not api_key:
     )
     st.stop()
 
+# 各API呼び出しはプールから本日の消費が最も少ないキーを選ぶ
+configure_key_pool(api_keys)
+api_key = api_keys[0]
+
 # ─── サイドバー ──────────────────────────────────────
 with st.sidebar:
     st.header("検索設定")
@@ -67,33 +75,32 @@ with st.sidebar:
 
     st.divider()
     st.subheader("クォータ状況")
-    tracker = get_quota_tracker()
-    st.metric("使用量", f"{tracker.used:,} / {tracker.daily_limit:,}")
-    st.progress(min(tracker.usage_percent / 100, 1.0))
-    st.caption(f"残り約 {tracker.remaining:,} ユニット")
+    render_quota_status()
+
+    render_cache_admin()
 
 # ─── メインコンテンツ（タブ） ─────────────────────────
 tab_hot, tab_gen, tab_sug, tab_buz, tab_trd, tab_goo, tab_sns = st.tabs(
     ["急上昇トレンド", "ジャンル別ランキング", "サジェストキーワード", "バズ動画分析", "トレンド調査", "Google検索ランキング", "SNSバズニュース"]
 )
 
-with tab_hot:
+with tab_hot, quota_scope("trending"):
     tab_trending.render(api_key)
 
-with tab_gen:
+with tab_gen, quota_scope("genre"):
     tab_genre.render(api_key, search_query)
 
-with tab_sug:
+with tab_sug, quota_scope("suggest"):
     tab_suggest.render(search_query)
 
-with tab_buz:
+with tab_buz, quota_scope("buzz"):
     tab_buzz.render(api_key, search_query, max_subscribers, min_views, min_vs_ratio, period_days)
 
-with tab_trd:
+with tab_trd, quota_scope("trends"):
     tab_trends.render(search_query)
 
-with tab_goo:
+with tab_goo, quota_scope("google_ranking"):
     tab_google_ranking.render()
 
-with tab_sns:
+with tab_sns, quota_scope("sns_buzz"):
     tab_sns_buzz.render()
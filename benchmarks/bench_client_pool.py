@@ -0,0 +1,98 @@
+"""YouTubeクライアント生成コストの計測.
+
+呼び出しごとに `build()` する従来方式と、YouTubeClientPool で構築済み
+クライアントを再利用する方式で、videos.list 1回あたりのレイテンシを比較する。
+実APIの代わりにローカルHTTPサーバへ向けるため、クォータは消費しない。
+
+    python -m benchmarks.bench_client_pool [--calls 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httplib2
+from googleapiclient.discovery import build
+
+from src.youtube_api import YouTubeClientPool
+
+_BODY = json.dumps({"items": [{"id": "v1", "statistics": {"viewCount": "1"}}]}).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # noqa: N802
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_BODY)))
+        self.end_headers()
+        self.wfile.write(_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _client_options(port: int) -> dict:
+    return {"api_endpoint": f"http://127.0.0.1:{port}/"}
+
+
+def _bench(label: str, call, calls: int) -> float:
+    call()  # ウォームアップ
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(samples)
+    print(f"{label:<28} median {median:7.3f} ms  p90 {sorted(samples)[int(calls * 0.9)]:7.3f} ms")
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    options = _client_options(server.server_port)
+
+    def build_per_call():
+        youtube = build(
+            "youtube", "v3", developerKey="BENCH", client_options=options,
+            http=httplib2.Http(), static_discovery=True, cache_discovery=False,
+        )
+        youtube.videos().list(part="statistics", id="v1").execute()
+
+    pool = YouTubeClientPool(client_options=options)
+
+    def pooled_call():
+        pool.get("BENCH").videos().list(part="statistics", id="v1").execute()
+
+    def build_only():
+        build("youtube", "v3", developerKey="BENCH", static_discovery=True, cache_discovery=False)
+
+    def pool_lookup():
+        pool.get("BENCH")
+
+    print(f"{args.calls} calls against local server on port {server.server_port}")
+    before = _bench("build() per call", build_per_call, args.calls)
+    after = _bench("pooled client (keep-alive)", pooled_call, args.calls)
+    print(f"{'saving per call':<28} {before - after:7.3f} ms ({(1 - after / before) * 100:.0f}%)")
+    print()
+    _bench("build() only", build_only, args.calls)
+    _bench("pool.get() only", pool_lookup, args.calls)
+
+    server.shutdown()
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""バズ動画分析の結果（セッションに保持する分）のメモリ量の計測.
+
+JSON から読み込んだ検索結果を、次の3つの形で保持したときの確保バイト数を
+tracemalloc で比較する。同じチャンネルの動画が多いほど差が開く。
+
+- 従来の VideoInfo（__dict__ あり、チャンネル名・登録者数を動画ごとに保持）
+- __slots__ つきの VideoInfo + 共有 ChannelInfo
+- VideoTable（列指向。チャンネル文字列・サムネイルURLの共通部分を共有）
+
+    python -m benchmarks.bench_memory [--videos 20000] [--channels 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from src.video_table import VideoTable
+from src.youtube_api import ChannelInfo, VideoInfo
+
+
+@dataclass
+class _LegacyVideoInfo:
+    """変更前の VideoInfo と同じレイアウト."""
+
+    video_id: str
+    title: str
+    channel_id: str
+    channel_title: str
+    published_at: str
+    thumbnail_url: str
+    view_count: int = 0
+    subscriber_count: int = 0
+    vs_ratio: float = 0.0
+
+
+def _records(videos: int, channels: int, seed: int = 0) -> list[dict]:
+    """API レスポンス相当の動画レコード（JSON 経由で読み込み、文字列は行ごとに別オブジェクト）."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(videos):
+        video_id = f"{i:011d}"
+        channel = rng.randrange(channels)
+        rows.append({
+            "video_id": video_id,
+            "title": f"【検証】サンプル動画タイトル その{i}",
+            "channel_id": f"UC{channel:022d}",
+            "channel_title": f"サンプルチャンネル{channel}",
+            "published_at": f"2026-01-{rng.randrange(1, 29):02d}T{rng.randrange(24):02d}:00:00Z",
+            "thumbnail_url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+            "view_count": rng.randrange(10_000_000),
+            "subscriber_count": channel * 1000,
+        })
+    return json.loads(json.dumps(rows))
+
+
+def _legacy(records: list[dict]) -> list[_LegacyVideoInfo]:
+    return [
+        _LegacyVideoInfo(**r, vs_ratio=r["view_count"] / max(r["subscriber_count"], 1))
+        for r in records
+    ]
+
+
+def _slotted(records: list[dict]) -> list[VideoInfo]:
+    channels: dict[str, ChannelInfo] = {}
+    videos = []
+    for r in records:
+        channel = channels.get(r["channel_id"])
+        if channel is None:
+            channel = channels[r["channel_id"]] = ChannelInfo(
+                r["channel_id"], r["channel_title"], r["subscriber_count"],
+            )
+        videos.append(VideoInfo(
+            video_id=r["video_id"],
+            title=r["title"],
+            channel=channel,
+            published_at=r["published_at"],
+            thumbnail_url=r["thumbnail_url"],
+            view_count=r["view_count"],
+            vs_ratio=r["view_count"] / max(r["subscriber_count"], 1),
+        ))
+    return videos
+
+
+def _table(records: list[dict]) -> VideoTable:
+    return VideoTable.from_columns(**{
+        name: [r[name] for r in records]
+        for name in (
+            "video_id", "title", "channel_id", "channel_title", "published_at",
+            "thumbnail_url", "view_count", "subscriber_count",
+        )
+    })
+
+
+def _retained_bytes(build: Callable[[list[dict]], object], videos: int, channels: int) -> int:
+    """build の結果を保持している間の確保バイト数（入力レコードは含めない）."""
+    records = _records(videos, channels)
+    gc.collect()
+    tracemalloc.start()
+    result = build(records)
+    del records  # 入力は解放し、結果から参照されている分だけを数える
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--videos", type=int, default=20_000)
+    parser.add_argument("--channels", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.videos:,} videos from {args.channels:,} channels")
+    baseline = _retained_bytes(_legacy, args.videos, args.channels)
+    for label, build in (
+        ("dataclass VideoInfo (before)", _legacy),
+        ("slotted VideoInfo + ChannelInfo", _slotted),
+        ("VideoTable (columnar)", _table),
+    ):
+        size = baseline if build is _legacy else _retained_bytes(build, args.videos, args.channels)
+        print(
+            f"{label:<32} {size / 1024 / 1024:8.2f} MiB"
+            f"  {size / args.videos:7.0f} B/video  ({size / baseline * 100:5.1f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
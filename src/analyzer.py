@@ -2,24 +2,42 @@
 
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass
+from typing import Iterator, Sequence
+
 import pandas as pd
 
+from src.concurrency import parallel_map
+from src.constants import (
+    DEEP_SEARCH_TARGET_COUNT,
+    SEARCH_DETAIL_UNITS_PER_PAGE,
+    SEARCH_UNITS,
+    YOUTUBE_STATISTICS_USE_BATCH,
+)
+from src.disk_cache import get_disk_cache
+from src.quota_planner import estimate_detail_units
 from src.ui_components import extract_thumbnail_url
-from src.utils import video_url, channel_url
+from src.video_table import VideoTable
 from src.youtube_api import (
+    QuotaBudget,
     VideoInfo,
-    get_channel_details,
-    get_video_details,
+    fetch_statistics,
+    iter_search_pages,
+    search_page_cache_key,
     search_videos,
 )
 
+logger = logging.getLogger("youtube_analyzer")
+
 
 def fetch_and_analyze(
     api_key: str,
     query: str,
     max_results: int = 50,
     published_after: str | None = None,
-) -> list[VideoInfo]:
+    use_batch: bool = YOUTUBE_STATISTICS_USE_BATCH,
+) -> VideoTable:
     """検索 → 動画詳細 → チャンネル詳細 → V/S比率計算を一括実行する.
 
     Args:
@@ -27,123 +45,380 @@ def fetch_and_analyze(
         query: 検索クエリ
         max_results: 最大取得件数
         published_after: ISO 8601形式の日付フィルタ
+        use_batch: 統計取得をBatchHttpRequestで1往復にまとめるか
 
     Returns:
-        VideoInfo のリスト（V/S比率計算済み）
+        V/S比率計算済みの VideoTable
     """
     # Step 1: 検索
     search_results = search_videos(api_key, query, max_results, published_after)
     if not search_results:
-        return []
+        return VideoTable.empty()
 
-    # Step 2: 検索結果からID・基本情報を抽出
-    videos, video_ids, channel_ids_set = _extract_search_info(search_results)
+    # Step 2: 動画・チャンネル統計情報を取得（チャンネルIDは検索結果から
+    # 判明しているので、両者のバッチを同時に発行する）
+    stats = fetch_statistics(api_key, _search_ids(search_results), use_batch=use_batch)
 
-    # Step 3: 動画・チャンネル統計情報を取得
-    video_stats = get_video_details(api_key, tuple(video_ids))
-    channel_stats = get_channel_details(api_key, tuple(channel_ids_set))
+    # Step 3: 列指向テーブルにまとめてV/S比率を計算
+    return _build_table(search_results, stats["videos"], stats["channels"])
 
-    # Step 4: V/S比率計算
-    _calculate_vs_ratios(videos, video_stats, channel_stats)
 
-    return videos
+def iter_analyze_pages(
+    api_key: str,
+    query: str,
+    budget: QuotaBudget,
+    published_after: str | None = None,
+    use_batch: bool = YOUTUBE_STATISTICS_USE_BATCH,
+) -> Iterator[VideoTable]:
+    """検索結果をページ単位で取得し、届いたページから順にV/S比率を計算して返す.
+
+    ページをまたいで重複した動画は除外する。予算を使い切るか、
+    呼び出し側がイテレーションを止めた時点で検索を打ち切る。
 
+    Args:
+        api_key: YouTube API キー
+        query: 検索クエリ
+        budget: 検索・詳細取得を合わせて使ってよいクォータ
+        published_after: ISO 8601形式の日付フィルタ
+        use_batch: 統計取得をBatchHttpRequestで1往復にまとめるか
 
-def _extract_search_info(
-    search_results: list[dict],
-) -> tuple[list[VideoInfo], list[str], set[str]]:
-    """検索結果からVideoInfo・動画ID・チャンネルIDを抽出する."""
-    videos: list[VideoInfo] = []
-    video_ids: list[str] = []
-    channel_ids_set: set[str] = set()
-
-    for item in search_results:
-        snippet = item["snippet"]
-        vid = item["id"]["videoId"]
-        video_ids.append(vid)
-        channel_ids_set.add(snippet["channelId"])
-        videos.append(
-            VideoInfo(
-                video_id=vid,
-                title=snippet.get("title", ""),
-                channel_id=snippet["channelId"],
-                channel_title=snippet.get("channelTitle", ""),
-                published_at=snippet.get("publishedAt", ""),
-                thumbnail_url=extract_thumbnail_url(snippet),
-            )
+    Yields:
+        1ページ分の VideoTable（V/S比率計算済み）
+    """
+    for has_statistics, page in _iter_page_events(
+        api_key, query, budget, published_after, use_batch,
+    ):
+        if has_statistics:
+            yield page
+
+
+def _iter_page_events(
+    api_key: str,
+    query: str,
+    budget: QuotaBudget,
+    published_after: str | None,
+    use_batch: bool,
+) -> Iterator[tuple[bool, VideoTable]]:
+    """ページごとに (False, 統計取得前のテーブル) → (True, 統計取得後のテーブル) を返す.
+
+    統計取得前のテーブルは検索結果（タイトル・サムネイル等）だけを持ち、
+    再生数・登録者数・V/S比率は 0。次の要素を要求された時点で統計を取得する。
+    """
+    seen_ids: set[str] = set()
+    for items in iter_search_pages(api_key, query, budget, published_after):
+        items = [item for item in items if item["id"]["videoId"] not in seen_ids]
+        if not items:
+            continue
+        ids_by_resource = _search_ids(items)
+        seen_ids.update(ids_by_resource["videos"])
+        yield False, _build_table(items, {}, {})
+
+        stats = fetch_statistics(api_key, ids_by_resource, use_batch=use_batch, budget=budget)
+        yield True, _build_table(items, stats["videos"], stats["channels"])
+
+
+@dataclass(frozen=True)
+class AnalyzeProgress:
+    """iter_analyze_deep が返す途中経過（1ページにつき、検索直後と統計取得後の2回）."""
+
+    page: VideoTable  # このページで新たに見つかった動画
+    analyzed: int  # これまでに分析した件数（重複除外後。統計取得前のページは含めない）
+    matched: int  # そのうちフィルタを通過した件数
+    target_count: int  # 早期終了する通過件数（0 なら早期終了しない）
+    units_spent: int
+    quota_budget: int
+    # False なら page は検索結果のみ（再生数・登録者数・V/S比率は未取得で 0）
+    has_statistics: bool = True
+
+    @property
+    def fraction(self) -> float:
+        """完了の目安（0〜1）. フィルタ通過件数と予算消費の進み具合の大きい方."""
+        ratios = [self.matched / self.target_count] if self.target_count > 0 else []
+        if self.quota_budget > 0:
+            ratios.append(self.units_spent / self.quota_budget)
+        return min(1.0, max(ratios, default=1.0))
+
+
+def iter_analyze_deep(
+    api_key: str,
+    query: str,
+    quota_budget: int,
+    published_after: str | None = None,
+    max_subscribers: int | None = None,
+    min_views: int | None = None,
+    min_vs_ratio: float | None = None,
+    target_count: int = DEEP_SEARCH_TARGET_COUNT,
+    use_batch: bool = YOUTUBE_STATISTICS_USE_BATCH,
+) -> Iterator[AnalyzeProgress]:
+    """fetch_and_analyze_deep の逐次版. ページが届くたびに途中経過を返す.
+
+    全ページを待たずに表示できるよう、検索ページが届いた時点で検索結果だけの
+    途中経過（has_statistics=False）を返し、そのページの統計（動画・チャンネルは
+    同時に取得する）が揃った時点で V/S比率計算済みの途中経過を返す。
+    引数は fetch_and_analyze_deep と同じ。
+    """
+    budget = QuotaBudget(quota_budget)
+    # フィルタが無ければ全件が通過するので、早期終了せず予算の範囲で取得する
+    if all(f is None for f in (max_subscribers, min_views, min_vs_ratio)):
+        target_count = 0
+    analyzed = matched = 0
+    for has_statistics, page in _iter_page_events(
+        api_key, query, budget, published_after, use_batch,
+    ):
+        if has_statistics:
+            analyzed += len(page)
+            matched += int(page.mask(max_subscribers, min_views, min_vs_ratio).sum())
+        yield AnalyzeProgress(
+            page, analyzed, matched, target_count, budget.spent, quota_budget, has_statistics,
         )
+        if has_statistics and target_count and matched >= target_count:
+            break
+    logger.info(
+        "fetch_and_analyze_deep: query=%r, %d videos, %d matched, %d units spent",
+        query, analyzed, matched, budget.spent,
+    )
 
-    return videos, video_ids, channel_ids_set
 
+def fetch_and_analyze_deep(
+    api_key: str,
+    query: str,
+    quota_budget: int,
+    published_after: str | None = None,
+    max_subscribers: int | None = None,
+    min_views: int | None = None,
+    min_vs_ratio: float | None = None,
+    target_count: int = DEEP_SEARCH_TARGET_COUNT,
+    use_batch: bool = YOUTUBE_STATISTICS_USE_BATCH,
+) -> VideoTable:
+    """クォータ予算内で複数ページを検索・分析する.
 
-def _calculate_vs_ratios(
-    videos: list[VideoInfo],
+    フィルタ通過件数が target_count に達した時点で以降のページは取得しない
+    （フィルタを1つも指定しない場合は早期終了せず、予算の範囲で全ページを取得する）。
+
+    Args:
+        api_key: YouTube API キー
+        query: 検索クエリ
+        quota_budget: この分析で使ってよい最大ユニット数
+        published_after: ISO 8601形式の日付フィルタ
+        max_subscribers: 登録者数上限（早期終了の判定に使用）
+        min_views: 再生数下限（同上）
+        min_vs_ratio: V/S比率下限（同上）
+        target_count: 早期終了するフィルタ通過件数
+        use_batch: 統計取得をBatchHttpRequestで1往復にまとめるか
+
+    Returns:
+        分析済みの全動画の VideoTable（フィルタ未適用）
+    """
+    return VideoTable.concat(
+        progress.page
+        for progress in iter_analyze_deep(
+            api_key, query, quota_budget, published_after,
+            max_subscribers, min_views, min_vs_ratio, target_count, use_batch,
+        )
+        if progress.has_statistics
+    )
+
+
+@dataclass(frozen=True)
+class BatchAnalysis:
+    """複数キーワードの一括分析の結果."""
+
+    videos: VideoTable  # 全キーワードの動画（重複なし、V/S比率の降順）
+    keywords: dict[str, tuple[str, ...]]  # 動画ID → その動画が見つかったキーワード
+    skipped_queries: tuple[str, ...]  # 予算不足で検索しなかったキーワード
+    detail_batches: int  # 重複除外後の統計取得バッチ数（キャッシュ分を含む）
+    naive_detail_batches: int  # キーワードごとに取得した場合のバッチ数
+    detail_shortfall: int = 0  # 予算不足で取得しなかった統計バッチ数
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """videos_to_dataframe() にキーワード列を加えたもの."""
+        df = self.videos.to_dataframe()
+        df.insert(0, "キーワード", ["、".join(self.keywords[v]) for v in self.videos.video_id])
+        return df
+
+
+def fetch_and_analyze_batch(
+    api_key: str,
+    queries: Sequence[str],
+    quota_budget: int,
+    published_after: str | None = None,
+    use_batch: bool = YOUTUBE_STATISTICS_USE_BATCH,
+) -> BatchAnalysis:
+    """複数キーワードを検索し、動画・チャンネルIDを全体で重複除外して一括分析する.
+
+    各キーワードの検索（1ページ・最大50件）は並列に発行する。検索結果が
+    キャッシュ済みのキーワードは無料で使い、その動画・チャンネルの詳細取得分を
+    先に予算から確保する。残りの予算で、検索と詳細取得（1ページ分）を払える
+    キーワードだけを先頭から順に検索する。統計取得は全キーワードの結果を
+    まとめてから1回だけ行うため、共通する動画・チャンネルの詳細は1度しか
+    取得しない。予算が足りない分のバッチは取得せず detail_shortfall に数える。
+
+    Args:
+        api_key: YouTube API キー
+        queries: 検索キーワード（空文字・重複は除く）
+        quota_budget: 検索・詳細取得を合わせて使ってよい最大ユニット数
+        published_after: ISO 8601形式の日付フィルタ
+        use_batch: 統計取得をBatchHttpRequestで1往復にまとめるか
+
+    Returns:
+        V/S比率の降順に並べた結果と、動画ごとのキーワード
+    """
+    queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+    search_budgets = _allocate_search_budgets(queries, quota_budget, published_after)
+
+    def first_page(i: int) -> list[dict] | None:
+        pages = iter_search_pages(
+            api_key, queries[i], search_budgets[i], published_after, reserve_per_page=0,
+        )
+        return next(pages, None)
+
+    outcomes = parallel_map(first_page, range(len(queries)))
+    for outcome in outcomes:
+        if not outcome.ok:
+            raise outcome.error
+
+    items_by_id: dict[str, dict] = {}
+    keywords: dict[str, list[str]] = {}
+    skipped: list[str] = []
+    naive_batches = 0
+    for query, outcome in zip(queries, outcomes):
+        if outcome.value is None:
+            skipped.append(query)
+            continue
+        naive_batches += _detail_batches(_search_ids(outcome.value))
+        for item in outcome.value:
+            video_id = item["id"]["videoId"]
+            items_by_id.setdefault(video_id, item)
+            keywords.setdefault(video_id, []).append(query)
+
+    items = list(items_by_id.values())
+    ids_by_resource = _search_ids(items)
+    search_spent = sum(b.spent for b in search_budgets)
+    detail_budget = max(0, quota_budget - search_spent)
+    shortfall = max(0, estimate_detail_units(ids_by_resource) - detail_budget)
+    stats = fetch_statistics(
+        api_key, ids_by_resource, use_batch=use_batch, budget=QuotaBudget(detail_budget),
+    )
+    videos = _build_table(items, stats["videos"], stats["channels"]).sort_by("vs_ratio")
+    result = BatchAnalysis(
+        videos=videos,
+        keywords={video_id: tuple(qs) for video_id, qs in keywords.items()},
+        skipped_queries=tuple(skipped),
+        detail_batches=_detail_batches(ids_by_resource),
+        naive_detail_batches=naive_batches,
+        detail_shortfall=shortfall,
+    )
+    logger.info(
+        "fetch_and_analyze_batch: %d queries (%d skipped), %d unique videos, "
+        "detail batches %d (vs %d per query, %d unaffordable), %d search units",
+        len(queries), len(skipped), len(videos), result.detail_batches,
+        result.naive_detail_batches, shortfall, search_spent,
+    )
+    return result
+
+
+def _allocate_search_budgets(
+    queries: list[str], quota_budget: int, published_after: str | None,
+) -> list[QuotaBudget]:
+    """キーワードごとの検索予算（SEARCH_UNITS なら検索可、0 ならキャッシュのみ）.
+
+    キャッシュ済みのキーワードは予算を使わず、その詳細取得分（重複除外後）を
+    先に確保する。未キャッシュのキーワードには、残りで検索と1ページ分の
+    詳細取得を払える限り先頭から枠を割り当てる。
+    """
+    cache = get_disk_cache()
+    cached_items: list[dict] = []
+    uncached: set[str] = set()
+    for query in queries:
+        page = cache.peek("search", search_page_cache_key(query, 50, published_after, None))
+        if page is None:
+            uncached.add(query)
+        else:
+            cached_items.extend(page["items"])
+
+    page_cost = SEARCH_UNITS + SEARCH_DETAIL_UNITS_PER_PAGE
+    committed = estimate_detail_units(_search_ids(cached_items))
+    budgets = []
+    for query in queries:
+        units = 0
+        if query in uncached and committed + page_cost <= quota_budget:
+            committed += page_cost
+            units = SEARCH_UNITS
+        budgets.append(QuotaBudget(units))
+    return budgets
+
+
+def _detail_batches(ids_by_resource: dict[str, tuple[str, ...]]) -> int:
+    """統計取得のバッチ数（50件ずつ）."""
+    return sum(-(-len(ids) // 50) for ids in ids_by_resource.values())
+
+
+def _search_ids(search_results: list[dict]) -> dict[str, tuple[str, ...]]:
+    """検索結果から統計取得対象の動画ID・チャンネルID（重複なし）を取り出す."""
+    video_ids = tuple(item["id"]["videoId"] for item in search_results)
+    channel_ids = tuple(dict.fromkeys(item["snippet"]["channelId"] for item in search_results))
+    return {"videos": video_ids, "channels": channel_ids}
+
+
+def _build_table(
+    search_results: list[dict],
     video_stats: dict[str, dict],
     channel_stats: dict[str, dict],
-) -> None:
-    """動画リストにV/S比率を計算・設定する（in-place）."""
-    for v in videos:
-        stats = video_stats.get(v.video_id, {})
-        v.view_count = int(stats.get("viewCount", 0))
+) -> VideoTable:
+    """検索結果と統計情報から VideoTable を作る（V/S比率は列ごとに一括計算）."""
+    snippets = [item["snippet"] for item in search_results]
+    channel_ids = [s["channelId"] for s in snippets]
+    video_ids = [item["id"]["videoId"] for item in search_results]
 
-        ch_stats = channel_stats.get(v.channel_id, {})
+    subscribers_by_channel = {}
+    for channel_id in set(channel_ids):
+        ch_stats = channel_stats.get(channel_id, {})
         if ch_stats.get("hiddenSubscriberCount", False):
-            v.subscriber_count = 0
+            subscribers_by_channel[channel_id] = 0
         else:
-            v.subscriber_count = int(ch_stats.get("subscriberCount", 0))
+            subscribers_by_channel[channel_id] = int(ch_stats.get("subscriberCount", 0))
 
-        if v.subscriber_count > 0:
-            v.vs_ratio = v.view_count / v.subscriber_count
-        else:
-            v.vs_ratio = 0.0
+    return VideoTable.from_columns(
+        video_id=video_ids,
+        title=[s.get("title", "") for s in snippets],
+        channel_id=channel_ids,
+        channel_title=[s.get("channelTitle", "") for s in snippets],
+        published_at=[s.get("publishedAt", "") for s in snippets],
+        thumbnail_url=[extract_thumbnail_url(s) for s in snippets],
+        view_count=[int(video_stats.get(vid, {}).get("viewCount", 0)) for vid in video_ids],
+        subscriber_count=[subscribers_by_channel[ch] for ch in channel_ids],
+    )
 
 
 def filter_videos(
-    videos: list[VideoInfo],
+    videos: VideoTable | Sequence[VideoInfo],
     max_subscribers: int | None = None,
     min_views: int | None = None,
     min_vs_ratio: float | None = None,
-) -> list[VideoInfo]:
-    """動画リストをフィルタリングする.
+) -> VideoTable:
+    """動画をフィルタリングする（全条件をブールマスクで合成して1回で絞り込む）.
 
     Args:
-        videos: フィルタ対象のVideoInfoリスト
+        videos: フィルタ対象の VideoTable または VideoInfo のリスト
         max_subscribers: 登録者数上限
         min_views: 再生数下限
         min_vs_ratio: V/S比率下限
 
     Returns:
-        フィルタ適用後のVideoInfoリスト
+        フィルタ適用後の VideoTable（順序は保つ）
     """
-    result = videos
-    if max_subscribers is not None:
-        result = [v for v in result if v.subscriber_count <= max_subscribers]
-    if min_views is not None:
-        result = [v for v in result if v.view_count >= min_views]
-    if min_vs_ratio is not None:
-        result = [v for v in result if v.vs_ratio >= min_vs_ratio]
-    return result
+    return VideoTable.coerce(videos).filter(
+        max_subscribers=max_subscribers, min_views=min_views, min_vs_ratio=min_vs_ratio,
+    )
 
 
-def sort_by_vs_ratio(videos: list[VideoInfo], descending: bool = True) -> list[VideoInfo]:
+def sort_by_vs_ratio(
+    videos: VideoTable | Sequence[VideoInfo], descending: bool = True,
+) -> VideoTable:
     """V/S比率でソートする."""
-    return sorted(videos, key=lambda v: v.vs_ratio, reverse=descending)
-
-
-def videos_to_dataframe(videos: list[VideoInfo]) -> pd.DataFrame:
-    """VideoInfoリストをDataFrameに変換する."""
-    rows = []
-    for v in videos:
-        rows.append(
-            {
-                "タイトル": v.title,
-                "チャンネル": v.channel_title,
-                "再生数": v.view_count,
-                "登録者数": v.subscriber_count,
-                "V/S比率": round(v.vs_ratio, 2),
-                "公開日": v.published_at[:10] if v.published_at else "",
-                "動画URL": video_url(v.video_id),
-                "チャンネルURL": channel_url(v.channel_id),
-            }
-        )
-    return pd.DataFrame(rows)
+    return VideoTable.coerce(videos).sort_by("vs_ratio", descending)
+
+
+def videos_to_dataframe(videos: VideoTable | Sequence[VideoInfo]) -> pd.DataFrame:
+    """動画をDataFrameに変換する."""
+    return VideoTable.coerce(videos).to_dataframe()
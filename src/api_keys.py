@@ -0,0 +1,139 @@
+"""YouTube Data API キーのプール（複数キーの負荷分散・フェイルオーバー）.
+
+YouTube Data API のクォータは1キーあたり1日10,000ユニット。
+複数のキーを登録すると、呼び出しごとに本日の消費が最も少ないキーを選び、
+クォータ超過（403）を返したキーはその日のうちは使わない。
+台帳はキーごと（key_fingerprint）に記録し、キーそのものは保存しない。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections.abc import Mapping
+
+from src.quota_ledger import QuotaLedger, get_quota_ledger
+
+logger = logging.getLogger("youtube_analyzer")
+
+
+def key_fingerprint(api_key: str) -> str:
+    """台帳・画面表示用のキー識別子（キーを復元できない短いハッシュ）."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def load_api_keys(secrets: Mapping) -> list[str]:
+    """secrets から APIキーの一覧を読み込む.
+
+    `YOUTUBE_API_KEYS`（リストまたはカンマ区切り）と、従来の
+    `YOUTUBE_API_KEY` の両方に対応する。重複は除く。
+    """
+    keys: list[str] = []
+    raw = secrets.get("YOUTUBE_API_KEYS", [])
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    keys.extend(raw)
+    keys.append(secrets.get("YOUTUBE_API_KEY", ""))
+    return list(dict.fromkeys(k.strip() for k in keys if k and k.strip()))
+
+
+class ApiKeyPool:
+    """APIキーの集合。選択・使い切りの記録・合計残量を扱う.
+
+    ensure_quota に渡せるよう、QuotaLedger と同じく can_spend / remaining を持つ
+    （プール全体の合計）。
+    """
+
+    def __init__(self, keys: list[str]) -> None:
+        self.keys = list(dict.fromkeys(keys))
+
+    def ledger(self, api_key: str) -> QuotaLedger:
+        return get_quota_ledger(key_fingerprint(api_key))
+
+    def select(self, units: int, exclude: set[str] | frozenset[str] = frozenset()) -> str | None:
+        """units を払えるキーのうち、本日の消費が最も少ないものを返す（無ければ None）."""
+        best: str | None = None
+        best_used = 0
+        for key in self.keys:
+            if key in exclude:
+                continue
+            ledger = self.ledger(key)
+            if not ledger.can_spend(units):
+                continue
+            used = ledger.used
+            if best is None or used < best_used:
+                best, best_used = key, used
+        return best
+
+    def mark_exhausted(self, api_key: str) -> None:
+        logger.warning(
+            "api key %s returned quotaExceeded; skipping it until the daily reset",
+            key_fingerprint(api_key),
+        )
+        self.ledger(api_key).mark_exhausted()
+
+    @property
+    def daily_limit(self) -> int:
+        return sum(self.ledger(k).daily_limit for k in self.keys)
+
+    @property
+    def used(self) -> int:
+        return sum(self.ledger(k).used for k in self.keys)
+
+    @property
+    def remaining(self) -> int:
+        return sum(self.ledger(k).remaining for k in self.keys if not self.ledger(k).exhausted)
+
+    @property
+    def spendable(self) -> int:
+        """予備枠を除いて本日まだ使えるユニット数（全キー合計）."""
+        return sum(self.ledger(k).spendable for k in self.keys)
+
+    def can_spend(self, units: int) -> bool:
+        return units <= self.spendable
+
+    def status(self) -> list[dict]:
+        """キーごとの本日の消費状況を返す."""
+        rows = []
+        for key in self.keys:
+            ledger = self.ledger(key)
+            rows.append({
+                "key": key_fingerprint(key),
+                "used": ledger.used,
+                "remaining": 0 if ledger.exhausted else ledger.remaining,
+                "exhausted": ledger.exhausted,
+            })
+        return rows
+
+
+_configured_pool: ApiKeyPool | None = None
+_single_pools: dict[str, ApiKeyPool] = {}
+_pool_lock = threading.Lock()
+
+
+def configure_key_pool(keys: list[str]) -> ApiKeyPool:
+    """アプリ起動時に secrets のキー一覧でプロセス共通のプールを設定する."""
+    global _configured_pool
+    with _pool_lock:
+        if _configured_pool is None or _configured_pool.keys != list(dict.fromkeys(keys)):
+            _configured_pool = ApiKeyPool(keys)
+        return _configured_pool
+
+
+def get_key_pool(api_key: str | None = None) -> ApiKeyPool:
+    """api_key を含むプールを返す.
+
+    設定済みのプールに api_key が含まれていればそのプール、
+    そうでなければ api_key 1つだけのプールを返す。
+    """
+    with _pool_lock:
+        pool = _configured_pool
+        if pool is not None and (api_key is None or api_key in pool.keys):
+            return pool
+        if api_key is None:
+            return ApiKeyPool([])
+        single = _single_pools.get(api_key)
+        if single is None:
+            single = _single_pools[api_key] = ApiKeyPool([api_key])
+        return single
@@ -0,0 +1,109 @@
+"""API呼び出しを並列実行するためのスレッドプール."""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from src.constants import API_MAX_WORKERS
+
+logger = logging.getLogger("youtube_analyzer")
+
+_THREAD_PREFIX = "yta-worker"
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+@dataclass
+class TaskResult:
+    """並列実行した1タスクの結果（成功時は value、失敗時は error）."""
+
+    value: Any = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """プロセス共通のスレッドプールを取得する.
+
+    呼び出しごとにスレッドを作らず、同時実行数も API_MAX_WORKERS に抑える。
+    YouTubeクライアントと keep-alive 接続はスレッドに依らず
+    YouTubeClientPool が共有するため、どのワーカーからでも再利用される。
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=API_MAX_WORKERS, thread_name_prefix=_THREAD_PREFIX,
+                )
+    return _executor
+
+
+def _in_worker() -> bool:
+    return threading.current_thread().name.startswith(_THREAD_PREFIX)
+
+
+def parallel_map(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+) -> list[TaskResult]:
+    """items の各要素に func を並列適用し、入力と同じ順序で結果を返す.
+
+    - 例外はタスクごとに TaskResult.error に格納し、他のタスクは継続する
+    - 呼び出し元の ScriptRunContext と contextvars をワーカーに引き継ぐ
+      （st.session_state をワーカー内で使えるようにする）。ワーカーは使い回す
+      ため、タスク終了後に ScriptRunContext を元に戻し、前のセッションの
+      状態を保持したり別セッションの st.session_state に触れたりしないようにする
+    - ワーカー内からの入れ子呼び出しはデッドロックを避けるため逐次実行する
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    if len(items) == 1 or _in_worker():
+        return [_run_inline(func, item) for item in items]
+
+    script_ctx = get_script_run_ctx()
+
+    def task(item: Any) -> Any:
+        if script_ctx is None:
+            return func(item)
+        thread = threading.current_thread()
+        previous = get_script_run_ctx(suppress_warning=True)
+        add_script_run_ctx(thread, script_ctx)
+        try:
+            return func(item)
+        finally:
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+
+    executor = _get_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, task, item)
+        for item in items
+    ]
+    results: list[TaskResult] = []
+    for future in futures:
+        try:
+            results.append(TaskResult(value=future.result()))
+        except Exception as e:
+            results.append(TaskResult(error=e))
+    return results
+
+
+def _run_inline(func: Callable[[Any], Any], item: Any) -> TaskResult:
+    try:
+        return TaskResult(value=func(item))
+    except Exception as e:
+        return TaskResult(error=e)
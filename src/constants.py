@@ -7,6 +7,8 @@ from typing import Optional
 # ─── UI設定 ────────────────────────────────────────
 UI_COLS_PER_ROW = 3
 UI_MAX_DISPLAY_VIDEOS = 15
+# 分析中に途中結果として表示する上位件数
+UI_PROGRESS_PREVIEW_VIDEOS = 6
 
 # ─── デフォルト値 ──────────────────────────────────
 DEFAULT_SEARCH_QUERY = "不動産投資"
@@ -15,10 +17,123 @@ DEFAULT_REGION_CODE = "JP"
 # ─── YouTube API ───────────────────────────────────
 YOUTUBE_MAX_RESULTS = 50
 YOUTUBE_DAILY_QUOTA_LIMIT = 10_000
+# 共有クォータの残りがこの値を下回る呼び出しは拒否する（予備枠）
+YOUTUBE_QUOTA_RESERVE = 100
+SEARCH_UNITS = 100
+# 検索1ページ（50件）の動画・チャンネル統計取得に要する最大ユニット数
+SEARCH_DETAIL_UNITS_PER_PAGE = 2
+# BatchHttpRequest 1回にまとめる呼び出し数の上限（API側の上限は1000）
+YOUTUBE_BATCH_MAX_PARTS = 50
+# statistics の取得が複数バッチ（50件超）になるとき、BatchHttpRequest で1往復にまとめるか。
+# まとめるとキーが1つに固定され（パート単位のフェイルオーバーなし）、他セッションとの
+# 同時取得のまとめ（single-flight）も効かないため既定では無効。接続が遅い環境向け
+YOUTUBE_STATISTICS_USE_BATCH = False
+# User-Agent の先頭に付ける製品名。googleapiclient が末尾に "(gzip)" を付け、
+# Accept-Encoding: gzip と合わせて gzip 圧縮レスポンスが返るようになる
+YOUTUBE_USER_AGENT = "youtube-trend-analyzer"
+# 一時的なエラー（5xx・backendError・rateLimitExceeded）のリトライ。
+# 最大試行回数と、指数バックオフ（ジッター付き）の初回・最大待機秒数
+YOUTUBE_RETRY_ATTEMPTS = 4
+YOUTUBE_RETRY_INITIAL_WAIT = 1.0
+YOUTUBE_RETRY_MAX_WAIT = 16.0
+# asyncio クライアント（src.youtube_async）の接続先と同時接続数の上限
+YOUTUBE_API_BASE_URL = "https://youtube.googleapis.com/youtube/v3"
+YOUTUBE_ASYNC_MAX_CONNECTIONS = 20
+# googleapiclient の接続先（api_endpoint）とマルチパートリクエストの送信先
+YOUTUBE_API_ROOT_URL = "https://youtube.googleapis.com"
+YOUTUBE_BATCH_URL = "https://youtube.googleapis.com/batch"
+
+# ─── YouTube API 部分レスポンス（fields） ────────────
+# 各呼び出しで実際に参照するフィールドだけを要求する。参照箇所を増やす場合はここも更新する
+# etag は条件付き再取得（If-None-Match）に使う
+_THUMBNAIL_FIELDS = "thumbnails(default/url,medium/url,high/url)"
+YOUTUBE_FIELDS = {
+    # 検索結果: analyzer._extract_search_info / tab_genre
+    "search": (
+        "nextPageToken,"
+        f"items(id/videoId,snippet(channelId,title,channelTitle,publishedAt,{_THUMBNAIL_FIELDS}))"
+    ),
+    # 動画統計: analyzer._calculate_vs_ratios / tab_genre
+    "videos": "etag,items(id,statistics/viewCount)",
+    # チャンネル統計: analyzer._calculate_vs_ratios
+    "channels": "etag,items(id,statistics(subscriberCount,hiddenSubscriberCount))",
+    # 急上昇動画: trending_to_dataframe / キーワード・カテゴリ集計 / tab_genre
+    "trending": (
+        f"etag,items(id,snippet(title,channelTitle,categoryId,publishedAt,{_THUMBNAIL_FIELDS}),"
+        "statistics(viewCount,likeCount))"
+    ),
+}
+
+# ─── 上流サービスの接続先 ───────────────────────────
+# フェイクサーバー（src.fake_upstream）のURLを設定すると全クライアントがそちらに接続する
+UPSTREAM_URL_ENV = "YTA_UPSTREAM_URL"
+
+# ─── 並列実行 ──────────────────────────────────────
+API_MAX_WORKERS = 8
 
 # ─── キャッシュTTL（秒） ──────────────────────────
 CACHE_TTL_DEFAULT = 3600
 
+# ─── メモリキャッシュ（プロセス内） ──────────────────
+# 関数結果キャッシュ（src.memory_cache）全体のバイト数上限。超過分はLRUで追い出す
+MEMORY_CACHE_MAX_BYTES = 128 * 1024 * 1024
+MEMORY_CACHE_MAX_BYTES_ENV = "YTA_MEMORY_CACHE_BYTES"
+# 空の結果（0件）の保持秒数。正常な結果だが、すぐ変わりうるので短めに持つ
+MEMORY_CACHE_EMPTY_TTL = 5 * 60
+# 失敗した呼び出しを再実行しない秒数（負のキャッシュ）。連続失敗ごとに倍にし、上限で止める
+MEMORY_CACHE_ERROR_TTL = 30
+MEMORY_CACHE_MAX_ERROR_TTL = 10 * 60
+# 期限切れ後も、失敗時の代替として最後の成功結果を残す秒数
+MEMORY_CACHE_STALE_TTL = 24 * 3600
+
+# ─── 永続キャッシュ（SQLite） ──────────────────────
+DISK_CACHE_PATH = ".cache/api_cache.sqlite3"
+DISK_CACHE_PATH_ENV = "YTA_CACHE_PATH"
+DISK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# クォータ台帳（キャッシュのクリアで消えないよう別ファイル）
+QUOTA_LEDGER_PATH = ".cache/quota_ledger.sqlite3"
+QUOTA_LEDGER_PATH_ENV = "YTA_QUOTA_PATH"
+
+# リソース別TTL（秒）。検索は100ユニットと高価なので長めに保持する。
+# videos/channels は動画ID・チャンネルID単位のエントリ。
+# 再生数は短時間で変わるが、登録者数の変化は緩やか。
+DISK_CACHE_TTL: dict[str, int] = {
+    "search": 6 * 3600,
+    "videos": 3600,
+    "channels": 24 * 3600,
+    "trending": 3600,
+}
+
+# 期限切れ後もエントリを残す時間（秒）。ETag による再検証（If-None-Match）に使う
+DISK_CACHE_STALE_RETENTION = 24 * 3600
+
+# リソース別の最大件数
+DISK_CACHE_MAX_ENTRIES: dict[str, int] = {
+    "search": 2_000,
+    "videos": 50_000,
+    "channels": 20_000,
+    "trending": 500,
+    # 再検証用の ETag（trending はレスポンス、videos / channels は50件バッチ単位）
+    "etag": 5_000,
+    # videos / channels のバッチのID列と、ID → バッチの対応
+    "etag_batch": 5_000,
+    "etag_member": 70_000,
+}
+
+# ─── バズ動画分析の検索深さ（クォータ予算） ──────────
+SEARCH_DEPTH_OPTIONS: dict[str, int] = {
+    "標準（50件・約102ユニット）": 102,
+    "深い（最大150件・約306ユニット）": 306,
+    "さらに深い（最大250件・約510ユニット）": 510,
+}
+
+# 深い検索で、フィルタ通過件数がこの数に達したら以降のページを取得しない
+DEEP_SEARCH_TARGET_COUNT = 50
+
+# 複数キーワードの一括分析で1回に扱うキーワード数の上限
+BATCH_ANALYSIS_MAX_QUERIES = 10
+
 # ─── 期間オプション ────────────────────────────────
 PERIOD_OPTIONS: dict[str, Optional[int]] = {
     "制限なし": None,
@@ -28,6 +143,9 @@ PERIOD_OPTIONS: dict[str, Optional[int]] = {
     "過去1年": 365,
 }
 
+# ジャンル別キーワード検索の地域（regionCode）
+GENRE_SEARCH_REGION = "JP"
+
 GENRE_PERIOD_OPTIONS: dict[str, int] = {
     "過去7日": 7,
     "過去30日": 30,
@@ -69,6 +187,8 @@ GOOGLE_TRENDS_TIMEFRAMES: dict[str, str] = {
 }
 
 # ─── はてなブックマーク カテゴリ ──────────────────────
+# ホットエントリーの保持秒数
+HATENA_CACHE_TTL = 10 * 60
 HATENA_CATEGORIES: dict[str, str] = {
     "総合": "",
     "テクノロジー": "it",
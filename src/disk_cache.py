@@ -0,0 +1,314 @@
+"""SQLiteベースの永続APIレスポンスキャッシュ.
+
+メモリキャッシュ（src.memory_cache）はプロセス内にしか残らず、再起動・再デプロイの度に
+消えてしまう。ここではAPIレスポンス（JSON）をSQLiteファイルに保存し、
+全セッション・全ワーカープロセスで共有する。
+
+- リソース（名前空間）ごとのTTL・最大件数
+- 全体のバイト数上限（超過分はLRUで削除）
+- 期限切れエントリは一定時間残し、ETag による再検証に使う
+- 統計表示・クリア（サイドバーの管理画面から利用）
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from src.constants import (
+    DISK_CACHE_MAX_BYTES,
+    DISK_CACHE_MAX_ENTRIES,
+    DISK_CACHE_PATH,
+    DISK_CACHE_PATH_ENV,
+    DISK_CACHE_STALE_RETENTION,
+    DISK_CACHE_TTL,
+)
+from src.sqlite_store import SQLiteStore
+
+logger = logging.getLogger("youtube_analyzer")
+
+# SQLiteのバインド変数上限（999）を超えないよう IN 句を分割する
+_SQL_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace   TEXT    NOT NULL,
+    key         TEXT    NOT NULL,
+    value       TEXT    NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL    NOT NULL,
+    expires_at  REAL    NOT NULL,
+    accessed_at REAL    NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache (namespace, accessed_at);
+CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at);
+"""
+
+
+def make_cache_key(*parts: Any) -> str:
+    """任意の引数列から安定したキャッシュキーを生成する."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache(SQLiteStore):
+    """名前空間ごとにTTL・件数上限を持つSQLiteキャッシュ."""
+
+    def __init__(
+        self,
+        path: str,
+        ttls: dict[str, int] | None = None,
+        max_entries: dict[str, int] | None = None,
+        max_bytes: int = DISK_CACHE_MAX_BYTES,
+        default_ttl: int = 3600,
+        stale_retention: int = DISK_CACHE_STALE_RETENTION,
+    ) -> None:
+        super().__init__(path, _SCHEMA)
+        self.ttls = dict(DISK_CACHE_TTL if ttls is None else ttls)
+        self.max_entries = dict(DISK_CACHE_MAX_ENTRIES if max_entries is None else max_entries)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_retention = stale_retention
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # ─── 読み書き ─────────────────────────────────────
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        """有効期限内の値を返す。無ければ None."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+        self._count(row is not None)
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def peek(self, namespace: str, key: str) -> Any | None:
+        """get と同じだが、ヒット統計・LRU順を更新しない（見積もり用）."""
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def peek_keys(self, namespace: str, keys: list[str]) -> set[str]:
+        """有効期限内のエントリが存在するキーの集合を返す（統計・LRU順は更新しない）."""
+        now = time.time()
+        present: set[str] = set()
+        conn = self._conn()
+        for i in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[i : i + _SQL_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key FROM cache WHERE namespace = ? "
+                f"AND key IN ({placeholders}) AND expires_at > ?",
+                (namespace, *chunk, now),
+            ).fetchall()
+            present.update(key for (key,) in rows)
+        return present
+
+    def get_stale_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        """期限切れ（保持期間内）を含めて値を返す。統計・LRU順は更新しない."""
+        cutoff = time.time() - self.stale_retention
+        found: dict[str, Any] = {}
+        conn = self._conn()
+        for i in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[i : i + _SQL_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM cache WHERE namespace = ? "
+                f"AND key IN ({placeholders}) AND expires_at > ?",
+                (namespace, *chunk, cutoff),
+            ).fetchall()
+            for key, value in rows:
+                found[key] = json.loads(value)
+        return found
+
+    def touch(self, namespace: str, keys: list[str], ttl: int | None = None) -> int:
+        """既存エントリ（期限切れ含む）の有効期限を延長する.
+
+        304 Not Modified で再検証できたエントリを、値を書き直さずに
+        新しいエントリとして扱うために使う。
+
+        Returns:
+            延長したエントリの合計バイト数
+        """
+        if ttl is None:
+            ttl = self.ttls.get(namespace, self.default_ttl)
+        now = time.time()
+        total = 0
+        with self._transaction() as conn:
+            for i in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[i : i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                params = (namespace, *chunk)
+                total += conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM cache "
+                    f"WHERE namespace = ? AND key IN ({placeholders})",
+                    params,
+                ).fetchone()[0]
+                conn.execute(
+                    f"UPDATE cache SET expires_at = ?, accessed_at = ? "
+                    f"WHERE namespace = ? AND key IN ({placeholders})",
+                    (now + ttl, now, *params),
+                )
+        return total
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        """複数キーをまとめて引き、有効期限内のものだけを {key: value} で返す."""
+        now = time.time()
+        found: dict[str, Any] = {}
+        with self._transaction() as conn:
+            for i in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[i : i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM cache WHERE namespace = ? "
+                    f"AND key IN ({placeholders}) AND expires_at > ?",
+                    (namespace, *chunk, now),
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+            if found:
+                conn.executemany(
+                    "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    [(now, namespace, key) for key in found],
+                )
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def set(self, namespace: str, key: str, value: Any, ttl: int | None = None) -> None:
+        """値を保存し、上限を超えた分をLRUで削除する."""
+        if ttl is None:
+            ttl = self.ttls.get(namespace, self.default_ttl)
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache "
+                "(namespace, key, value, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, len(payload), now, now + ttl, now),
+            )
+            self._evict(conn, namespace, now)
+
+    def set_many(self, namespace: str, items: dict[str, Any], ttl: int | None = None) -> None:
+        """複数の値を1トランザクションで保存する."""
+        if not items:
+            return
+        if ttl is None:
+            ttl = self.ttls.get(namespace, self.default_ttl)
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = json.dumps(value, ensure_ascii=False)
+            rows.append((namespace, key, payload, len(payload), now, now + ttl, now))
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache "
+                "(namespace, key, value, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn, namespace, now)
+
+    def _evict(self, conn: sqlite3.Connection, namespace: str, now: float) -> None:
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now - self.stale_retention,))
+
+        limit = self.max_entries.get(namespace)
+        if limit is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                "  SELECT key FROM cache WHERE namespace = ?"
+                "  ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (namespace, namespace, limit),
+            )
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims: list[tuple[str, str]] = []
+        for ns, key, size in conn.execute(
+            "SELECT namespace, key, size FROM cache ORDER BY accessed_at ASC"
+        ):
+            victims.append((ns, key))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", victims)
+        logger.info("disk_cache: evicted %d entries (%d bytes)", len(victims), freed)
+
+    # ─── 管理 ─────────────────────────────────────────
+
+    def clear(self, namespace: str | None = None) -> int:
+        """キャッシュを削除する。削除件数を返す."""
+        with self._transaction() as conn:
+            if namespace is None:
+                cur = conn.execute("DELETE FROM cache")
+            else:
+                cur = conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+            deleted = cur.rowcount
+        logger.info("disk_cache: cleared %d entries (namespace=%r)", deleted, namespace)
+        return deleted
+
+    def stats(self) -> list[dict]:
+        """名前空間ごとの件数・サイズ・期限切れ件数を返す."""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0), "
+                "SUM(CASE WHEN expires_at <= ? THEN 1 ELSE 0 END) "
+                "FROM cache GROUP BY namespace ORDER BY namespace",
+                (now,),
+            ).fetchall()
+        return [
+            {"namespace": ns, "entries": count, "bytes": size, "expired": expired}
+            for ns, count, size, expired in rows
+        ]
+
+
+_default_cache: DiskCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_disk_cache() -> DiskCache:
+    """プロセス共通のDiskCacheを取得・作成する.
+
+    保存先は環境変数 `YTA_CACHE_PATH` で変更できる。
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                path = os.environ.get(DISK_CACHE_PATH_ENV, DISK_CACHE_PATH)
+                _default_cache = DiskCache(path)
+    return _default_cache
@@ -0,0 +1,549 @@
+"""上流サービスのフェイクサーバー（負荷・レイテンシ計測用）.
+
+YouTube Data API（search.list / videos.list / channels.list / マルチパート）、
+Google サジェスト、Google Trends（RSS・pytrends のエンドポイント）、
+はてなブックマークのホットエントリーRSSを、決定的なダミーデータで応答する。
+レイテンシ・エラー率・レート制限・キーごとのクォータ・ペイロードサイズを
+設定でき、YouTube のクォータ消費（サーバー側の集計）も記録する。
+
+環境変数 YTA_UPSTREAM_URL にこのサーバーのURLを設定すると、アプリの
+各クライアントが接続先をこちらに切り替える（src.upstream）。
+
+    python -m src.fake_upstream --port 8765 --latency 0.2 --error-rate 0.05
+    YTA_UPSTREAM_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+# YouTube Data API のエンドポイント別コスト（ユニット）
+_YOUTUBE_COSTS = {"search": 100, "videos": 1, "channels": 1}
+
+# タイトル・サジェストの生成に使う語（キーワード抽出が意味のある結果を返すように）
+_WORDS = [
+    "料理", "ゲーム実況", "投資", "旅行", "猫", "筋トレ", "ラーメン", "キャンプ",
+    "プログラミング", "英会話", "メイク", "ダイエット", "アニメ", "音楽", "ニュース",
+    "vlog", "shorts", "レビュー", "解説", "ランキング",
+]
+
+
+@dataclass
+class FakeUpstreamConfig:
+    """フェイクサーバーの挙動."""
+
+    latency: float = 0.0
+    """応答前に待つ秒数."""
+    jitter: float = 0.0
+    """latency に加える一様乱数の幅（秒）."""
+    error_rate: float = 0.0
+    """500（YouTube は backendError）を返す確率."""
+    rate_limit_rate: float = 0.0
+    """レート制限を返す確率（YouTube は 403 rateLimitExceeded、その他は 429）."""
+    daily_quota: int | None = None
+    """APIキーごとのクォータ上限。超えると 403 quotaExceeded."""
+    search_pages: int = 5
+    """検索で nextPageToken をたどれるページ数."""
+    description_bytes: int = 0
+    """各動画の snippet.description に詰めるバイト数（ペイロードサイズの調整）."""
+    seed: int | None = None
+
+
+@dataclass
+class _Response:
+    status: int
+    body: bytes = b""
+    content_type: str = "application/json; charset=UTF-8"
+    headers: dict | None = None
+
+
+class FakeUpstreamStats:
+    """受けたリクエストと YouTube のクォータ消費の集計（スレッドセーフ）."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: Counter[str] = Counter()
+        self.statuses: Counter[int] = Counter()
+        self.units: Counter[str] = Counter()
+
+    def record(self, route: str, status: int) -> None:
+        with self._lock:
+            self.requests[route] += 1
+            self.statuses[status] += 1
+
+    def charge(self, key: str, units: int, limit: int | None = None) -> bool:
+        """key の消費を記録する。limit を超える場合は記録せず False を返す."""
+        with self._lock:
+            if limit is not None and self.units[key] + units > limit:
+                return False
+            self.units[key] += units
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "statuses": dict(self.statuses),
+                "units": dict(self.units),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.statuses.clear()
+            self.units.clear()
+
+
+def _digest(*parts: object) -> int:
+    text = "|".join(str(p) for p in parts)
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16)
+
+
+def _json(status: int, payload: object, headers: dict | None = None) -> _Response:
+    return _Response(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+
+def _youtube_error(status: int, reason: str) -> _Response:
+    return _json(status, {"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}})
+
+
+class FakeUpstream:
+    """フェイクサーバー本体。start() でバックグラウンドスレッドで待ち受ける.
+
+    with FakeUpstream(FakeUpstreamConfig(latency=0.1)) as upstream:
+        os.environ["YTA_UPSTREAM_URL"] = upstream.url
+    """
+
+    def __init__(
+        self,
+        config: FakeUpstreamConfig | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config or FakeUpstreamConfig()
+        self.stats = FakeUpstreamStats()
+        self._random = random.Random(self.config.seed)
+        self._random_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.upstream = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> FakeUpstream:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-upstream", daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> FakeUpstream:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ─── ルーティング ──────────────────────────────
+
+    def handle(self, method: str, target: str, headers, body: bytes) -> _Response:
+        """1リクエストを処理する. target は "/<元のホスト>/<パス>?<クエリ>"."""
+        parts = urlsplit(target)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        path = "/" + path
+        params = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        route = self._route_name(host, path, params)
+
+        self._sleep()
+        response = self._inject_failure(route)
+        if response is None:
+            response = self._dispatch(host, path, params, headers, body)
+        self.stats.record(route, response.status)
+        return response
+
+    def _route_name(self, host: str, path: str, params: dict) -> str:
+        if path.startswith("/youtube/v3/"):
+            resource = path.rsplit("/", 1)[-1]
+            return "youtube.trending" if params.get("chart") == "mostPopular" else f"youtube.{resource}"
+        if path == "/batch":
+            return "youtube.batch"
+        return f"{host}{path}"
+
+    def _sleep(self) -> None:
+        delay = self.config.latency
+        if self.config.jitter:
+            with self._random_lock:
+                delay += self._random.uniform(0, self.config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _inject_failure(self, route: str) -> _Response | None:
+        # マルチパートはパートごとに判定する
+        if route == "youtube.batch":
+            return None
+        with self._random_lock:
+            roll = self._random.random()
+        youtube = route.startswith("youtube.")
+        if roll < self.config.error_rate:
+            return _youtube_error(500, "backendError") if youtube else _Response(500, b"error")
+        if roll < self.config.error_rate + self.config.rate_limit_rate:
+            return _youtube_error(403, "rateLimitExceeded") if youtube else _Response(429, b"rate limited")
+        return None
+
+    def _dispatch(self, host: str, path: str, params: dict, headers, body: bytes) -> _Response:
+        if path == "/batch":
+            return self._youtube_batch(headers, body)
+        if path.startswith("/youtube/v3/"):
+            return self._youtube(path.rsplit("/", 1)[-1], params, headers)
+        if path == "/complete/search":
+            return self._suggest(params)
+        if path == "/trending/rss":
+            return self._trends_rss(params)
+        if path.startswith("/trends/"):
+            return self._pytrends(path, params)
+        if host == "b.hatena.ne.jp" and path.startswith("/hotentry"):
+            return self._hatena(path)
+        return _Response(404, b"not found", "text/plain")
+
+    # ─── YouTube Data API ─────────────────────────
+
+    def _youtube(self, resource: str, params: dict, headers) -> _Response:
+        key = params.get("key") or headers.get("X-Goog-Api-Key", "")
+        cost = _YOUTUBE_COSTS.get(resource)
+        if cost is None:
+            return _youtube_error(404, "notFound")
+        if not self.stats.charge(key, cost, self.config.daily_quota):
+            return _youtube_error(403, "quotaExceeded")
+
+        if resource == "search":
+            payload = self._search(params)
+        elif params.get("chart") == "mostPopular":
+            payload = self._most_popular(params)
+        else:
+            payload = self._statistics(resource, params.get("id", "").split(","))
+
+        if "etag" in payload:
+            if headers.get("If-None-Match") == payload["etag"]:
+                return _Response(304, headers={"ETag": payload["etag"]})
+            return _json(200, payload, {"ETag": payload["etag"]})
+        return _json(200, payload)
+
+    def _search(self, params: dict) -> dict:
+        query = params.get("q", "")
+        page = int(params.get("pageToken", "P0")[1:] or 0)
+        size = min(int(params.get("maxResults", 50)), 50)
+        items = []
+        for i in range(size):
+            n = _digest(query, page, i)
+            channel = _digest(query, n % max(size // 2, 1))
+            items.append({
+                "id": {"kind": "youtube#video", "videoId": f"fv{n % 10**9:09d}"},
+                "snippet": self._snippet(n, f"UC{channel % 10**10:010d}", query),
+            })
+        payload = {"items": items}
+        if page + 1 < self.config.search_pages:
+            payload["nextPageToken"] = f"P{page + 1}"
+        return payload
+
+    def _most_popular(self, params: dict) -> dict:
+        category = params.get("videoCategoryId", "0")
+        size = min(int(params.get("maxResults", 5)), 50)
+        items = []
+        for i in range(size):
+            n = _digest("popular", params.get("regionCode", "JP"), category, i)
+            snippet = self._snippet(n, f"UC{n % 10**10:010d}", "")
+            snippet["categoryId"] = category if category != "0" else str(20 + n % 9)
+            items.append({
+                "id": f"tv{n % 10**9:09d}",
+                "snippet": snippet,
+                "statistics": {"viewCount": str(n % 5_000_000), "likeCount": str(n % 50_000)},
+            })
+        return {"etag": self._etag(items), "items": items}
+
+    def _statistics(self, resource: str, ids: list[str]) -> dict:
+        items = []
+        for item_id in filter(None, ids):
+            n = _digest(resource, item_id)
+            if resource == "videos":
+                stats = {"viewCount": str(n % 2_000_000), "likeCount": str(n % 20_000)}
+            else:
+                stats = {"subscriberCount": str(n % 500_000), "hiddenSubscriberCount": False}
+            items.append({"id": item_id, "statistics": stats})
+        return {"etag": self._etag(items), "items": items}
+
+    def _snippet(self, n: int, channel_id: str, query: str) -> dict:
+        words = [_WORDS[(n >> shift) % len(_WORDS)] for shift in (0, 8, 16)]
+        title = " ".join(([query] if query else []) + words)
+        published = datetime.now(timezone.utc) - timedelta(hours=n % (24 * 90))
+        thumb = f"https://i.ytimg.com/vi/fake{n % 10**9}/"
+        return {
+            "channelId": channel_id,
+            "title": title,
+            "channelTitle": f"チャンネル{int(channel_id[2:]) % 1000}",
+            "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "description": "x" * self.config.description_bytes,
+            "thumbnails": {
+                size: {"url": f"{thumb}{size}.jpg"} for size in ("default", "medium", "high")
+            },
+        }
+
+    @staticmethod
+    def _etag(items: list) -> str:
+        return hashlib.sha1(json.dumps(items, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def _youtube_batch(self, headers, body: bytes) -> _Response:
+        """マルチパート（multipart/mixed）の各パートを個別のリクエストとして処理する."""
+        message = BytesParser().parsebytes(
+            f"Content-Type: {headers.get('Content-Type')}\r\n\r\n".encode("utf-8") + body,
+        )
+        boundary = f"batch_{_digest(body) % 10**12}"
+        chunks = []
+        for part in message.get_payload():
+            request = part.get_payload(decode=True) or part.get_payload().encode("utf-8")
+            request_line, _, rest = request.partition(b"\r\n" if b"\r\n" in request else b"\n")
+            _, target, _ = request_line.decode("utf-8").split(" ", 2)
+            part_headers = BytesParser().parsebytes(rest.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n")
+            target = urlsplit(target)
+            response = self._inject_failure("youtube.part") or self._dispatch(
+                "",
+                _strip_host(target.path),
+                {k: v[-1] for k, v in parse_qs(target.query).items()},
+                part_headers,
+                b"",
+            )
+            self.stats.record("youtube.batch_part", response.status)
+            content_id = part.get("Content-ID", "").strip("<>")
+            chunks.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {response.status} {'OK' if response.status < 300 else 'ERROR'}\r\n"
+                f"Content-Type: {response.content_type}\r\n"
+                + "".join(f"{k}: {v}\r\n" for k, v in (response.headers or {}).items())
+                + "\r\n"
+                + response.body.decode("utf-8")
+                + "\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n")
+        return _Response(200, "".join(chunks).encode("utf-8"), f"multipart/mixed; boundary={boundary}")
+
+    # ─── Google サジェスト・Trends ─────────────────
+
+    def _suggest(self, params: dict) -> _Response:
+        query = params.get("q", "")
+        n = _digest("suggest", query)
+        suggestions = [f"{query} {_WORDS[(n + i * 7) % len(_WORDS)]}" for i in range(10)]
+        return _json(200, [query, suggestions])
+
+    def _trends_rss(self, params: dict) -> _Response:
+        geo = params.get("geo", "JP")
+        items = []
+        for i in range(20):
+            n = _digest("rss", geo, i)
+            keyword = f"{_WORDS[n % len(_WORDS)]} {i + 1}"
+            items.append(
+                "<item>"
+                f"<title>{escape(keyword)}</title>"
+                f"<ht:approx_traffic>{(n % 50 + 1) * 1000}+</ht:approx_traffic>"
+                f"<ht:picture>https://example.com/trends/{i}.jpg</ht:picture>"
+                "<ht:news_item>"
+                f"<ht:news_item_title>{escape(keyword)} のニュース</ht:news_item_title>"
+                "<ht:news_item_source>Fake News</ht:news_item_source>"
+                f"<ht:news_item_url>https://example.com/news/{i}</ht:news_item_url>"
+                "</ht:news_item>"
+                "</item>"
+            )
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0" xmlns:ht="https://trends.google.com/trending/rss"><channel>'
+            + "".join(items)
+            + "</channel></rss>"
+        )
+        return _Response(200, xml.encode("utf-8"), "application/rss+xml; charset=UTF-8")
+
+    def _pytrends(self, path: str, params: dict) -> _Response:
+        if path.startswith("/trends/explore"):
+            return _Response(200, b"", "text/html", {"Set-Cookie": "NID=fake; Path=/"})
+        if path == "/trends/api/explore":
+            req = json.loads(params.get("req", "{}"))
+            keyword = (req.get("comparisonItem") or [{}])[0].get("keyword", "")
+            restriction = (
+                {"complexKeywordsRestriction": {"keyword": [{"type": "BROAD", "value": keyword}]}}
+                if keyword else {}
+            )
+            widgets = [
+                {"id": "TIMESERIES", "token": "t", "request": {"keyword": keyword}},
+                {"id": "RELATED_TOPICS", "token": "t", "request": {"restriction": restriction}},
+                {"id": "RELATED_QUERIES", "token": "t", "request": {"restriction": restriction}},
+            ]
+            return self._pytrends_json(4, {"widgets": widgets})
+        if path == "/trends/api/widgetdata/multiline":
+            keyword = json.loads(params.get("req", "{}")).get("keyword", "")
+            start = datetime.now(timezone.utc) - timedelta(weeks=52)
+            timeline = []
+            for week in range(52):
+                value = _digest("iot", keyword, week) % 101
+                at = start + timedelta(weeks=week)
+                timeline.append({
+                    "time": str(int(at.timestamp())),
+                    "formattedTime": at.strftime("%Y-%m-%d"),
+                    "value": [value],
+                    "formattedValue": [str(value)],
+                    "hasData": [True],
+                })
+            return self._pytrends_json(5, {"default": {"timelineData": timeline}})
+        if path == "/trends/api/widgetdata/relatedsearches":
+            return self._pytrends_json(5, {"default": {"rankedList": self._ranked(params)}})
+        return _Response(404, b"not found", "text/plain")
+
+    @staticmethod
+    def _ranked(params: dict) -> list[dict]:
+        restriction = json.loads(params.get("req", "{}")).get("restriction", {})
+        keywords = restriction.get("complexKeywordsRestriction", {}).get("keyword", [])
+        keyword = keywords[0]["value"] if keywords else ""
+        ranked = []
+        for kind in ("top", "rising"):
+            entries = []
+            for i in range(10):
+                n = _digest("related", kind, keyword, i)
+                word = _WORDS[n % len(_WORDS)]
+                entries.append({
+                    "query": f"{keyword} {word}".strip(),
+                    "topic": {"mid": f"/m/{n % 10**6}", "title": word, "type": "トピック"},
+                    "value": n % 100 + 1,
+                    "formattedValue": str(n % 100 + 1),
+                    "hasData": True,
+                    "link": f"/trends/explore?q={word}",
+                })
+            ranked.append({"rankedKeyword": entries})
+        return ranked
+
+    @staticmethod
+    def _pytrends_json(prefix_chars: int, payload: dict) -> _Response:
+        # Google Trends は JSON の前に ")]}'," などを付ける（pytrends が先頭を切り捨てる）
+        prefix = ")]}',"[:prefix_chars]
+        return _Response(200, (prefix + json.dumps(payload, ensure_ascii=False)).encode("utf-8"))
+
+    # ─── はてなブックマーク ───────────────────────
+
+    def _hatena(self, path: str) -> _Response:
+        category = path[len("/hotentry"):].strip("/").removesuffix(".rss") or "all"
+        items = []
+        for i in range(30):
+            n = _digest("hatena", category, i)
+            link = f"https://example.com/{category}/{i}"
+            items.append(
+                f'<item rdf:about="{link}">'
+                f"<title>{escape(_WORDS[n % len(_WORDS)])}の記事 {i + 1}</title>"
+                f"<link>{link}</link>"
+                "<description>記事の概要</description>"
+                "<dc:date>2026-01-15T12:00:00+09:00</dc:date>"
+                f"<dc:subject>{escape(category)}</dc:subject>"
+                f"<hatena:bookmarkcount>{n % 2000}</hatena:bookmarkcount>"
+                f"<hatena:imageurl>https://example.com/{i}.png</hatena:imageurl>"
+                "</item>"
+            )
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rdf:RDF xmlns="http://purl.org/rss/1.0/"'
+            ' xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"'
+            ' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+            ' xmlns:hatena="http://www.hatena.ne.jp/info/xmlns#">'
+            '<channel rdf:about="https://b.hatena.ne.jp/hotentry">'
+            "<title>はてなブックマーク</title><link>https://b.hatena.ne.jp/</link>"
+            "<description>ホットエントリー</description></channel>"
+            + "".join(items)
+            + "</rdf:RDF>"
+        )
+        return _Response(200, xml.encode("utf-8"), "application/rss+xml; charset=UTF-8")
+
+
+def _strip_host(path: str) -> str:
+    """"/<ホスト>/youtube/v3/videos" のようなパスから元のパスを取り出す."""
+    index = path.find("/youtube/v3/")
+    return path[index:] if index >= 0 else path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._serve(b"")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        self._serve(self.rfile.read(length))
+
+    def _serve(self, body: bytes) -> None:
+        upstream: FakeUpstream = self.server.upstream  # type: ignore[attr-defined]
+        response = upstream.handle(self.command, self.path, self.headers, body)
+        self.send_response(response.status)
+        if response.status != 304:
+            self.send_header("Content-Type", response.content_type)
+        for name, value in (response.headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, format: str, *args) -> None:
+        # 負荷試験中にアクセスログで標準エラーが埋まらないようにする
+        pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="応答までの秒数")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency に加える乱数の幅（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 を返す確率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429/rateLimitExceeded を返す確率")
+    parser.add_argument("--daily-quota", type=int, default=None, help="キーごとのクォータ上限")
+    parser.add_argument("--search-pages", type=int, default=5, help="検索でたどれるページ数")
+    parser.add_argument("--description-bytes", type=int, default=0, help="動画ごとの追加ペイロード")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = FakeUpstreamConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        daily_quota=args.daily_quota,
+        search_pages=args.search_pages,
+        description_bytes=args.description_bytes,
+        seed=args.seed,
+    )
+    upstream = FakeUpstream(config, args.host, args.port)
+    print(f"fake upstream listening on {upstream.url}")
+    print(f"  YTA_UPSTREAM_URL={upstream.url} streamlit run app.py")
+    upstream.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,40 @@ from urllib.parse import urlparse
 
 import feedparser
 
+from src.constants import (
+    HATENA_CACHE_TTL,
+    MEMORY_CACHE_EMPTY_TTL,
+    MEMORY_CACHE_ERROR_TTL,
+    MEMORY_CACHE_STALE_TTL,
+)
+from src.memory_cache import memory_cache
+from src.single_flight import coalesce
+from src.upstream import resolve_url
+
 logger = logging.getLogger("youtube_analyzer")
 
 _BASE_URL = "https://b.hatena.ne.jp/hotentry"
 
 
+class HatenaFeedError(Exception):
+    """RSS を取得・解析できなかった."""
+
+
+@memory_cache(
+    ttl=HATENA_CACHE_TTL,
+    empty_ttl=MEMORY_CACHE_EMPTY_TTL,
+    error_ttl=MEMORY_CACHE_ERROR_TTL,
+    stale_ttl=MEMORY_CACHE_STALE_TTL,
+    fallback=lambda error: [],
+)
+@coalesce("hatena")
 def get_hotentry(category: str = "") -> list[dict]:
     """はてなブックマークのホットエントリーを取得する.
 
+    同じカテゴリの同時呼び出しは1回のRSS取得にまとめる。
+    取得に失敗した場合は短時間だけ再取得を控え、その間は最後に取得できた
+    結果（無ければ空のリスト）を返す。
+
     Args:
         category: カテゴリスラッグ（"it", "social" 等）。空文字で総合。
 
@@ -29,14 +55,14 @@ def get_hotentry(category: str = "") -> list[dict]:
         url = f"{_BASE_URL}.rss"
 
     try:
-        feed = feedparser.parse(url)
+        feed = feedparser.parse(resolve_url(url))
     except Exception:
         logger.exception("はてなブックマークRSS取得に失敗しました: %s", url)
-        return []
+        raise
 
     if feed.bozo and not feed.entries:
         logger.warning("はてなブックマークRSS解析エラー: %s", feed.bozo_exception)
-        return []
+        raise HatenaFeedError(f"RSS解析エラー: {feed.bozo_exception}")
 
     entries: list[dict] = []
     for entry in feed.entries:
@@ -0,0 +1,340 @@
+"""メモリ上限つきの関数結果キャッシュ（st.cache_data の置き換え）.
+
+`st.cache_data` は TTL だけで件数・サイズの上限がなく、キーワードの種類が
+増えるほどプロセスのメモリが増え続ける。ここでは全関数で1つのバイト数上限を
+共有し、超えた分は最後に使われた時刻が古いエントリから追い出す（LRU）。
+
+- 値は pickle して保持する。サイズは pickle 後のバイト数で数え、
+  読み出しのたびに復元するため呼び出し側で変更してもキャッシュは壊れない
+  （st.cache_data と同じ振る舞い）
+- 引数名が "_" で始まる引数と self はキーに含めない（st.cache_data と同じ規則）
+- コルーチン関数にも使える。same_cache_as() で別の関数（同期版など）と
+  名前空間・保持方針を共有できる
+- 関数（名前空間）ごとのヒット率・常駐サイズを管理画面に表示する
+
+結果の種類ごとに保持時間を分けられる（memory_cache の引数）:
+
+- 成功: ttl。期限切れ後も stale_ttl の間は「最後の成功結果」として残す
+- 空の結果（0件）: empty_ttl。正常な結果だが、すぐ変わりうるので短めに持つ
+- 失敗（例外）: error_ttl の間は再実行しない（負のキャッシュ）。連続して
+  失敗するたびに倍にする（上限 MEMORY_CACHE_MAX_ERROR_TTL）。その間は
+  最後の成功結果があればそれを、無ければ fallback の結果を返す
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+from src.constants import (
+    MEMORY_CACHE_MAX_BYTES,
+    MEMORY_CACHE_MAX_BYTES_ENV,
+    MEMORY_CACHE_MAX_ERROR_TTL,
+)
+from src.disk_cache import make_cache_key
+
+logger = logging.getLogger("youtube_analyzer")
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Entry:
+    namespace: str
+    payload: bytes
+    expires_at: float
+    stale_until: float
+
+
+@dataclass
+class _Failure:
+    """直近の失敗（負のキャッシュ）."""
+
+    error: BaseException
+    count: int
+    retry_at: float
+
+
+class MemoryCache:
+    """バイト数上限とLRU追い出しを持つプロセス内キャッシュ."""
+
+    _FIELDS = ("hits", "misses", "evictions", "errors", "stale")
+
+    def __init__(self, max_bytes: int = MEMORY_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._failures: dict[tuple[str, str], _Failure] = {}
+        self._bytes = 0
+        self._counts: dict[str, dict[str, int]] = {}
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def get(self, namespace: str, key: str) -> tuple[bool, Any]:
+        """(見つかったか, 値) を返す. 期限切れのエントリはミスとする."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry.expires_at <= now:
+                if entry.stale_until <= now:
+                    self._remove((namespace, key))
+                entry = None
+            if entry is None:
+                self._count(namespace, "misses")
+                return False, None
+            self._entries.move_to_end((namespace, key))
+            self._count(namespace, "hits")
+            payload = entry.payload
+        return True, pickle.loads(payload)
+
+    def get_stale(self, namespace: str, key: str) -> tuple[bool, Any]:
+        """期限切れでも保持期間内なら最後の成功結果を返す（失敗時の代替用）."""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry.stale_until <= time.time():
+                return False, None
+            self._count(namespace, "stale")
+            payload = entry.payload
+        return True, pickle.loads(payload)
+
+    def set(
+        self, namespace: str, key: str, value: Any, ttl: float, stale_ttl: float = 0,
+    ) -> None:
+        """値を保存し、上限を超えた分を古い順に追い出す. 直近の失敗は解除する."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._failures.pop((namespace, key), None)
+            if len(payload) > self.max_bytes:
+                logger.info(
+                    "memory_cache[%s]: %d bytes exceeds the budget, not cached",
+                    namespace, len(payload),
+                )
+                return
+            self._remove((namespace, key))
+            self._entries[(namespace, key)] = _Entry(
+                namespace, payload, expires_at, expires_at + stale_ttl,
+            )
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._count(oldest[0], "evictions")
+                self._remove(oldest)
+
+    def record_failure(
+        self, namespace: str, key: str, error: BaseException, error_ttl: float,
+    ) -> float:
+        """失敗を記録し、再実行まで待つ秒数（連続失敗ごとに倍）を返す."""
+        now = time.time()
+        with self._lock:
+            # 期限の過ぎた失敗記録は捨てる（キーの種類だけ増え続けないように）
+            expired = [
+                k for k, f in self._failures.items()
+                if f.retry_at <= now - MEMORY_CACHE_MAX_ERROR_TTL
+            ]
+            for failure_key in expired:
+                del self._failures[failure_key]
+            previous = self._failures.get((namespace, key))
+            count = previous.count + 1 if previous is not None else 1
+            delay = min(error_ttl * 2 ** (count - 1), MEMORY_CACHE_MAX_ERROR_TTL)
+            self._failures[(namespace, key)] = _Failure(error, count, now + delay)
+            self._count(namespace, "errors")
+        return delay
+
+    def active_failure(self, namespace: str, key: str) -> BaseException | None:
+        """再実行を控えている間なら、その原因の例外を返す."""
+        with self._lock:
+            failure = self._failures.get((namespace, key))
+            if failure is None or failure.retry_at <= time.time():
+                return None
+            return failure.error
+
+    def clear(self, namespace: str | None = None) -> None:
+        """全エントリ（namespace 指定時はその関数の分だけ）を削除する."""
+        with self._lock:
+            for cache_key in [k for k in self._entries if namespace in (None, k[0])]:
+                self._remove(cache_key)
+            for cache_key in [k for k in self._failures if namespace in (None, k[0])]:
+                del self._failures[cache_key]
+
+    def stats(self) -> list[dict]:
+        """名前空間ごとの件数・バイト数・ヒット率."""
+        with self._lock:
+            rows: dict[str, dict] = {
+                namespace: {"entries": 0, "bytes": 0, **counts}
+                for namespace, counts in self._counts.items()
+            }
+            for entry in self._entries.values():
+                row = rows.setdefault(
+                    entry.namespace, {"entries": 0, "bytes": 0, **dict.fromkeys(self._FIELDS, 0)},
+                )
+                row["entries"] += 1
+                row["bytes"] += len(entry.payload)
+        result = []
+        for namespace, row in sorted(rows.items()):
+            lookups = row["hits"] + row["misses"]
+            hit_rate = row["hits"] / lookups if lookups else 0.0
+            result.append({"namespace": namespace, **row, "hit_rate": hit_rate})
+        return result
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def _remove(self, cache_key: tuple[str, str]) -> None:
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= len(entry.payload)
+
+    def _count(self, namespace: str, field: str) -> None:
+        counts = self._counts.setdefault(namespace, dict.fromkeys(self._FIELDS, 0))
+        counts[field] += 1
+
+
+def _default_max_bytes() -> int:
+    value = os.environ.get(MEMORY_CACHE_MAX_BYTES_ENV, "").strip()
+    return int(value) if value else MEMORY_CACHE_MAX_BYTES
+
+
+_default_cache = MemoryCache(_default_max_bytes())
+
+
+def get_memory_cache() -> MemoryCache:
+    """プロセス共通のメモリキャッシュを返す."""
+    return _default_cache
+
+
+def memory_cache(
+    ttl: float,
+    empty_ttl: float | None = None,
+    error_ttl: float | None = None,
+    stale_ttl: float = 0,
+    fallback: Callable[[Exception], Any] | None = None,
+    namespace: str | None = None,
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """関数の結果をメモリキャッシュに保存するデコレータ（st.cache_data の代わり）.
+
+    名前空間は関数の修飾名。ラッパーの clear() でその関数の分だけ削除できる。
+
+    Args:
+        ttl: 成功した結果の保持秒数
+        empty_ttl: 空の結果（len() が0）の保持秒数（None なら ttl と同じ）
+        error_ttl: 失敗後に再実行を控える秒数の初期値（None なら失敗は記録せず例外を送出）
+        stale_ttl: 期限切れ後も最後の成功結果を失敗時の代替として残す秒数
+        fallback: 失敗時に代替の結果が無いときに呼ぶ関数（例外を受け取る。
+            再送出してもよい）。None なら例外をそのまま送出する
+        namespace: 名前空間（省略時は関数の修飾名）
+    """
+    policy = {
+        "ttl": ttl, "empty_ttl": empty_ttl, "error_ttl": error_ttl,
+        "stale_ttl": stale_ttl, "fallback": fallback,
+    }
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        name = namespace or f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        def cache_key(args: tuple, kwargs: dict) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return make_cache_key({
+                arg: value for arg, value in bound.arguments.items()
+                if not arg.startswith("_") and arg != "self"
+            })
+
+        def lookup(cache: MemoryCache, key: str) -> tuple[bool, Any]:
+            """キャッシュ済みの値か、再実行を控えている間の代替を返す."""
+            found, value = cache.get(name, key)
+            if found:
+                return True, value
+            if error_ttl is not None:
+                error = cache.active_failure(name, key)
+                if error is not None:
+                    return True, recover(cache, key, error)
+            return False, None
+
+        def recover(cache: MemoryCache, key: str, error: Exception) -> T:
+            found, value = cache.get_stale(name, key)
+            if found:
+                logger.warning("memory_cache[%s]: serving last good result after %r", name, error)
+                return value
+            if fallback is None:
+                raise error
+            return fallback(error)
+
+        def failed(cache: MemoryCache, key: str, error: Exception) -> T:
+            if error_ttl is None:
+                raise error
+            delay = cache.record_failure(name, key, error, error_ttl)
+            logger.warning(
+                "memory_cache[%s]: call failed (%r), not retrying for %.0fs", name, error, delay,
+            )
+            return recover(cache, key, error)
+
+        def store(cache: MemoryCache, key: str, value: T) -> T:
+            is_empty = hasattr(value, "__len__") and len(value) == 0
+            if is_empty and empty_ttl is not None:
+                cache.set(name, key, value, empty_ttl)
+            else:
+                cache.set(name, key, value, ttl, stale_ttl)
+            return value
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> T:
+                cache = get_memory_cache()
+                key = cache_key(args, kwargs)
+                found, value = lookup(cache, key)
+                if found:
+                    return value
+                try:
+                    value = await func(*args, **kwargs)
+                except Exception as e:
+                    return failed(cache, key, e)
+                return store(cache, key, value)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> T:
+                cache = get_memory_cache()
+                key = cache_key(args, kwargs)
+                found, value = lookup(cache, key)
+                if found:
+                    return value
+                try:
+                    value = func(*args, **kwargs)
+                except Exception as e:
+                    return failed(cache, key, e)
+                return store(cache, key, value)
+
+        wrapper.namespace = name  # type: ignore[attr-defined]
+        wrapper.cache_policy = policy  # type: ignore[attr-defined]
+        wrapper.clear = lambda: get_memory_cache().clear(name)  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def same_cache_as(other: Callable[..., Any]) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """memory_cache 済みの other と同じ名前空間・保持方針でキャッシュするデコレータ.
+
+    引数名（"_" で始まるもの・self を除く）が other と同じ関数に使う。
+    失敗の記録や最後の成功結果も other と共有される。
+    """
+    return memory_cache(**other.cache_policy, namespace=other.namespace)
+
+
+def clear_memory_cache() -> None:
+    """全関数のメモリキャッシュを削除する."""
+    get_memory_cache().clear()
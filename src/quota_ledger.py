@@ -0,0 +1,175 @@
+"""プロセス・セッション共通のYouTube APIクォータ台帳.
+
+YouTube Data API のクォータはAPIキー単位で、太平洋時間の午前0時に
+リセットされる。セッションごとに数えていては複数人で1つのキーを
+共有したときに実態と合わないため、使用量をSQLiteファイルに記録し、
+全セッション・全ワーカープロセスで共有する。台帳はキー（key_id）ごと。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+from zoneinfo import ZoneInfo
+
+from src.constants import (
+    QUOTA_LEDGER_PATH,
+    QUOTA_LEDGER_PATH_ENV,
+    YOUTUBE_DAILY_QUOTA_LIMIT,
+    YOUTUBE_QUOTA_RESERVE,
+)
+from src.sqlite_store import SQLiteStore
+
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_usage (
+    day      TEXT    NOT NULL,
+    key_id   TEXT    NOT NULL,
+    endpoint TEXT    NOT NULL,
+    tab      TEXT    NOT NULL,
+    units    INTEGER NOT NULL,
+    calls    INTEGER NOT NULL,
+    PRIMARY KEY (day, key_id, endpoint, tab)
+);
+CREATE TABLE IF NOT EXISTS exhausted_keys (
+    day    TEXT NOT NULL,
+    key_id TEXT NOT NULL,
+    PRIMARY KEY (day, key_id)
+);
+"""
+
+_current_tab: contextvars.ContextVar[str] = contextvars.ContextVar("quota_tab", default="")
+
+
+@contextmanager
+def quota_scope(tab: str) -> Iterator[None]:
+    """ブロック内のAPI呼び出しを指定タブの消費として記録する."""
+    token = _current_tab.set(tab)
+    try:
+        yield
+    finally:
+        _current_tab.reset(token)
+
+
+def pacific_day(now: datetime) -> str:
+    """クォータの集計日（太平洋時間の日付）を返す."""
+    return now.astimezone(PACIFIC).date().isoformat()
+
+
+class QuotaLedger(SQLiteStore):
+    """太平洋時間の日付ごとに1つのAPIキーのクォータ消費を記録する台帳.
+
+    QuotaTracker と同じインターフェース（used / remaining / add 等）を持つ。
+    同じファイルを複数キーの台帳で共有し、key_id で区別する。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key_id: str = "",
+        daily_limit: int = YOUTUBE_DAILY_QUOTA_LIMIT,
+        reserve: int = YOUTUBE_QUOTA_RESERVE,
+        clock: Callable[[], datetime] | None = None,
+    ) -> None:
+        super().__init__(path, _SCHEMA)
+        self.key_id = key_id
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self._clock = clock or (lambda: datetime.now(PACIFIC))
+
+    def _today(self) -> str:
+        return pacific_day(self._clock())
+
+    def add(self, units: int, endpoint: str = "") -> None:
+        """消費ユニットを記録する（現在のquota_scopeのタブに計上）."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO quota_usage (day, key_id, endpoint, tab, units, calls) "
+                "VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (day, key_id, endpoint, tab) DO UPDATE SET "
+                "units = units + excluded.units, calls = calls + 1",
+                (self._today(), self.key_id, endpoint, _current_tab.get(), units),
+            )
+
+    def mark_exhausted(self) -> None:
+        """APIがクォータ超過を返したキーとして、本日分を使い切った扱いにする."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO exhausted_keys (day, key_id) VALUES (?, ?)",
+                (self._today(), self.key_id),
+            )
+
+    @property
+    def exhausted(self) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM exhausted_keys WHERE day = ? AND key_id = ?",
+            (self._today(), self.key_id),
+        ).fetchone()
+        return row is not None
+
+    @property
+    def used(self) -> int:
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE day = ? AND key_id = ?",
+            (self._today(), self.key_id),
+        ).fetchone()
+        return row[0]
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.daily_limit - self.used)
+
+    @property
+    def usage_percent(self) -> float:
+        return (self.used / self.daily_limit) * 100
+
+    @property
+    def spendable(self) -> int:
+        """予備枠を除いて本日まだ使えるユニット数（使い切ったキーは0）."""
+        if self.exhausted:
+            return 0
+        return max(0, self.daily_limit - self.reserve - self.used)
+
+    def can_spend(self, units: int) -> bool:
+        """予備枠（reserve）を残したまま units を消費できるか."""
+        return units <= self.spendable
+
+    def breakdown(self) -> list[dict]:
+        """本日のエンドポイント別・タブ別の消費内訳を返す."""
+        rows = self._conn().execute(
+            "SELECT endpoint, tab, units, calls FROM quota_usage "
+            "WHERE day = ? AND key_id = ? ORDER BY units DESC",
+            (self._today(), self.key_id),
+        ).fetchall()
+        return [
+            {"endpoint": endpoint, "tab": tab, "units": units, "calls": calls}
+            for endpoint, tab, units, calls in rows
+        ]
+
+    def next_reset(self) -> datetime:
+        """次にクォータがリセットされる時刻（太平洋時間の翌日0時）."""
+        now = self._clock().astimezone(PACIFIC)
+        tomorrow = now.date() + timedelta(days=1)
+        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=PACIFIC)
+
+
+_ledgers: dict[str, QuotaLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_quota_ledger(key_id: str = "") -> QuotaLedger:
+    """キーごとのプロセス共通QuotaLedgerを取得・作成する.
+
+    保存先は環境変数 `YTA_QUOTA_PATH` で変更できる。
+    """
+    with _ledgers_lock:
+        ledger = _ledgers.get(key_id)
+        if ledger is None:
+            path = os.environ.get(QUOTA_LEDGER_PATH_ENV, QUOTA_LEDGER_PATH)
+            ledger = _ledgers[key_id] = QuotaLedger(path, key_id=key_id)
+        return ledger
@@ -0,0 +1,191 @@
+"""YouTube API 呼び出し前のクォータ見積もり・実行プラン.
+
+ボタンを押す前に「この操作で何ユニット使うか」をキャッシュ状況から
+見積もり、残りクォータが足りない場合はページ数を減らす・キャッシュのみで
+実行する、といった縮退プランを返す。タブはプランの budget をそのまま
+fetch_and_analyze_deep などに渡す。
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+from src.api_keys import get_key_pool
+from src.constants import SEARCH_DETAIL_UNITS_PER_PAGE, SEARCH_UNITS
+from src.disk_cache import get_disk_cache
+from src.trending import trending_cache_key
+from src.youtube_api import search_page_cache_key
+
+# 見積もりで追跡する検索ページ数の上限（キャッシュ済みページの連鎖が長い場合の打ち切り）
+_MAX_PLANNED_PAGES = 20
+
+MODE_LIVE = "live"
+MODE_REDUCED = "reduced"
+MODE_CACHED_ONLY = "cached_only"
+
+
+@dataclass
+class QuotaPlan:
+    """1回の操作の見積もり結果."""
+
+    operation: str
+    requested_units: int
+    budget: int
+    expected_units: int
+    saved_units: int
+    pages: int
+    mode: str = MODE_LIVE
+
+    def describe(self) -> str:
+        """UIに表示する説明文."""
+        text = f"予定消費: 最大 約{self.expected_units:,}ユニット"
+        if self.saved_units:
+            text += f"（キャッシュにより約{self.saved_units:,}ユニット節約）"
+        if self.mode == MODE_REDUCED:
+            text += " ・残りクォータに合わせて取得範囲を縮小します"
+        elif self.mode == MODE_CACHED_ONLY:
+            text += " ・残りクォータ不足のためキャッシュ済みデータのみで実行します"
+        return text
+
+
+def available_units() -> int:
+    """予備枠を除いた本日の残りユニット数（キープールの全キー合計）."""
+    return get_key_pool().spendable
+
+
+def plan_search_analysis(
+    query: str,
+    quota_budget: int,
+    published_after: str | None = None,
+    include_channels: bool = True,
+    available: int | None = None,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> QuotaPlan:
+    """検索＋詳細取得（複数ページ含む）の消費ユニットを見積もる.
+
+    iter_search_pages と同じ規則でページをたどる。キャッシュ済みのページは
+    検索コスト0で、含まれる動画・チャンネルのうち未キャッシュ分の詳細取得
+    だけを数える。未キャッシュのページは検索100＋詳細分として数える。
+    """
+    if available is None:
+        available = available_units()
+    budget = min(quota_budget, available)
+    filters = (category_id, region_code)
+    expected, saved, pages = _walk_search_pages(
+        query, budget, published_after, include_channels, *filters,
+    )
+    mode = MODE_LIVE
+    if budget < quota_budget:
+        mode = MODE_REDUCED
+        if pages == 0 or budget < SEARCH_UNITS:
+            budget = 0
+            mode = MODE_CACHED_ONLY
+            expected, saved, pages = _walk_search_pages(
+                query, 0, published_after, include_channels, *filters,
+            )
+    return QuotaPlan(
+        operation="search",
+        requested_units=quota_budget,
+        budget=budget,
+        expected_units=expected,
+        saved_units=saved,
+        pages=pages,
+        mode=mode,
+    )
+
+
+def _walk_search_pages(
+    query: str,
+    budget: int,
+    published_after: str | None,
+    include_channels: bool,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> tuple[int, int, int]:
+    """(予定消費, 節約見込み, ページ数) を返す."""
+    cache = get_disk_cache()
+    page_cost = SEARCH_UNITS + (SEARCH_DETAIL_UNITS_PER_PAGE if include_channels else 1)
+    expected = saved = pages = 0
+    page_token: str | None = None
+
+    for _ in range(_MAX_PLANNED_PAGES):
+        cache_key = search_page_cache_key(
+            query, 50, published_after, page_token, category_id, region_code,
+        )
+        page = cache.peek("search", cache_key)
+        if page is None:
+            # 未キャッシュ: 以降のページトークンは不明なので予算が続く限り数える
+            while expected + page_cost <= budget and pages < _MAX_PLANNED_PAGES:
+                expected += page_cost
+                pages += 1
+            break
+
+        detail_units = _detail_units(cache, page["items"], include_channels)
+        saved += SEARCH_UNITS
+        # 予算を超える分の詳細取得は行われない（払える分のバッチだけ取得する）
+        detail_units = max(0, min(detail_units, budget - expected))
+        expected += detail_units
+        pages += 1
+        page_token = page.get("nextPageToken")
+        if not page_token or not page["items"]:
+            break
+
+    return expected, saved, pages
+
+
+def estimate_detail_units(ids_by_resource: dict[str, tuple[str, ...]]) -> int:
+    """{"videos" | "channels": ID} のうち未キャッシュ分の詳細取得ユニット数（50件で1）."""
+    cache = get_disk_cache()
+    return sum(
+        _missing_batches(cache, resource, list(dict.fromkeys(ids)))
+        for resource, ids in ids_by_resource.items()
+    )
+
+
+def _detail_units(cache, items: list[dict], include_channels: bool) -> int:
+    video_ids = [item["id"]["videoId"] for item in items]
+    units = _missing_batches(cache, "videos", video_ids)
+    if include_channels:
+        channel_ids = list({item["snippet"]["channelId"] for item in items})
+        units += _missing_batches(cache, "channels", channel_ids)
+    return units
+
+
+def _missing_batches(cache, namespace: str, ids: list[str]) -> int:
+    cached = cache.peek_keys(namespace, ids)
+    return math.ceil(len([i for i in ids if i not in cached]) / 50)
+
+
+def plan_trending(
+    category_ids: list[str],
+    region_code: str = "JP",
+    available: int | None = None,
+) -> QuotaPlan:
+    """急上昇動画（カテゴリ別 mostPopular）の消費ユニットを見積もる.
+
+    取得件数によらずカテゴリごとのスナップショットを共有するため、件数は問わない。
+
+    残りが足りない場合も、キャッシュ済みカテゴリと払える分だけが取得される
+    （不足分は ensure_quota で拒否され、取得できたカテゴリだけが返る）。
+    """
+    if available is None:
+        available = available_units()
+    cache = get_disk_cache()
+    keys = [trending_cache_key(region_code, cat_id) for cat_id in category_ids]
+    cached = cache.peek_keys("trending", keys)
+    missing = len(category_ids) - len(cached)
+
+    mode = MODE_LIVE
+    if missing > available:
+        mode = MODE_CACHED_ONLY if available == 0 else MODE_REDUCED
+    return QuotaPlan(
+        operation="trending",
+        requested_units=len(category_ids),
+        budget=min(missing, available),
+        expected_units=min(missing, available),
+        saved_units=len(cached),
+        pages=len(category_ids),
+        mode=mode,
+    )
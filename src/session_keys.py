@@ -4,12 +4,14 @@
 class SessionKeys:
     """session_state のキー名を一元管理する."""
 
-    QUOTA_TRACKER = "quota_tracker"
     TRENDING_VIDEOS = "trending_videos"
     TRENDING_BY_CATEGORY = "trending_by_category"
     GENRE_VIDEOS = "genre_videos"
     GENRE_LABEL = "genre_label"
-    ANALYZED_VIDEOS = "analyzed_videos"
+    ANALYZED_INDEX = "analyzed_index"
+    ANALYZED_QUERY = "analyzed_query"
+    BATCH_ANALYSIS = "batch_analysis"
+    BATCH_INDEX = "batch_index"
     BASE_SUGGESTIONS = "base_suggestions"
     ALL_SUGGESTIONS = "all_suggestions"
     TRENDING_SEARCHES = "trending_searches"
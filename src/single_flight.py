@@ -0,0 +1,181 @@
+"""同一リクエストの同時実行を1回の上流呼び出しにまとめる（single-flight）.
+
+複数セッションが同時に同じキーワードを分析すると、それぞれがキャッシュを
+ミスして同じAPI呼び出しを重複して発行し、クォータも二重に消費する。
+同じキーの呼び出しが実行中であれば、後から来た呼び出しは上流に行かずに
+その完了を待ち、同じ結果（例外を含む）を受け取る。
+
+結果のオブジェクトは待機していた全呼び出しで共有されるため、
+呼び出し側で変更しないこと。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, TypeVar
+
+from src.disk_cache import make_cache_key
+
+logger = logging.getLogger("youtube_analyzer")
+
+T = TypeVar("T")
+
+
+class _Call:
+    """実行中の1呼び出し."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+        # do_async で待っている (イベントループ, Future). 完了時に起こす
+        self.waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def result(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlight:
+    """キーごとに実行中の呼び出しを1つに限るグループ."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.executed = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """key の呼び出しが実行中ならその結果を待ち、無ければ fn を実行する."""
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return call.result()
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._leave(key, call)
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """do() のコルーチン版. 同期版の呼び出しとも同じキーでまとめる.
+
+        待つ側はスレッドを占有せず Future を await する。実行する側が
+        asyncio.to_thread を使うため、待つ側がスレッドプールを埋めると
+        実行する側が進めずに全員が止まってしまう。
+        """
+        call, leader = self._join(key)
+        if not leader:
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            with self._lock:
+                finished = call.done.is_set()
+                if not finished:
+                    call.waiters.append((loop, waiter))
+            if not finished:
+                await waiter
+            return call.result()
+
+        try:
+            call.value = await fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._leave(key, call)
+
+    def _join(self, key: str) -> tuple[_Call, bool]:
+        """(実行中の呼び出し, 自分が実行するか) を返す."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            logger.info("single_flight[%s]: joined in-flight call", self.name)
+        return call, leader
+
+    def _leave(self, key: str, call: _Call) -> None:
+        with self._lock:
+            del self._calls[key]
+            call.done.set()
+            waiters, call.waiters = call.waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # 待っていたループが既に閉じている
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "group": self.name,
+                "executed": self.executed,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._calls),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.executed = 0
+            self.deduplicated = 0
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():  # 待つ側がキャンセル済みなら何もしない
+        waiter.set_result(None)
+
+
+_groups: dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """名前付きのグループを取得・作成する（プロセス共通）."""
+    with _groups_lock:
+        flight = _groups.get(name)
+        if flight is None:
+            flight = _groups[name] = SingleFlight(name)
+        return flight
+
+
+def coalesce(group: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """引数が同じ同時呼び出しを1回にまとめるデコレータ."""
+    flight = get_flight(group)
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            key = make_cache_key(func.__qualname__, args, kwargs)
+            return flight.do(key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def flight_stats() -> list[dict]:
+    """全グループの実行回数・重複排除回数を返す."""
+    with _groups_lock:
+        flights = sorted(_groups.values(), key=lambda f: f.name)
+    return [flight.stats() for flight in flights]
+
+
+def reset_flight_stats() -> None:
+    with _groups_lock:
+        flights = list(_groups.values())
+    for flight in flights:
+        flight.reset_stats()
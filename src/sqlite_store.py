@@ -0,0 +1,50 @@
+"""複数スレッド・複数プロセスで共有するSQLiteファイルの基底クラス."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """スレッドごとに接続を1本保持するSQLiteストア.
+
+    複数プロセスからの同時アクセスはSQLiteのロック（WALモード）に任せる。
+    """
+
+    def __init__(self, path: str, schema: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(schema)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> _Transaction:
+        return _Transaction(self._conn())
+
+
+class _Transaction:
+    """`with` ブロックを1トランザクションとして実行する."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
@@ -8,6 +8,9 @@ from typing import Callable
 
 import requests
 
+from src.single_flight import coalesce
+from src.upstream import resolve_url
+
 logger = logging.getLogger("youtube_analyzer")
 
 SUGGEST_URL = "https://suggestqueries.google.com/complete/search"
@@ -21,8 +24,9 @@ DIGITS = [str(d) for d in range(10)]
 ALL_SUFFIXES = HIRAGANA_CHARS + ALPHABET + DIGITS
 
 
+@coalesce("suggest")
 def fetch_suggestions(query: str) -> list[str]:
-    """単一クエリのサジェストを取得する."""
+    """単一クエリのサジェストを取得する（同時の同一クエリは1回にまとめる）."""
     params = {
         "client": "firefox",
         "ds": "yt",
@@ -30,7 +34,7 @@ def fetch_suggestions(query: str) -> list[str]:
     }
     try:
         resp = requests.get(
-            SUGGEST_URL,
+            resolve_url(SUGGEST_URL),
             params=params,
             timeout=5,
             headers={"User-Agent": "Mozilla/5.0"},
@@ -2,20 +2,25 @@
 
 from __future__ import annotations
 
-from src.session_keys import SessionKeys
+from dataclasses import replace
 
-from datetime import datetime, timedelta
+from src.session_keys import SessionKeys
 
 import streamlit as st
 
-from src.analyzer import (
-    fetch_and_analyze,
-    filter_videos,
-    sort_by_vs_ratio,
-    videos_to_dataframe,
+from src.analyzer import fetch_and_analyze_batch, iter_analyze_deep, videos_to_dataframe
+from src.constants import (
+    BATCH_ANALYSIS_MAX_QUERIES,
+    SEARCH_DEPTH_OPTIONS,
+    SEARCH_DETAIL_UNITS_PER_PAGE,
+    SEARCH_UNITS,
+    UI_PROGRESS_PREVIEW_VIDEOS,
 )
+from src.quota_planner import MODE_LIVE, available_units, plan_search_analysis
 from src.ui_components import csv_download_button, display_video_grid_info
-from src.youtube_api import QuotaExceededError
+from src.utils import published_after_days
+from src.video_table import VideoIndex, VideoTable
+from src.youtube_api import QuotaExceededError, YouTubeForbiddenError
 
 
 def render(
@@ -30,51 +35,182 @@ def render(
     st.subheader("バズ動画分析（V/S比率）")
     st.caption("V/S比率 = 再生数 / 登録者数。高いほど企画力のある動画です。")
 
+    depth_label = st.selectbox(
+        "検索の深さ",
+        options=list(SEARCH_DEPTH_OPTIONS.keys()),
+        key="buzz_depth",
+        help="深くするほど多くの候補を分析します。フィルタ通過件数が十分になった時点で打ち切ります。",
+    )
+
+    published_after = published_after_days(period_days) if period_days else None
+
+    plan = None
+    if search_query:
+        plan = plan_search_analysis(
+            search_query, SEARCH_DEPTH_OPTIONS[depth_label], published_after,
+        )
+        if plan.mode == MODE_LIVE:
+            st.caption(plan.describe())
+        else:
+            st.warning(plan.describe())
+
+    filters = {
+        "max_subscribers": max_subscribers if max_subscribers > 0 else None,
+        "min_views": min_views if min_views > 0 else None,
+        "min_vs_ratio": min_vs_ratio if min_vs_ratio > 0 else None,
+    }
+
     if st.button("分析開始", type="primary", use_container_width=True):
         if not search_query:
             st.warning("サイドバーで検索キーワードを入力してください。")
         else:
-            published_after = None
-            if period_days:
-                dt = datetime.utcnow() - timedelta(days=period_days)
-                published_after = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-
             try:
-                with st.spinner("YouTube APIから動画を検索中..."):
-                    videos = fetch_and_analyze(
-                        api_key, search_query, published_after=published_after
-                    )
-
-                filtered = filter_videos(
-                    videos,
-                    max_subscribers=max_subscribers if max_subscribers > 0 else None,
-                    min_views=min_views if min_views > 0 else None,
-                    min_vs_ratio=min_vs_ratio if min_vs_ratio > 0 else None,
+                videos = _analyze_with_progress(
+                    api_key, search_query, plan.budget, published_after, filters,
                 )
 
-                sorted_videos = sort_by_vs_ratio(filtered)
-                st.session_state[SessionKeys.ANALYZED_VIDEOS] = sorted_videos
+                # フィルタ前の分析結果を索引つきで保持し、フィルタは再描画のたびに適用する
+                st.session_state[SessionKeys.ANALYZED_INDEX] = VideoIndex(videos)
+                st.session_state[SessionKeys.ANALYZED_QUERY] = search_query
 
             except QuotaExceededError:
                 st.warning(
                     "APIクォータを超過しました。"
                     "クォータは太平洋時間の午前0時（日本時間16:00）にリセットされます。"
                 )
-
-    # 結果表示
-    if SessionKeys.ANALYZED_VIDEOS in st.session_state and st.session_state[SessionKeys.ANALYZED_VIDEOS]:
-        sorted_videos = st.session_state[SessionKeys.ANALYZED_VIDEOS]
-        st.success(f"{len(sorted_videos)} 件の動画が見つかりました")
+            except YouTubeForbiddenError as e:
+                st.error(str(e))
+
+    # 結果表示（サイドバーのフィルタを変えても API は呼ばずに絞り込み直す）
+    index: VideoIndex | None = st.session_state.get(SessionKeys.ANALYZED_INDEX)
+    if index is not None:
+        analyzed_query = st.session_state.get(SessionKeys.ANALYZED_QUERY, search_query)
+        _render_results(index, analyzed_query, filters)
+
+    st.divider()
+    _render_batch_analysis(api_key, published_after, filters)
+
+
+def _render_results(index: VideoIndex, analyzed_query: str, filters: dict) -> None:
+    """保持している分析結果を現在のフィルタで絞り込んで表示する."""
+    sorted_videos = index.query(**filters)
+    if sorted_videos:
+        st.success(
+            f"「{analyzed_query}」: 分析した {len(index)} 件のうち "
+            f"{len(sorted_videos)} 件が条件に一致しました"
+        )
 
         display_video_grid_info(sorted_videos, max_display=len(sorted_videos))
 
         st.divider()
         df = videos_to_dataframe(sorted_videos)
         st.dataframe(df, use_container_width=True, height=400)
-        csv_download_button(df, f"buzz_videos_{search_query}.csv", "buzz_csv")
+        csv_download_button(df, f"buzz_videos_{analyzed_query}.csv", "buzz_csv")
 
-    elif SessionKeys.ANALYZED_VIDEOS in st.session_state:
+    else:
         st.info(
             "条件に一致する動画が見つかりませんでした。"
             "フィルタ条件を緩めてお試しください。"
         )
+
+
+def _render_batch_analysis(api_key: str, published_after: str | None, filters: dict) -> None:
+    """複数キーワードの一括分析（キーワード間で重複する動画・チャンネルは1度だけ取得）."""
+    with st.expander("複数キーワードで一括分析"):
+        text = st.text_area(
+            "キーワード（1行に1つ）",
+            key="buzz_batch_queries",
+            help="サジェスト分析の結果などを貼り付けてください。"
+            f"1回に最大 {BATCH_ANALYSIS_MAX_QUERIES} 件まで分析します。",
+        )
+        queries = list(dict.fromkeys(line.strip() for line in text.splitlines() if line.strip()))
+        queries = queries[:BATCH_ANALYSIS_MAX_QUERIES]
+        quota_budget = min(
+            available_units(), len(queries) * (SEARCH_UNITS + SEARCH_DETAIL_UNITS_PER_PAGE),
+        )
+        if queries:
+            st.caption(f"{len(queries)} キーワード・最大 {quota_budget} ユニット")
+
+        if st.button("一括分析", key="buzz_batch_run", disabled=not queries):
+            try:
+                with st.spinner("YouTube APIから動画を検索中..."):
+                    batch = fetch_and_analyze_batch(api_key, queries, quota_budget, published_after)
+                # 索引は1度だけ作り、フィルタの変更は二分探索で絞り込む
+                st.session_state[SessionKeys.BATCH_ANALYSIS] = batch
+                st.session_state[SessionKeys.BATCH_INDEX] = VideoIndex(batch.videos)
+            except QuotaExceededError:
+                st.warning(
+                    "APIクォータを超過しました。"
+                    "クォータは太平洋時間の午前0時（日本時間16:00）にリセットされます。"
+                )
+            except YouTubeForbiddenError as e:
+                st.error(str(e))
+
+        result = st.session_state.get(SessionKeys.BATCH_ANALYSIS)
+        index: VideoIndex | None = st.session_state.get(SessionKeys.BATCH_INDEX)
+        if result is None or index is None:
+            return
+        if result.skipped_queries:
+            st.warning(
+                "クォータ不足のため検索しなかったキーワード: " + "、".join(result.skipped_queries)
+            )
+        if result.detail_shortfall:
+            st.warning(
+                f"クォータ不足のため統計情報 {result.detail_shortfall} バッチ分を取得できませんでした。"
+                "一部の動画の再生数・登録者数・V/S比率が 0 になっています。"
+            )
+        filtered = replace(result, videos=index.query(**filters))
+        st.caption(
+            f"{len(result.videos)} 件（重複除外後）のうち {len(filtered.videos)} 件が条件に一致。"
+            f"詳細取得 {result.detail_batches} バッチ"
+            f"（キーワードごとに取得した場合 {result.naive_detail_batches} バッチ）"
+        )
+        df = filtered.to_dataframe()
+        st.dataframe(df, use_container_width=True, height=400)
+        csv_download_button(df, "buzz_videos_batch.csv", "buzz_batch_csv")
+
+
+def _analyze_with_progress(
+    api_key: str,
+    search_query: str,
+    quota_budget: int,
+    published_after: str | None,
+    filters: dict,
+) -> VideoTable:
+    """ページごとに分析し、進捗バーと途中結果を更新しながら全件を返す.
+
+    検索ページが届いた時点でタイトル・サムネイルを表示し、統計が揃った
+    ページから条件に一致する上位の動画に置き換える。
+    """
+    progress_bar = st.progress(0.0, text="YouTube APIから動画を検索中...")
+    preview = st.empty()
+    pages: list[VideoTable] = []
+    try:
+        for progress in iter_analyze_deep(
+            api_key, search_query, quota_budget, published_after, **filters,
+        ):
+            if not progress.has_statistics:
+                progress_bar.progress(
+                    progress.fraction,
+                    text=f"{len(progress.page)} 件の再生数・登録者数を取得中...",
+                )
+                if not pages:
+                    # 統計の揃ったページがまだ無ければ、検索結果をそのまま見せる
+                    with preview.container():
+                        display_video_grid_info(
+                            progress.page, max_display=UI_PROGRESS_PREVIEW_VIDEOS,
+                            show_metrics=False,
+                        )
+                continue
+            pages.append(progress.page)
+            progress_bar.progress(
+                progress.fraction,
+                text=f"{progress.analyzed} 件を分析済み（条件に一致: {progress.matched} 件）",
+            )
+            top = VideoTable.concat(pages).filter(**filters).top(UI_PROGRESS_PREVIEW_VIDEOS)
+            with preview.container():
+                display_video_grid_info(top, max_display=UI_PROGRESS_PREVIEW_VIDEOS)
+    finally:
+        progress_bar.empty()
+        preview.empty()
+    return VideoTable.concat(pages)
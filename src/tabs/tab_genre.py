@@ -4,15 +4,21 @@ from __future__ import annotations
 
 from src.session_keys import SessionKeys
 
-from datetime import datetime, timedelta
-
 import pandas as pd
 import streamlit as st
 
-from src.constants import GENRE_PERIOD_OPTIONS
+from src.constants import (
+    GENRE_PERIOD_OPTIONS,
+    GENRE_SEARCH_REGION,
+    SEARCH_UNITS,
+    YOUTUBE_MAX_RESULTS,
+)
+from src.quota_planner import MODE_LIVE, plan_search_analysis, plan_trending
 from src.trending import (
     CATEGORY_MAP,
+    fetch_trending_all_categories,
     fetch_trending_videos,
+    flatten_category_videos,
     extract_keywords_from_titles,
 )
 from src.ui_components import (
@@ -20,22 +26,14 @@ from src.ui_components import (
     display_video_grid_raw,
     extract_thumbnail_url,
 )
-from src.youtube_api import (
-    QuotaExceededError,
-    get_quota_tracker,
-    get_video_details,
-    get_youtube_client,
-)
-from src.utils import format_number
+from src.youtube_api import QuotaExceededError, get_video_details, search_videos
+from src.utils import format_number, published_after_days
 
 
 def render(api_key: str, search_query: str) -> None:
     """ジャンル別ランキングタブを描画する."""
     st.subheader("ジャンル別 人気キーワードランキング")
-    st.caption(
-        "指定ジャンル・期間で再生数の多い動画からバズキーワードを抽出します。"
-        "キーワード検索: 102ユニット / キーワードなし: 1ユニット"
-    )
+    st.caption("指定ジャンル・期間で再生数の多い動画からバズキーワードを抽出します。")
 
     _genre_map: dict[str, str] = {"全ジャンル": "0"}
     _genre_map.update({v: k for k, v in CATEGORY_MAP.items()})
@@ -57,16 +55,29 @@ def render(api_key: str, search_query: str) -> None:
         help="空欄の場合はジャンル全体のランキングを取得します",
     )
 
-    if st.button("ランキング取得", type="primary", use_container_width=True, key="genre_btn"):
-        days = GENRE_PERIOD_OPTIONS[selected_period]
-        category_id = _genre_map[selected_genre]
-        has_keyword = bool(genre_keyword.strip())
-        tracker = get_quota_tracker()
+    days = GENRE_PERIOD_OPTIONS[selected_period]
+    category_id = _genre_map[selected_genre]
+    has_keyword = bool(genre_keyword.strip())
+    published_after = published_after_days(days)
+
+    if has_keyword:
+        plan = plan_search_analysis(
+            genre_keyword.strip(), SEARCH_UNITS + 1, published_after, include_channels=False,
+            category_id=_search_category(category_id), region_code=GENRE_SEARCH_REGION,
+        )
+    else:
+        category_ids = list(CATEGORY_MAP) if category_id == "0" else [category_id]
+        plan = plan_trending(category_ids)
+    if plan.mode == MODE_LIVE:
+        st.caption(plan.describe())
+    else:
+        st.warning(plan.describe())
 
+    if st.button("ランキング取得", type="primary", use_container_width=True, key="genre_btn"):
         try:
             if has_keyword:
                 genre_videos = _fetch_with_keyword(
-                    api_key, genre_keyword.strip(), category_id, days, tracker,
+                    api_key, genre_keyword.strip(), category_id, published_after,
                 )
             else:
                 genre_videos = _fetch_without_keyword(api_key, category_id)
@@ -90,30 +101,14 @@ def _fetch_with_keyword(
     api_key: str,
     keyword: str,
     category_id: str,
-    days: int,
-    tracker,
+    published_after: str,
 ) -> list[dict]:
-    """キーワード検索でジャンル別動画を取得する."""
+    """キーワード検索でジャンル別動画を取得する（検索結果はキャッシュを共有する）."""
     with st.spinner(f"「{keyword}」を検索中..."):
-        dt = datetime.utcnow() - timedelta(days=days)
-        published_after = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-        youtube = get_youtube_client(api_key)
-
-        params = {
-            "part": "snippet",
-            "type": "video",
-            "q": keyword,
-            "maxResults": 50,
-            "order": "viewCount",
-            "regionCode": "JP",
-            "publishedAfter": published_after,
-        }
-        if category_id != "0":
-            params["videoCategoryId"] = category_id
-
-        response = youtube.search().list(**params).execute()
-        tracker.add(100)
-        items = response.get("items", [])
+        items = search_videos(
+            api_key, keyword, 50, published_after,
+            category_id=_search_category(category_id), region_code=GENRE_SEARCH_REGION,
+        )
 
         video_ids = tuple(
             item["id"]["videoId"]
@@ -140,28 +135,29 @@ def _fetch_with_keyword(
     return genre_videos
 
 
+def _search_category(category_id: str) -> str | None:
+    """全ジャンル（"0"）はカテゴリで絞り込まない."""
+    return None if category_id == "0" else category_id
+
+
 def _fetch_without_keyword(api_key: str, category_id: str) -> list[dict]:
-    """キーワードなしでジャンル別人気動画を取得する."""
+    """キーワードなしでジャンル別人気動画を取得する.
+
+    全ジャンルは急上昇タブと同じカテゴリ別スナップショットを並列に取得して使う。
+    """
     with st.spinner("人気動画を取得中..."):
         if category_id == "0":
-            all_items = []
-            for cat_id in CATEGORY_MAP:
-                vids = fetch_trending_videos(
-                    api_key, category_id=cat_id, max_results=50,
-                )
-                all_items.extend(vids)
+            all_items = flatten_category_videos(
+                fetch_trending_all_categories(api_key, max_per_category=YOUTUBE_MAX_RESULTS),
+            )
         else:
             all_items = fetch_trending_videos(
-                api_key, category_id=category_id, max_results=50,
+                api_key, category_id=category_id, max_results=YOUTUBE_MAX_RESULTS,
             )
 
         genre_videos = []
-        seen_ids: set[str] = set()
         for v in all_items:
             vid = v.get("id", "")
-            if vid in seen_ids:
-                continue
-            seen_ids.add(vid)
             snippet = v.get("snippet", {})
             stats = v.get("statistics", {})
             genre_videos.append({
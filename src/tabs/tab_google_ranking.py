@@ -5,7 +5,13 @@ from __future__ import annotations
 import pandas as pd
 import streamlit as st
 
-from src.constants import GOOGLE_TRENDS_CATEGORIES, GOOGLE_TRENDS_TIMEFRAMES
+from src.constants import (
+    GOOGLE_TRENDS_CATEGORIES,
+    GOOGLE_TRENDS_TIMEFRAMES,
+    MEMORY_CACHE_ERROR_TTL,
+    MEMORY_CACHE_STALE_TTL,
+)
+from src.memory_cache import memory_cache
 from src.session_keys import SessionKeys
 from src.trends_api import (
     TrendsRateLimitError,
@@ -15,12 +21,16 @@ from src.trends_api import (
 from src.ui_components import csv_download_button
 
 
-@st.cache_data(ttl=6 * 3600, show_spinner=False)
+@memory_cache(
+    ttl=6 * 3600, error_ttl=MEMORY_CACHE_ERROR_TTL, stale_ttl=MEMORY_CACHE_STALE_TTL,
+)
 def _cached_category_related_queries(cat: int, timeframe: str, geo: str = "JP"):
     return get_category_related_queries(cat=cat, timeframe=timeframe, geo=geo)
 
 
-@st.cache_data(ttl=6 * 3600, show_spinner=False)
+@memory_cache(
+    ttl=6 * 3600, error_ttl=MEMORY_CACHE_ERROR_TTL, stale_ttl=MEMORY_CACHE_STALE_TTL,
+)
 def _cached_category_related_topics(cat: int, timeframe: str, geo: str = "JP"):
     return get_category_related_topics(cat=cat, timeframe=timeframe, geo=geo)
 
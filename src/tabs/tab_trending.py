@@ -7,7 +7,9 @@ from src.session_keys import SessionKeys
 import pandas as pd
 import streamlit as st
 
+from src.quota_planner import MODE_LIVE, plan_trending
 from src.trending import (
+    CATEGORY_MAP,
     fetch_trending_all_categories,
     flatten_category_videos,
     extract_keywords_from_titles,
@@ -26,9 +28,15 @@ def render(api_key: str) -> None:
         "クォータ消費: 1ユニット/回"
     )
 
+    plan = plan_trending(list(CATEGORY_MAP))
+    if plan.mode == MODE_LIVE:
+        st.caption(plan.describe())
+    else:
+        st.warning(plan.describe())
+
     if st.button("急上昇データ取得（全カテゴリ）", type="primary", use_container_width=True):
         try:
-            with st.spinner("全カテゴリの急上昇動画を取得中（約15ユニット消費）..."):
+            with st.spinner(f"全カテゴリの急上昇動画を取得中（約{plan.expected_units}ユニット消費）..."):
                 category_videos = fetch_trending_all_categories(api_key)
                 all_videos = flatten_category_videos(category_videos)
 
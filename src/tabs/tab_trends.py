@@ -7,7 +7,8 @@ from src.session_keys import SessionKeys
 import pandas as pd
 import streamlit as st
 
-from src.constants import TREND_PERIOD_MAP
+from src.constants import MEMORY_CACHE_ERROR_TTL, MEMORY_CACHE_STALE_TTL, TREND_PERIOD_MAP
+from src.memory_cache import memory_cache
 from src.trends_api import (
     TrendsRateLimitError,
     get_trending_searches,
@@ -19,12 +20,17 @@ from src.ui_components import csv_download_button
 
 # 同じキーワードの連打や複数タブ間でのリクエスト重複を吸収する。
 # Google Trends データは48時間遅延なので6時間キャッシュは無害。
-@st.cache_data(ttl=6 * 3600, show_spinner=False)
+# 429 などで失敗した直後は再実行せず、前回の結果があればそれを表示する。
+@memory_cache(
+    ttl=6 * 3600, error_ttl=MEMORY_CACHE_ERROR_TTL, stale_ttl=MEMORY_CACHE_STALE_TTL,
+)
 def _cached_interest_over_time(keyword: str, timeframe: str, geo: str = "JP"):
     return get_interest_over_time(keyword, timeframe=timeframe, geo=geo)
 
 
-@st.cache_data(ttl=6 * 3600, show_spinner=False)
+@memory_cache(
+    ttl=6 * 3600, error_ttl=MEMORY_CACHE_ERROR_TTL, stale_ttl=MEMORY_CACHE_STALE_TTL,
+)
 def _cached_related_queries(keyword: str, geo: str = "JP"):
     return get_related_queries(keyword, geo=geo)
 
@@ -2,14 +2,40 @@
 
 from __future__ import annotations
 
+import logging
 import re
 from collections import Counter
 
 import pandas as pd
-import streamlit as st
+from googleapiclient.errors import HttpError
 
-from src.youtube_api import get_youtube_client, get_quota_tracker
+from src.concurrency import TaskResult, parallel_map
+from src.constants import (
+    MEMORY_CACHE_EMPTY_TTL,
+    MEMORY_CACHE_ERROR_TTL,
+    MEMORY_CACHE_STALE_TTL,
+    YOUTUBE_FIELDS,
+    YOUTUBE_MAX_RESULTS,
+)
+from src.disk_cache import get_disk_cache, make_cache_key
+from src.memory_cache import memory_cache
+from src.single_flight import get_flight
+from src.youtube_api import (
+    QuotaExceededError,
+    StoredValidator,
+    classify_http_error,
+    execute_conditional,
+    execute_with_retry,
+    get_youtube_client,
+    load_validator,
+    revalidation_stats,
+    store_etag,
+    with_key_failover,
+)
 
+logger = logging.getLogger("youtube_analyzer")
+
+_trending_flight = get_flight("youtube.trending")
 
 # YouTube動画カテゴリ（日本）
 CATEGORY_MAP = {
@@ -31,17 +57,36 @@ CATEGORY_MAP = {
 }
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
+def _empty_unless_quota(error: Exception) -> list[dict]:
+    """取得失敗は空の結果として扱う. クォータ超過だけは呼び出し元に伝える."""
+    if isinstance(error, QuotaExceededError):
+        raise error
+    return []
+
+
+@memory_cache(
+    ttl=3600,
+    empty_ttl=MEMORY_CACHE_EMPTY_TTL,
+    error_ttl=MEMORY_CACHE_ERROR_TTL,
+    stale_ttl=MEMORY_CACHE_STALE_TTL,
+    fallback=_empty_unless_quota,
+)
 def fetch_trending_videos(
-    api_key: str,
+    _api_key: str,
     region_code: str = "JP",
     max_results: int = 50,
     category_id: str = "0",
 ) -> list[dict]:
     """YouTube急上昇動画を取得する（1ユニット/回）.
 
+    カテゴリごとのスナップショット（fetch_trending_snapshot）の先頭
+    max_results 件を返す。件数が違う呼び出し同士でも取得は1回で済む。
+
+    失敗した場合は短時間だけ再取得を控え、その間は最後に取得できた結果
+    （無ければ空のリスト）を返す。クォータ超過は代替が無ければ送出する。
+
     Args:
-        api_key: YouTube API キー
+        _api_key: YouTube API キー（キャッシュキーには含めない）
         region_code: 地域コード
         max_results: 最大取得件数（上限50）
         category_id: カテゴリID（"0"=全カテゴリ）
@@ -49,51 +94,147 @@ def fetch_trending_videos(
     Returns:
         動画情報のリスト
     """
-    youtube = get_youtube_client(api_key)
+    return fetch_trending_snapshot(_api_key, region_code, category_id)[:max_results]
+
+
+def fetch_trending_snapshot(
+    api_key: str, region_code: str = "JP", category_id: str = "0",
+) -> list[dict]:
+    """カテゴリの急上昇動画を上限件数（50件）で取得する（ディスクキャッシュ経由）.
+
+    キャッシュの期限切れ後は ETag で再検証し、変化がなければ（304）
+    本文を再取得せずキャッシュを延長する。
+    """
+    cache = get_disk_cache()
+    cache_key = trending_cache_key(region_code, category_id)
+    cached = cache.get("trending", cache_key)
+    if cached is not None:
+        revalidation_stats.record("trending", "hit")
+        return cached
+
+    # 他セッションが同じカテゴリを取得中なら、その結果を共有する
+    return _trending_flight.do(
+        cache_key,
+        lambda: _fetch_trending_upstream(api_key, region_code, category_id, cache_key),
+    )
+
+
+def _fetch_trending_upstream(
+    api_key: str,
+    region_code: str,
+    category_id: str,
+    cache_key: str,
+) -> list[dict]:
+    cache = get_disk_cache()
+    params = trending_params(region_code, category_id)
+
+    # 期限切れのキャッシュと ETag が残っていれば条件付きで再取得する
+    validator = load_validator(cache, "trending", [cache_key])
+
+    def call(key: str, tracker) -> dict | None:
+        request = get_youtube_client(key).videos().list(**params)
+        try:
+            response = execute_with_retry(
+                "videos.list (mostPopular)", lambda: execute_conditional(request, validator),
+            )
+        except HttpError as e:
+            raise classify_http_error(e, "fetch_trending_videos") from e
+        tracker.add(1, "videos.list (mostPopular)")
+        return response
+
+    response = with_key_failover(api_key, 1, call)
+    return store_trending(cache, cache_key, response, validator)
+
+
+def trending_params(region_code: str, category_id: str) -> dict:
+    """videos.list（chart=mostPopular）のパラメータ（常に上限件数で取得する）."""
     params = {
         "part": "snippet,statistics",
         "chart": "mostPopular",
         "regionCode": region_code,
-        "maxResults": min(max_results, 50),
+        "maxResults": YOUTUBE_MAX_RESULTS,
+        "fields": YOUTUBE_FIELDS["trending"],
     }
     if category_id != "0":
         params["videoCategoryId"] = category_id
+    return params
 
-    try:
-        response = youtube.videos().list(**params).execute()
-        tracker = get_quota_tracker()
-        tracker.add(1)
-        return response.get("items", [])
-    except Exception:
-        return []
+
+def store_trending(
+    cache, cache_key: str, response: dict | None, validator: StoredValidator | None,
+) -> list[dict]:
+    """mostPopular のレスポンスをキャッシュに保存して動画リストを返す（None は 304）."""
+    if response is None:
+        saved = cache.touch("trending", [cache_key])
+        revalidation_stats.record("trending", "revalidated", saved_bytes=saved)
+        return validator.stale[cache_key]
+    items = response.get("items", [])
+    cache.set("trending", cache_key, items)
+    store_etag(cache, "trending", [cache_key], response.get("etag"))
+    revalidation_stats.record("trending", "miss")
+    return items
+
+
+def trending_cache_key(region_code: str, category_id: str) -> str:
+    """急上昇動画スナップショットの永続キャッシュキー（取得件数は含めない）."""
+    return make_cache_key(region_code, category_id)
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_trending_all_categories(
-    api_key: str,
+    _api_key: str,
     region_code: str = "JP",
     max_per_category: int = 10,
 ) -> dict[str, list[dict]]:
     """全カテゴリの急上昇動画をまとめて取得する.
 
+    カテゴリごとのリクエストはスレッドプールで並列に発行する。
+    一部のカテゴリが失敗しても残りの結果は返す。各カテゴリは
+    fetch_trending_videos と同じスナップショットから切り出す。
+
+    この関数自体はキャッシュしない（カテゴリごとの結果がメモリキャッシュ・
+    スナップショットに載るので、失敗したカテゴリだけが次回再取得される）。
+
     Args:
-        api_key: YouTube API キー
+        _api_key: YouTube API キー
         region_code: 地域コード
         max_per_category: カテゴリあたりの最大取得件数
 
     Returns:
         {カテゴリ名: [動画リスト]} の辞書
     """
-    results: dict[str, list[dict]] = {}
-    for cat_id, cat_name in CATEGORY_MAP.items():
-        videos = fetch_trending_videos(
-            api_key,
+    outcomes = parallel_map(
+        lambda cat_id: fetch_trending_videos(
+            _api_key,
             region_code=region_code,
             max_results=max_per_category,
             category_id=cat_id,
-        )
-        if videos:
-            results[cat_name] = videos
+        ),
+        CATEGORY_MAP,
+    )
+
+    return merge_category_outcomes(outcomes)
+
+
+def merge_category_outcomes(outcomes: list[TaskResult]) -> dict[str, list[dict]]:
+    """CATEGORY_MAP と同じ順序のカテゴリ別結果を {カテゴリ名: 動画リスト} にまとめる.
+
+    失敗したカテゴリは除く。1件も取れずクォータ不足が原因なら例外を送出する。
+    """
+    # CATEGORY_MAP の順序を保ったまま組み立てる
+    results: dict[str, list[dict]] = {}
+    quota_error: QuotaExceededError | None = None
+    for cat_name, outcome in zip(CATEGORY_MAP.values(), outcomes):
+        if not outcome.ok:
+            logger.warning("fetch_trending_all_categories: %s failed: %s", cat_name, outcome.error)
+            if isinstance(outcome.error, QuotaExceededError):
+                quota_error = outcome.error
+            continue
+        if outcome.value:
+            results[cat_name] = outcome.value
+
+    # 1件も取れずクォータ不足が原因なら、空の結果ではなくエラーとして伝える
+    if not results and quota_error is not None:
+        raise quota_error
     return results
 
 
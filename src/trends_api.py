@@ -1,4 +1,7 @@
-"""Google Trends APIクライアント（pytrends + RSS）."""
+"""Google Trends APIクライアント（pytrends + RSS）.
+
+公開関数は同じ引数の同時呼び出しを1回の取得にまとめる（src.single_flight）。
+"""
 
 from __future__ import annotations
 
@@ -7,6 +10,7 @@ import xml.etree.ElementTree as ET
 
 import pandas as pd
 import requests
+import pytrends.request as pytrends_request
 from pytrends.exceptions import TooManyRequestsError
 from pytrends.request import TrendReq
 from tenacity import (
@@ -17,6 +21,9 @@ from tenacity import (
     wait_exponential_jitter,
 )
 
+from src.single_flight import coalesce
+from src.upstream import resolve_url
+
 logger = logging.getLogger("youtube_analyzer")
 
 
@@ -24,6 +31,24 @@ class TrendsRateLimitError(Exception):
     """Google Trends からレート制限（HTTP 429）を受けた場合に送出される."""
 
 
+TRENDS_RSS_URL = "https://trends.google.com/trending/rss"
+
+# pytrends はURLをモジュール変数・クラス属性（TrendReq.XXX_URL）で持つ
+_PYTRENDS_BASE_URL = pytrends_request.BASE_TRENDS_URL
+_PYTRENDS_URLS = {
+    name: value for name, value in vars(TrendReq).items()
+    if name.endswith("_URL") and isinstance(value, str)
+}
+
+
+def _point_pytrends_at_upstream() -> None:
+    """pytrends の接続先を現在の設定（本番またはフェイクサーバー）に合わせる."""
+    base = resolve_url(_PYTRENDS_BASE_URL)
+    pytrends_request.BASE_TRENDS_URL = base
+    for name, url in _PYTRENDS_URLS.items():
+        setattr(TrendReq, name, url.replace(_PYTRENDS_BASE_URL, base, 1))
+
+
 def _build_pytrends() -> TrendReq:
     """pytrendsクライアントを構築する.
 
@@ -31,6 +56,7 @@ def _build_pytrends() -> TrendReq:
     `method_whitelist`を渡すが、urllib3 v2.xで削除されTypeErrorになるため）。
     リトライは外側のtenacityデコレータで実装している。
     """
+    _point_pytrends_at_upstream()
     return TrendReq(
         hl="ja-JP",
         tz=540,
@@ -59,6 +85,7 @@ _retry_pytrends = retry(
 )
 
 
+@coalesce("trends")
 def get_trending_searches(geo: str = "JP") -> list[dict]:
     """急上昇キーワードを取得する（Google Trends RSSから）.
 
@@ -71,8 +98,7 @@ def get_trending_searches(geo: str = "JP") -> list[dict]:
     Raises:
         requests.RequestException: ネットワークエラー時
     """
-    url = f"https://trends.google.com/trending/rss?geo={geo}"
-    resp = requests.get(url, timeout=15)
+    resp = requests.get(resolve_url(TRENDS_RSS_URL), params={"geo": geo}, timeout=15)
     resp.raise_for_status()
 
     try:
@@ -118,6 +144,7 @@ def _fetch_interest_over_time(
     return pytrends.interest_over_time()
 
 
+@coalesce("trends")
 def get_interest_over_time(
     keyword: str,
     timeframe: str = "today 12-m",
@@ -157,6 +184,7 @@ def _fetch_related_queries(keyword: str, geo: str) -> dict:
     return pytrends.related_queries()
 
 
+@coalesce("trends")
 def get_related_queries(
     keyword: str,
     geo: str = "JP",
@@ -189,6 +217,7 @@ def _fetch_related_topics(keyword: str, geo: str) -> dict:
     return pytrends.related_topics()
 
 
+@coalesce("trends")
 def get_related_topics(
     keyword: str,
     geo: str = "JP",
@@ -223,6 +252,7 @@ def _fetch_category_related_queries(
     return pytrends.related_queries()
 
 
+@coalesce("trends")
 def get_category_related_queries(
     cat: int = 0,
     timeframe: str = "today 12-m",
@@ -263,6 +293,7 @@ def _fetch_category_related_topics(
     return pytrends.related_topics()
 
 
+@coalesce("trends")
 def get_category_related_topics(
     cat: int = 0,
     timeframe: str = "today 12-m",
@@ -2,11 +2,20 @@
 
 from __future__ import annotations
 
+from datetime import timedelta, timezone
+
 import pandas as pd
 import streamlit as st
 
+from src.api_keys import get_key_pool
 from src.constants import UI_COLS_PER_ROW, UI_MAX_DISPLAY_VIDEOS
+from src.disk_cache import get_disk_cache
+from src.memory_cache import clear_memory_cache, get_memory_cache
+from src.single_flight import flight_stats
 from src.utils import format_number
+from src.youtube_api import retry_stats, revalidation_stats
+
+_JST = timezone(timedelta(hours=9))
 
 
 def extract_thumbnail_url(snippet: dict) -> str:
@@ -59,10 +68,12 @@ def display_video_grid_info(
     videos: list,
     max_display: int = UI_MAX_DISPLAY_VIDEOS,
     cols_per_row: int = UI_COLS_PER_ROW,
+    show_metrics: bool = True,
 ) -> None:
-    """VideoInfo形式の動画リストをサムネイルグリッドで表示する.
+    """VideoInfo形式の動画リスト（または VideoTable）をサムネイルグリッドで表示する.
 
-    バズ動画分析で使用。
+    バズ動画分析で使用。表示する行だけを取り出す。show_metrics=False なら
+    統計を取得する前の検索結果としてタイトル・サムネイルだけを表示する。
     """
     from src.utils import video_url
 
@@ -77,10 +88,13 @@ def display_video_grid_info(
                 with st.container(border=True):
                     st.image(v.thumbnail_url, use_container_width=True)
                     st.markdown(f"**[{v.title}]({video_url(v.video_id)})**")
-                    metric_cols = st.columns(3)
-                    metric_cols[0].metric("V/S比率", f"{v.vs_ratio:.1f}")
-                    metric_cols[1].metric("再生数", format_number(v.view_count))
-                    metric_cols[2].metric("登録者", format_number(v.subscriber_count))
+                    if show_metrics:
+                        metric_cols = st.columns(3)
+                        metric_cols[0].metric("V/S比率", f"{v.vs_ratio:.1f}")
+                        metric_cols[1].metric("再生数", format_number(v.view_count))
+                        metric_cols[2].metric("登録者", format_number(v.subscriber_count))
+                    else:
+                        st.caption(v.channel_title)
 
 
 def csv_download_button(
@@ -92,3 +106,142 @@ def csv_download_button(
     """統一されたCSVダウンロードボタンを表示する."""
     csv_data = df.to_csv(index=False).encode("utf-8-sig")
     st.download_button(label, csv_data, file_name=filename, mime="text/csv", key=key)
+
+
+def render_quota_status() -> None:
+    """全セッション共通のクォータ使用状況を描画する（サイドバー用）.
+
+    APIキーが複数ある場合は全キーの合計と、キーごとの内訳を表示する。
+    """
+    pool = get_key_pool()
+    if not pool.keys:
+        return
+    used = pool.used
+    daily_limit = pool.daily_limit
+    label = "使用量（全ユーザー合計）"
+    if len(pool.keys) > 1:
+        label = f"使用量（全ユーザー・{len(pool.keys)}キー合計）"
+    st.metric(label, f"{used:,} / {daily_limit:,}")
+    st.progress(min(used / daily_limit, 1.0))
+    first = pool.ledger(pool.keys[0])
+    reset_jst = first.next_reset().astimezone(_JST)
+    st.caption(
+        f"残り約 {pool.remaining:,} ユニット"
+        f"（予備 キーごとに{first.reserve:,}）・リセット {reset_jst:%m/%d %H:%M} (JST)"
+    )
+    if len(pool.keys) > 1:
+        with st.expander("キー別の使用量"):
+            df = pd.DataFrame(pool.status()).rename(columns={
+                "key": "キー（識別子）",
+                "used": "使用",
+                "remaining": "残り",
+                "exhausted": "超過",
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+    breakdown = _merge_breakdown([pool.ledger(k).breakdown() for k in pool.keys])
+    if breakdown:
+        with st.expander("本日の内訳"):
+            df = pd.DataFrame(breakdown).rename(columns={
+                "endpoint": "エンドポイント",
+                "tab": "タブ",
+                "units": "ユニット",
+                "calls": "回数",
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+def _merge_breakdown(breakdowns: list[list[dict]]) -> list[dict]:
+    """キーごとの内訳をエンドポイント・タブ単位で合算する."""
+    merged: dict[tuple[str, str], dict] = {}
+    for rows in breakdowns:
+        for row in rows:
+            total = merged.setdefault(
+                (row["endpoint"], row["tab"]),
+                {"endpoint": row["endpoint"], "tab": row["tab"], "units": 0, "calls": 0},
+            )
+            total["units"] += row["units"]
+            total["calls"] += row["calls"]
+    return sorted(merged.values(), key=lambda r: r["units"], reverse=True)
+
+
+def render_cache_admin() -> None:
+    """永続キャッシュの状況表示とクリアボタンを描画する（サイドバー用）."""
+    cache = get_disk_cache()
+    stats = cache.stats()
+    with st.expander("キャッシュ管理"):
+        total_entries = sum(s["entries"] for s in stats)
+        total_bytes = sum(s["bytes"] for s in stats)
+        st.caption(
+            f"{total_entries:,} 件 / {total_bytes / 1024:,.0f} KB"
+            f"（このプロセスのヒット {cache.hits:,} / ミス {cache.misses:,}）"
+        )
+        if stats:
+            df = pd.DataFrame(stats).rename(columns={
+                "namespace": "リソース",
+                "entries": "件数",
+                "bytes": "バイト",
+                "expired": "期限切れ",
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        revalidation = revalidation_stats.snapshot()
+        if revalidation:
+            st.caption("ETag 再検証（304 は本文の転送・解析なしでキャッシュを延長）")
+            df = pd.DataFrame(revalidation).rename(columns={
+                "namespace": "リソース",
+                "hit": "ヒット",
+                "revalidated": "再検証(304)",
+                "miss": "取得(200)",
+                "saved_bytes": "節約バイト",
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        flights = [f for f in flight_stats() if f["executed"] or f["deduplicated"]]
+        if flights:
+            st.caption("同時リクエストのまとめ（重複排除した上流呼び出し）")
+            df = pd.DataFrame(flights).rename(columns={
+                "group": "API",
+                "executed": "実行",
+                "deduplicated": "重複排除",
+                "in_flight": "実行中",
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        _render_memory_cache_stats()
+        retries = retry_stats.snapshot()
+        if retries:
+            st.caption("一時的なエラーのリトライ（5xx・rateLimitExceeded など）")
+            df = pd.DataFrame(retries).rename(columns={
+                "endpoint": "API",
+                "reason": "理由",
+                "retries": "リトライ",
+                "gave_up": "失敗",
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        if st.button("キャッシュをクリア", use_container_width=True, key="cache_clear_btn"):
+            cache.clear()
+            clear_memory_cache()
+            st.success("キャッシュをクリアしました")
+
+
+def _render_memory_cache_stats() -> None:
+    """メモリキャッシュ（関数結果）の常駐サイズとヒット率を表示する."""
+    memory = get_memory_cache()
+    stats = memory.stats()
+    if not stats:
+        return
+    st.caption(
+        f"メモリキャッシュ {memory.resident_bytes / 1024 / 1024:,.1f} MB"
+        f" / 上限 {memory.max_bytes / 1024 / 1024:,.0f} MB（超過分は古い順に追い出し）"
+    )
+    df = pd.DataFrame(stats).rename(columns={
+        "namespace": "関数",
+        "entries": "件数",
+        "bytes": "バイト",
+        "hits": "ヒット",
+        "misses": "ミス",
+        "evictions": "追い出し",
+        "errors": "失敗",
+        "stale": "旧結果で応答",
+        "hit_rate": "ヒット率",
+    })
+    df["関数"] = df["関数"].str.rsplit(".", n=1).str[-1]
+    df["ヒット率"] = (df["ヒット率"] * 100).round(1).astype(str) + "%"
+    st.dataframe(df, use_container_width=True, hide_index=True)
@@ -0,0 +1,34 @@
+"""上流サービス（YouTube / Google / はてな）の接続先の切り替え.
+
+環境変数 YTA_UPSTREAM_URL にフェイクサーバー（src.fake_upstream）のURLを
+設定すると、各クライアントの接続先がその配下に切り替わる。元のホスト名を
+パスの先頭に付けて送るため、1つのサーバーで全サービスを受けられる。
+
+    https://suggestqueries.google.com/complete/search
+    → http://127.0.0.1:8765/suggestqueries.google.com/complete/search
+"""
+
+from __future__ import annotations
+
+import os
+from urllib.parse import urlsplit
+
+from src.constants import UPSTREAM_URL_ENV
+
+
+def upstream_base() -> str | None:
+    """フェイクサーバーのURL（未設定なら None = 本番に接続）."""
+    base = os.environ.get(UPSTREAM_URL_ENV, "").strip()
+    return base.rstrip("/") or None
+
+
+def resolve_url(url: str) -> str:
+    """本番のURLを、フェイクサーバーが設定されていればその配下のURLに置き換える."""
+    base = upstream_base()
+    if base is None:
+        return url
+    parts = urlsplit(url)
+    resolved = f"{base}/{parts.netloc}{parts.path}"
+    if parts.query:
+        resolved += f"?{parts.query}"
+    return resolved
@@ -1,5 +1,9 @@
 """ユーティリティ関数."""
 
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
 
 def format_number(n: int) -> str:
     """数値を読みやすい日本語表記に変換する.
@@ -28,3 +32,26 @@ def truncate_text(text: str, max_length: int = 40) -> str:
     if len(text) <= max_length:
         return text
     return text[: max_length - 1] + "…"
+
+
+def published_after_days(days: int, now: datetime | None = None) -> str:
+    """days 日前の0時（UTC）を publishedAfter 形式で返す.
+
+    秒単位の現在時刻を使うと呼び出しごとに値が変わりキャッシュが効かないため、
+    日単位に切り下げる（同じ日のうちは同じ値になる）。
+    """
+    now = now or datetime.now(timezone.utc)
+    return bucket_published_after((now - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+
+def bucket_published_after(value: str | None) -> str | None:
+    """publishedAfter（ISO 8601）を UTC の0時に切り下げる. 解釈できない値はそのまま返す."""
+    if not value:
+        return value
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT00:00:00Z")
@@ -0,0 +1,337 @@
+"""列指向の動画結果セット（NumPy 配列）.
+
+複数ページ・複数キーワードの分析では数万件の動画を扱う。VideoInfo の
+リストに対してフィルタ・ソート・DataFrame 変換をそれぞれ Python のループで
+行うと、件数に比例したオブジェクト操作が何度も発生する。ここでは列ごとに
+1本の配列を持ち、フィルタはブールマスクの合成、並べ替えは argsort、
+上位 k 件の抽出は部分ソート（np.partition）で行う。
+
+- 数値列（再生数・登録者数・V/S比率・公開日時）は NumPy の数値配列
+- 文字列列（ID・タイトル等）は object 配列。チャンネルID・チャンネル名は
+  intern して同じチャンネルの行で1つの文字列を共有する
+- サムネイルURLは動画IDの部分を置き換えたテンプレート（intern 済み）で持ち、
+  "https://i.ytimg.com/vi/…/hqdefault.jpg" のような共通部分を全行で共有する
+- 公開日時の文字列は持たず、datetime64 の列から組み立てる
+- 行として扱う必要がある箇所（サムネイル表示など）では、添字アクセスで
+  その行だけ VideoInfo を組み立てる
+
+VideoIndex は1回の分析結果に対して指標ごとの並び順を先に求めておき、
+しきい値を変えたときの絞り込みを二分探索で行う（サイドバーのフィルタを
+動かすたびに API を呼ばずに結果を出し直すため）。
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, fields
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils import channel_url, video_url
+from src.youtube_api import ChannelInfo, VideoInfo
+
+_COLUMNS = (
+    "video_id", "title", "channel_id", "channel_title", "published_at", "thumbnail_url",
+    "view_count", "subscriber_count", "vs_ratio",
+)
+# サムネイルURLテンプレート中の動画IDの位置
+_VIDEO_ID_PLACEHOLDER = "\0"
+
+
+@dataclass(frozen=True, eq=False)
+class VideoTable:
+    """動画の列指向テーブル. 全列は同じ長さ."""
+
+    video_id: np.ndarray
+    title: np.ndarray
+    channel_id: np.ndarray
+    channel_title: np.ndarray
+    # サムネイルURLの動画ID部分を _VIDEO_ID_PLACEHOLDER にしたもの
+    thumbnail_template: np.ndarray
+    view_count: np.ndarray
+    subscriber_count: np.ndarray
+    vs_ratio: np.ndarray
+    # 公開日時（UTC。解析できない値は NaT）
+    published_ts: np.ndarray
+
+    # ─── 生成 ──────────────────────────────────────
+
+    @classmethod
+    def from_columns(
+        cls,
+        video_id: Sequence[str],
+        title: Sequence[str],
+        channel_id: Sequence[str],
+        channel_title: Sequence[str],
+        published_at: Sequence[str],
+        thumbnail_url: Sequence[str],
+        view_count: Sequence[int],
+        subscriber_count: Sequence[int],
+        vs_ratio: Sequence[float] | None = None,
+    ) -> VideoTable:
+        """列ごとの値から作る. vs_ratio を省略すると再生数 / 登録者数で計算する."""
+        views = np.asarray(view_count, dtype=np.int64)
+        subscribers = np.asarray(subscriber_count, dtype=np.int64)
+        if vs_ratio is None:
+            ratio = compute_vs_ratio(views, subscribers)
+        else:
+            ratio = np.asarray(vs_ratio, dtype=np.float64)
+        return cls(
+            video_id=_object_array(video_id),
+            title=_object_array(title),
+            channel_id=_object_array([sys.intern(c) for c in channel_id]),
+            channel_title=_object_array([sys.intern(c) for c in channel_title]),
+            thumbnail_template=_object_array([
+                _thumbnail_template(url, vid) for url, vid in zip(thumbnail_url, video_id)
+            ]),
+            view_count=views,
+            subscriber_count=subscribers,
+            vs_ratio=ratio,
+            published_ts=_parse_timestamps(_object_array(published_at)),
+        )
+
+    @classmethod
+    def from_videos(cls, videos: Iterable[VideoInfo]) -> VideoTable:
+        """VideoInfo の並びから作る."""
+        videos = list(videos)
+        return cls.from_columns(**{name: [getattr(v, name) for v in videos] for name in _COLUMNS})
+
+    @classmethod
+    def empty(cls) -> VideoTable:
+        return cls.from_videos([])
+
+    @classmethod
+    def coerce(cls, videos: VideoTable | Iterable[VideoInfo]) -> VideoTable:
+        """VideoTable はそのまま、VideoInfo の並びは変換して返す."""
+        return videos if isinstance(videos, VideoTable) else cls.from_videos(videos)
+
+    @classmethod
+    def concat(cls, tables: Iterable[VideoTable]) -> VideoTable:
+        """複数のテーブルを縦に連結する."""
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+        return cls(**{
+            f.name: np.concatenate([getattr(t, f.name) for t in tables]) for f in fields(cls)
+        })
+
+    # ─── 行アクセス ────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.video_id)
+
+    def __iter__(self) -> Iterator[VideoInfo]:
+        channels: dict[str, ChannelInfo] = {}
+        return (self.row(i, channels) for i in range(len(self)))
+
+    def __getitem__(self, index: int | slice) -> VideoInfo | VideoTable:
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        return self.row(index)
+
+    def row(self, index: int, channels: dict[str, ChannelInfo] | None = None) -> VideoInfo:
+        """1行を VideoInfo として取り出す.
+
+        channels を渡すと、同じチャンネルの行で ChannelInfo を共有する。
+        """
+        channel_id = self.channel_id[index]
+        channel = channels.get(channel_id) if channels is not None else None
+        if channel is None:
+            channel = ChannelInfo(
+                channel_id=channel_id,
+                channel_title=self.channel_title[index],
+                subscriber_count=int(self.subscriber_count[index]),
+            )
+            if channels is not None:
+                channels[channel_id] = channel
+        video_id = self.video_id[index]
+        return VideoInfo(
+            video_id=video_id,
+            title=self.title[index],
+            channel=channel,
+            published_at=_format_timestamp(self.published_ts[index]),
+            thumbnail_url=self.thumbnail_template[index].replace(_VIDEO_ID_PLACEHOLDER, video_id),
+            view_count=int(self.view_count[index]),
+            vs_ratio=float(self.vs_ratio[index]),
+        )
+
+    def take(self, indices: np.ndarray) -> VideoTable:
+        """indices の行だけを、その順序で持つテーブルを返す."""
+        return VideoTable(**{f.name: getattr(self, f.name)[indices] for f in fields(self)})
+
+    # ─── フィルタ・並べ替え ────────────────────────
+
+    def mask(
+        self,
+        max_subscribers: int | None = None,
+        min_views: int | None = None,
+        min_vs_ratio: float | None = None,
+        published_after: str | None = None,
+    ) -> np.ndarray:
+        """全条件を満たす行が True のブール配列（条件を省略すると全行 True）."""
+        mask = np.ones(len(self), dtype=bool)
+        if max_subscribers is not None:
+            mask &= self.subscriber_count <= max_subscribers
+        if min_views is not None:
+            mask &= self.view_count >= min_views
+        if min_vs_ratio is not None:
+            mask &= self.vs_ratio >= min_vs_ratio
+        if published_after is not None:
+            mask &= self.published_ts >= _parse_timestamps(_object_array([published_after]))[0]
+        return mask
+
+    def filter(self, **conditions) -> VideoTable:
+        """mask() の条件で絞り込んだテーブルを返す（行の順序は保つ）."""
+        return self.take(np.flatnonzero(self.mask(**conditions)))
+
+    def argsort(self, column: str = "vs_ratio", descending: bool = True) -> np.ndarray:
+        """数値列で並べたときの行番号. 同値の行は元の順序を保つ."""
+        values = getattr(self, column)
+        return np.argsort(-values if descending else values, kind="stable")
+
+    def sort_by(self, column: str = "vs_ratio", descending: bool = True) -> VideoTable:
+        return self.take(self.argsort(column, descending))
+
+    def top(self, k: int, column: str = "vs_ratio", descending: bool = True) -> VideoTable:
+        """上位 k 行を順位順に返す. 全件を並べ替えずに上位だけを選ぶ."""
+        if k >= len(self):
+            return self.sort_by(column, descending)
+        if k <= 0:
+            return self.take(np.arange(0))
+        values = getattr(self, column)
+        keys = -values if descending else values
+        # k 番目の値を部分ソートで求め、それより上位の行と、同値の行を元の順序で埋める
+        threshold = np.partition(keys, k - 1)[k - 1]
+        above = np.flatnonzero(keys < threshold)
+        ties = np.flatnonzero(keys == threshold)[: k - len(above)]
+        chosen = np.concatenate([above, ties])
+        chosen.sort()
+        return self.take(chosen[np.argsort(keys[chosen], kind="stable")])
+
+    # ─── 変換 ──────────────────────────────────────
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """表示・CSV用の DataFrame（数値列は配列をコピーせずに渡す）."""
+        return pd.DataFrame(
+            {
+                "タイトル": self.title,
+                "チャンネル": self.channel_title,
+                "再生数": self.view_count,
+                "登録者数": self.subscriber_count,
+                "V/S比率": np.round(self.vs_ratio, 2),
+                "公開日": _object_array(_format_dates(self.published_ts)),
+                "動画URL": _object_array([video_url(v) for v in self.video_id]),
+                "チャンネルURL": _object_array([channel_url(c) for c in self.channel_id]),
+            },
+            copy=False,
+        )
+
+
+class VideoIndex:
+    """VideoTable のフィルタ用索引（指標ごとの昇順の並びと、表示順）.
+
+    query() は各しきい値の境界を二分探索で求め、候補が最も少ない条件の
+    範囲だけを残りの条件で確かめる。結果は sort_column の降順（同値は元の順序）。
+    """
+
+    # 条件名 → (列, 下限なら True / 上限なら False)
+    _CONDITIONS = {
+        "max_subscribers": ("subscriber_count", False),
+        "min_views": ("view_count", True),
+        "min_vs_ratio": ("vs_ratio", True),
+    }
+
+    def __init__(self, table: VideoTable, sort_column: str = "vs_ratio") -> None:
+        self.table = table
+        self._order: dict[str, np.ndarray] = {}
+        self._sorted: dict[str, np.ndarray] = {}
+        for column, _ in self._CONDITIONS.values():
+            order = table.argsort(column, descending=False)
+            self._order[column] = order
+            self._sorted[column] = getattr(table, column)[order]
+        display = table.argsort(sort_column)
+        # 行番号 → 表示順の位置
+        self._position = np.empty(len(table), dtype=np.intp)
+        self._position[display] = np.arange(len(table))
+        self._display = display
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def query(
+        self,
+        max_subscribers: int | None = None,
+        min_views: int | None = None,
+        min_vs_ratio: float | None = None,
+    ) -> VideoTable:
+        """条件を満たす行を表示順に並べたテーブルを返す（None の条件は適用しない）."""
+        return self.table.take(self.query_indices(
+            max_subscribers=max_subscribers, min_views=min_views, min_vs_ratio=min_vs_ratio,
+        ))
+
+    def query_indices(self, **thresholds) -> np.ndarray:
+        """条件を満たす行の行番号（表示順）."""
+        bounds = []
+        for name, threshold in thresholds.items():
+            if threshold is None:
+                continue
+            column, is_lower_bound = self._CONDITIONS[name]
+            values = self._sorted[column]
+            if is_lower_bound:
+                start, stop = int(np.searchsorted(values, threshold, side="left")), len(values)
+            else:
+                start, stop = 0, int(np.searchsorted(values, threshold, side="right"))
+            bounds.append((stop - start, column, start, stop, threshold, is_lower_bound))
+        if not bounds:
+            return self._display
+        # 候補が最も少ない条件の範囲から始め、残りの条件は候補の行だけで比べる
+        bounds.sort(key=lambda b: b[0])
+        _, column, start, stop, _, _ = bounds[0]
+        rows = self._order[column][start:stop]
+        for _, column, _, _, threshold, is_lower_bound in bounds[1:]:
+            values = getattr(self.table, column)[rows]
+            rows = rows[values >= threshold if is_lower_bound else values <= threshold]
+        return rows[np.argsort(self._position[rows])]
+
+
+def compute_vs_ratio(view_count: np.ndarray, subscriber_count: np.ndarray) -> np.ndarray:
+    """再生数 / 登録者数（登録者数が0以下の行は 0.0）."""
+    ratio = np.zeros(len(view_count), dtype=np.float64)
+    np.divide(view_count, subscriber_count, out=ratio, where=subscriber_count > 0)
+    return ratio
+
+
+def _object_array(values: Sequence[str]) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = list(values)
+    return array
+
+
+def _thumbnail_template(url: str, video_id: str) -> str:
+    if video_id and video_id in url:
+        url = url.replace(video_id, _VIDEO_ID_PLACEHOLDER)
+    return sys.intern(url)
+
+
+def _format_timestamp(ts: np.datetime64) -> str:
+    """datetime64 を YouTube API と同じ "YYYY-MM-DDTHH:MM:SSZ" 形式にする（NaT は空文字）."""
+    if np.isnat(ts):
+        return ""
+    return f"{np.datetime_as_string(ts, unit='s')}Z"
+
+
+def _format_dates(published_ts: np.ndarray) -> list[str]:
+    dates = np.datetime_as_string(published_ts, unit="D")
+    return ["" if d == "NaT" else d for d in dates]
+
+
+def _parse_timestamps(published_at: np.ndarray) -> np.ndarray:
+    """ISO 8601 の文字列を UTC の datetime64[s] に変換する（解析できない値は NaT）."""
+    parsed = pd.to_datetime(
+        pd.Series(published_at, dtype=object), utc=True, errors="coerce", format="ISO8601",
+    )
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
@@ -2,178 +2,1153 @@
 
 from __future__ import annotations
 
+import json
 import logging
-from dataclasses import dataclass
+import math
+import socket
+import threading
+from dataclasses import FrozenInstanceError, dataclass, field, fields
+from typing import Callable, Iterator, TypeVar
 
-import streamlit as st
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest, set_user_agent
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
-from src.session_keys import SessionKeys
+from src.api_keys import ApiKeyPool, get_key_pool, key_fingerprint
+from src.concurrency import TaskResult, parallel_map
+from src.constants import (
+    SEARCH_DETAIL_UNITS_PER_PAGE,
+    SEARCH_UNITS,
+    YOUTUBE_API_ROOT_URL,
+    YOUTUBE_BATCH_MAX_PARTS,
+    YOUTUBE_BATCH_URL,
+    YOUTUBE_FIELDS,
+    YOUTUBE_RETRY_ATTEMPTS,
+    YOUTUBE_RETRY_INITIAL_WAIT,
+    YOUTUBE_RETRY_MAX_WAIT,
+    YOUTUBE_STATISTICS_USE_BATCH,
+    YOUTUBE_USER_AGENT,
+)
+from src.disk_cache import get_disk_cache, make_cache_key
+from src.memory_cache import memory_cache
+from src.quota_ledger import QuotaLedger, get_quota_ledger
+from src.single_flight import get_flight
+from src.upstream import resolve_url, upstream_base
+from src.utils import bucket_published_after
 
 logger = logging.getLogger("youtube_analyzer")
 
+T = TypeVar("T")
+
+_search_flight = get_flight("youtube.search")
+_statistics_flight = get_flight("youtube.statistics")
+
 
 class QuotaExceededError(Exception):
     """APIクォータ超過エラー."""
 
 
-@dataclass
+class YouTubeForbiddenError(Exception):
+    """クォータ超過以外の403（APIキーの制限・APIの無効化など）.
+
+    キーを替えても解消しないことが多いため、フェイルオーバーの対象にしない。
+    """
+
+
+def _with_slots(cls: type) -> type:
+    """frozen な dataclass を __slots__ つきで作り直す（Python 3.10 の slots=True 相当）.
+
+    インスタンスごとの __dict__ を持たないため、大量に保持しても小さく済む。
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+
+    # frozen のため、pickle からの復元は __setattr__ を通さずに行う
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in names)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(names, state):
+            object.__setattr__(self, name, value)
+
+    # dataclass が生成した __setattr__/__delattr__ は作り直す前のクラスを
+    # super() に渡しており、フィールド以外の属性で TypeError になるため差し替える
+    def __setattr__(self, name: str, value) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    namespace["__getstate__"] = __getstate__
+    namespace["__setstate__"] = __setstate__
+    namespace["__setattr__"] = __setattr__
+    namespace["__delattr__"] = __delattr__
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_with_slots
+@dataclass(frozen=True)
+class ChannelInfo:
+    """チャンネル情報. 同じチャンネルの動画は1つのインスタンスを共有する."""
+
+    channel_id: str
+    channel_title: str
+    subscriber_count: int = 0
+
+
+@_with_slots
+@dataclass(frozen=True)
 class VideoInfo:
-    """動画情報."""
+    """動画情報（変更不可）. チャンネル情報は ChannelInfo を参照する."""
 
     video_id: str
     title: str
-    channel_id: str
-    channel_title: str
+    channel: ChannelInfo
     published_at: str
     thumbnail_url: str
     view_count: int = 0
-    subscriber_count: int = 0
     vs_ratio: float = 0.0
 
+    @property
+    def channel_id(self) -> str:
+        return self.channel.channel_id
+
+    @property
+    def channel_title(self) -> str:
+        return self.channel.channel_title
+
+    @property
+    def subscriber_count(self) -> int:
+        return self.channel.subscriber_count
+
 
 @dataclass
 class QuotaTracker:
-    """APIクォータ使用量を追跡する."""
+    """APIクォータ使用量をプロセス内メモリだけで追跡する.
+
+    アプリ本体では全セッション共通の QuotaLedger を使う（get_quota_tracker）。
+    """
 
     used: int = 0
     daily_limit: int = 10_000
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
-    def add(self, units: int) -> None:
-        self.used += units
+    def add(self, units: int, endpoint: str = "") -> None:
+        with self._lock:
+            self.used += units
 
     @property
     def remaining(self) -> int:
         return max(0, self.daily_limit - self.used)
 
+    def can_spend(self, units: int) -> bool:
+        return self.used + units <= self.daily_limit
+
     @property
     def usage_percent(self) -> float:
         return (self.used / self.daily_limit) * 100
 
 
-def get_quota_tracker() -> QuotaTracker:
-    """セッション内のQuotaTrackerを取得・作成する."""
-    key = SessionKeys.QUOTA_TRACKER
-    if key not in st.session_state:
-        st.session_state[key] = QuotaTracker()
-    return st.session_state[key]
+def get_quota_tracker(api_key: str | None = None) -> QuotaLedger:
+    """api_key の（全セッション・全プロセス共通の）クォータ台帳を取得する."""
+    if api_key is None:
+        return get_quota_ledger()
+    return get_quota_ledger(key_fingerprint(api_key))
+
+
+def ensure_quota(tracker: QuotaLedger | ApiKeyPool, units: int) -> None:
+    """units を消費すると予備枠に食い込む場合は呼び出しを拒否する.
+
+    tracker にはキー1つの台帳、またはキープール（全キー合計）を渡せる。
+
+    Raises:
+        QuotaExceededError: 残りクォータが不足している場合
+    """
+    if not tracker.can_spend(units):
+        raise no_spendable_key_error(tracker)
+
+
+def no_spendable_key_error(tracker: QuotaLedger | ApiKeyPool) -> QuotaExceededError:
+    """残りクォータ不足でAPIを呼ばなかったことを示すエラー."""
+    return QuotaExceededError(
+        f"本日の残りクォータ（{tracker.remaining:,}ユニット）が不足しているため、"
+        "APIを呼び出しませんでした。"
+    )
+
+
+class QuotaBudget:
+    """1回の分析で使ってよいクォータの上限（呼び出し元が指定する）.
+
+    キャッシュから返した分は消費に数えない。
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def spend(self, units: int) -> None:
+        with self._lock:
+            self.spent += units
+
+    def can_afford(self, units: int) -> bool:
+        return self.spent + units <= self.limit
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.spent)
+
+
+# ─── ETag による条件付き取得 ──────────────────────
+
+_ETAG_NAMESPACE = "etag"
+# videos / channels: ID → そのIDを含むバッチの ETag キー、ETag キー → バッチのID列.
+# 次の検索でバッチの組み合わせが変わっても、元のバッチ単位で再検証できるようにする
+_ETAG_MEMBER_NAMESPACE = "etag_member"
+_ETAG_BATCH_NAMESPACE = "etag_batch"
+
+
+class RevalidationStats:
+    """キャッシュ応答の内訳（プロセス内、名前空間ごと）.
+
+    - hit: 有効期限内のキャッシュで応答（APIを呼ばない）
+    - revalidated: 304 Not Modified（本文の転送・JSON解析なしでキャッシュを延長）
+    - miss: 200 で本文を取得
+
+    単位はキャッシュエントリ数（trending はレスポンス、videos / channels はID）。
+    saved_bytes は 304 で転送を省けた本文（キャッシュ上のJSON）のバイト数。
+    """
+
+    _FIELDS = ("hit", "revalidated", "miss", "saved_bytes")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[str, dict[str, int]] = {}
+
+    def record(self, namespace: str, outcome: str, count: int = 1, saved_bytes: int = 0) -> None:
+        if count <= 0:
+            return
+        with self._lock:
+            counts = self._counts.setdefault(namespace, dict.fromkeys(self._FIELDS, 0))
+            counts[outcome] += count
+            counts["saved_bytes"] += saved_bytes
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"namespace": namespace, **counts}
+                for namespace, counts in sorted(self._counts.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+revalidation_stats = RevalidationStats()
+
+
+@dataclass
+class StoredValidator:
+    """再検証に使う ETag と、304 のときに返す期限切れキャッシュの値."""
+
+    etag: str
+    stale: dict[str, object]
+
+
+def _etag_key(namespace: str, keys: list[str]) -> str:
+    return make_cache_key(namespace, keys)
+
+
+def load_validator(cache, namespace: str, keys: list[str]) -> StoredValidator | None:
+    """keys 全てのキャッシュ（期限切れ含む）と ETag が残っていれば返す."""
+    etag = cache.peek(_ETAG_NAMESPACE, _etag_key(namespace, keys))
+    if etag is None:
+        return None
+    stale = cache.get_stale_many(namespace, keys)
+    if len(stale) < len(set(keys)):
+        return None
+    return StoredValidator(etag=etag, stale=stale)
+
+
+def store_etag(cache, namespace: str, keys: list[str], etag: str | None) -> None:
+    """レスポンスの ETag を、対応するキャッシュの保持期間いっぱいまで保存する."""
+    if not etag:
+        return
+    ttl = cache.ttls.get(namespace, cache.default_ttl) + cache.stale_retention
+    cache.set(_ETAG_NAMESPACE, _etag_key(namespace, keys), etag, ttl=ttl)
+
+
+def store_batch_etag(cache, namespace: str, batch: list[str], etag: str | None) -> None:
+    """バッチの ETag と、各IDがどのバッチで取得されたかを保存する."""
+    if not etag:
+        return
+    store_etag(cache, namespace, batch, etag)
+    ttl = cache.ttls.get(namespace, cache.default_ttl) + cache.stale_retention
+    etag_key = _etag_key(namespace, batch)
+    cache.set(_ETAG_BATCH_NAMESPACE, etag_key, batch, ttl=ttl)
+    cache.set_many(
+        _ETAG_MEMBER_NAMESPACE, {f"{namespace}:{i}": etag_key for i in batch}, ttl=ttl,
+    )
+
+
+def load_batch_validators(
+    cache, namespace: str, ids: list[str],
+) -> list[tuple[list[str], StoredValidator, list[str]]]:
+    """ids を含む取得済みバッチのうち、再検証に使えるものを返す.
+
+    ETag はバッチのID列ごとに発行されるため、再検証は元のバッチをそのまま
+    送り直す。バッチ数（消費ユニット）が増えない場合に限り、カバーするIDの
+    多いバッチから選ぶ。
+
+    Returns:
+        [(元のバッチ, 検証子, そのバッチで取得する ids の要素)]
+    """
+    members = cache.get_stale_many(_ETAG_MEMBER_NAMESPACE, [f"{namespace}:{i}" for i in ids])
+    covered: dict[str, list[str]] = {}
+    for i in ids:
+        etag_key = members.get(f"{namespace}:{i}")
+        if etag_key is not None:
+            covered.setdefault(etag_key, []).append(i)
+
+    remaining = len(ids)
+    selected = []
+    for etag_key, requested in sorted(covered.items(), key=lambda kv: -len(kv[1])):
+        # 再検証用の1回を足しても、残りのバッチ数が1つ以上減るなら元が取れる
+        if math.ceil((remaining - len(requested)) / 50) + 1 > math.ceil(remaining / 50):
+            continue
+        batch = cache.get_stale_many(_ETAG_BATCH_NAMESPACE, [etag_key]).get(etag_key)
+        validator = None if batch is None else load_validator(cache, namespace, batch)
+        if validator is None:
+            continue
+        selected.append((batch, validator, requested))
+        remaining -= len(requested)
+    return selected
+
+
+def with_validator(request, validator: StoredValidator | None):
+    """保存済みの ETag があれば If-None-Match ヘッダーを付ける."""
+    if validator is not None:
+        request.headers["If-None-Match"] = validator.etag
+    return request
+
+
+def execute_conditional(request, validator: StoredValidator | None) -> dict | None:
+    """If-None-Match 付きでリクエストを実行し、304 なら None を返す."""
+    try:
+        return with_validator(request, validator).execute()
+    except HttpError as e:
+        if validator is not None and e.resp.status == 304:
+            return None
+        raise
+
+
+# ─── エラーの分類とリトライ ──────────────────────
+
+# 403 のうちクォータ超過を示す理由
+_QUOTA_REASONS = frozenset({"quotaExceeded", "dailyLimitExceeded"})
+# 時間をおけば成功する見込みのある理由（403 の rateLimitExceeded を含む）
+_TRANSIENT_REASONS = frozenset({
+    "rateLimitExceeded",
+    "userRateLimitExceeded",
+    "backendError",
+    "internalError",
+})
+_TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def error_reason(error: HttpError) -> str:
+    """HttpError の本文から理由（error.errors[0].reason）を取り出す. 無ければ ""."""
+    try:
+        payload = json.loads(error.content)
+    except (TypeError, ValueError):
+        return ""
+    details = payload.get("error") if isinstance(payload, dict) else None
+    errors = details.get("errors") if isinstance(details, dict) else None
+    if errors and isinstance(errors[0], dict):
+        return errors[0].get("reason", "")
+    return ""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """リトライで回復しうるエラーか（5xx・429・rateLimitExceeded・backendError など）."""
+    if isinstance(error, HttpError):
+        return error.resp.status in _TRANSIENT_STATUSES or error_reason(error) in _TRANSIENT_REASONS
+    # Python 3.9 の socket.timeout（httplib2 の読み取りタイムアウト）は TimeoutError ではない
+    return isinstance(error, (ConnectionError, TimeoutError, socket.timeout))
+
+
+def classify_http_error(error: HttpError, context: str) -> Exception:
+    """HttpError を呼び出し側で扱う例外に変換する.
+
+    403 は理由で区別する。quotaExceeded（理由が読めない場合も含む）は
+    QuotaExceededError、rateLimitExceeded などの一時的なものはそのまま、
+    それ以外（forbidden・accessNotConfigured など）は YouTubeForbiddenError。
+    """
+    reason = error_reason(error)
+    logger.error("%s: HttpError %s %s", context, error.resp.status, reason or "-")
+    if error.resp.status != 403 or reason in _TRANSIENT_REASONS:
+        return error
+    if not reason or reason in _QUOTA_REASONS:
+        converted: Exception = QuotaExceededError("APIクォータを超過しました。明日リセットされます。")
+    else:
+        converted = YouTubeForbiddenError(
+            f"APIへのアクセスが拒否されました（{reason}）。APIキーの設定を確認してください。"
+        )
+    converted.__cause__ = error
+    return converted
+
+
+class RetryStats:
+    """一時的なエラーによるリトライ回数（プロセス内、エンドポイント・理由ごと）.
+
+    - retries: リトライした回数
+    - gave_up: 最大試行回数に達して失敗した回数
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, str], dict[str, int]] = {}
+
+    def record(self, endpoint: str, reason: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault((endpoint, reason), {"retries": 0, "gave_up": 0})
+            counts[outcome] += 1
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"endpoint": endpoint, "reason": reason, **counts}
+                for (endpoint, reason), counts in sorted(self._counts.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+retry_stats = RetryStats()
+
+
+def _retry_reason(error: BaseException | None) -> str:
+    if isinstance(error, HttpError):
+        return error_reason(error) or str(error.resp.status)
+    return type(error).__name__
+
+
+def execute_with_retry(endpoint: str, execute: Callable[[], T]) -> T:
+    """execute() を実行し、一時的なエラーはジッター付き指数バックオフでリトライする.
+
+    最大試行回数に達した場合や、一時的でないエラーはそのまま送出する。
+    """
+
+    try:
+        return Retrying(**retry_policy(endpoint))(execute)
+    except Exception as e:
+        record_gave_up(endpoint, e)
+        raise
+
+
+def retry_policy(endpoint: str) -> dict:
+    """tenacity の Retrying / AsyncRetrying に渡すリトライ設定."""
+
+    def before_sleep(state: RetryCallState) -> None:
+        reason = _retry_reason(state.outcome.exception())
+        retry_stats.record(endpoint, reason, "retries")
+        logger.warning(
+            "%s: transient error (%s), retrying in %.1fs (attempt %d/%d)",
+            endpoint, reason, state.next_action.sleep, state.attempt_number, YOUTUBE_RETRY_ATTEMPTS,
+        )
+
+    return {
+        "retry": retry_if_exception(is_transient_error),
+        "stop": stop_after_attempt(YOUTUBE_RETRY_ATTEMPTS),
+        "wait": wait_exponential_jitter(
+            initial=YOUTUBE_RETRY_INITIAL_WAIT, max=YOUTUBE_RETRY_MAX_WAIT,
+            jitter=YOUTUBE_RETRY_INITIAL_WAIT,
+        ),
+        "reraise": True,
+        "before_sleep": before_sleep,
+    }
+
+
+def record_gave_up(endpoint: str, error: BaseException) -> None:
+    """最大試行回数に達した一時的なエラーを retry_stats に記録する."""
+    if is_transient_error(error):
+        retry_stats.record(endpoint, _retry_reason(error), "gave_up")
+
+
+class KeyFailover:
+    """with_key_failover のキー選択（同期版・非同期版で共有する）.
+
+    next_key() で units を払えるキーを選び、そのキーで QuotaExceededError に
+    なったら exhausted() で記録する。次の next_key() は残りのキーから選ぶ。
+    """
+
+    def __init__(self, api_key: str, units: int) -> None:
+        self.pool = get_key_pool(api_key)
+        self.units = units
+        self._tried: set[str] = set()
+        self._last_error: QuotaExceededError | None = None
+
+    def next_key(self) -> str:
+        """次に使うキー. 払えるキーが残っていなければ QuotaExceededError を送出する."""
+        key = self.pool.select(self.units, exclude=self._tried)
+        if key is None:
+            if self._last_error is not None:
+                raise self._last_error
+            raise no_spendable_key_error(self.pool)
+        return key
+
+    def exhausted(self, key: str, error: QuotaExceededError) -> None:
+        """key を本日分使い切ったものとして記録する."""
+        self.pool.mark_exhausted(key)
+        self._tried.add(key)
+        self._last_error = error
+
+
+def with_key_failover(
+    api_key: str,
+    units: int,
+    call: Callable[[str, QuotaLedger], T],
+) -> T:
+    """キープールから本日の消費が最も少ないキーを選び call(key, tracker) を実行する.
+
+    call が QuotaExceededError（APIの403）を送出した場合は、そのキーを本日分
+    使い切ったものとして記録し、残りのキーで再実行する。
+
+    Raises:
+        QuotaExceededError: units を払えるキーが残っていない場合
+    """
+    failover = KeyFailover(api_key, units)
+    while True:
+        key = failover.next_key()
+        try:
+            return call(key, get_quota_tracker(key))
+        except QuotaExceededError as e:
+            failover.exhausted(key, e)
+
+
+def _charge(
+    tracker: QuotaLedger, budget: QuotaBudget | None, units: int, endpoint: str,
+) -> None:
+    tracker.add(units, endpoint)
+    if budget is not None:
+        budget.spend(units)
+
+
+class _PooledHttp:
+    """httplib2.Http のチェックアウト/チェックイン式プール.
+
+    httplib2.Http はスレッドセーフではないため、リクエストごとに空いている
+    Http を1つ借りて使い、終わったら返却する。同時に走るリクエストは別々の
+    Http を使い、返却された Http は次のリクエストで keep-alive 接続ごと
+    再利用される。googleapiclient からは Http と同じく `request()` と
+    `close()` だけが呼ばれる。
+    """
+
+    def __init__(self, timeout: int) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: list[httplib2.Http] = []
+        self._all: list[httplib2.Http] = []
+
+    def _checkout(self) -> httplib2.Http:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        http = httplib2.Http(timeout=self.timeout)
+        set_user_agent(http, YOUTUBE_USER_AGENT)
+        with self._lock:
+            self._all.append(http)
+        return http
+
+    def _checkin(self, http: httplib2.Http) -> None:
+        with self._lock:
+            self._idle.append(http)
+
+    def request(self, *args, **kwargs):
+        http = self._checkout()
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            self._checkin(http)
+
+    def close(self) -> None:
+        with self._lock:
+            https, self._all, self._idle = self._all, [], []
+        for http in https:
+            http.close()
+
+
+class YouTubeClientPool:
+    """APIキーごとに構築済みクライアントを再利用するプール.
+
+    `build()` はディスカバリードキュメントの解析と新規HTTP接続を伴うため、
+    一度作ったクライアントを使い回す。クライアントはAPIキーごとに1つを
+    全スレッドで共有し、HTTP接続は _PooledHttp がリクエスト単位で貸し出す。
+    Streamlit の再実行は毎回別スレッドで動くが、スレッドをまたいでも
+    クライアントと keep-alive 接続がそのまま再利用される。
+    User-Agent は "youtube-trend-analyzer (gzip)" となり、gzip 圧縮で受け取る。
+    """
+
+    def __init__(self, timeout: int = 30, client_options: dict | None = None) -> None:
+        self.timeout = timeout
+        self.client_options = client_options
+        self._lock = threading.Lock()
+        self._clients: dict[str, object] = {}
+        self._https: list[_PooledHttp] = []
+
+    def get(self, api_key: str):
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                http = _PooledHttp(self.timeout)
+                # 同梱の静的ディスカバリードキュメントを使い、ネットワーク取得を避ける
+                client = build(
+                    "youtube", "v3",
+                    developerKey=api_key,
+                    http=http,
+                    client_options=self._client_options(),
+                    static_discovery=True,
+                    cache_discovery=False,
+                )
+                self._clients[api_key] = client
+                self._https.append(http)
+        return client
+
+    def _client_options(self) -> dict | None:
+        # フェイクサーバー（YTA_UPSTREAM_URL）が設定されていればそちらに接続する
+        if self.client_options is None and upstream_base() is not None:
+            return {"api_endpoint": resolve_url(YOUTUBE_API_ROOT_URL)}
+        return self.client_options
+
+    def close(self) -> None:
+        """保持している全HTTP接続を閉じ、プールを空にする."""
+        with self._lock:
+            https, self._https = self._https, []
+            self._clients = {}
+        for http in https:
+            http.close()
+
+
+_client_pool = YouTubeClientPool()
 
 
 def get_youtube_client(api_key: str):
-    """YouTube Data API v3 クライアントを生成する."""
-    return build("youtube", "v3", developerKey=api_key)
+    """YouTube Data API v3 クライアントをプールから取得する."""
+    return _client_pool.get(api_key)
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
+@memory_cache(ttl=3600)
 def search_videos(
-    api_key: str,
+    _api_key: str,
     query: str,
     max_results: int = 50,
     published_after: str | None = None,
+    category_id: str | None = None,
+    region_code: str | None = None,
 ) -> list[dict]:
     """動画を検索する（100ユニット/回）.
 
     Args:
-        api_key: YouTube API キー
+        _api_key: YouTube API キー（キャッシュキーには含めない）
         query: 検索クエリ
         max_results: 最大取得件数（上限50）
-        published_after: ISO 8601形式の日付フィルタ
+        published_after: ISO 8601形式の日付フィルタ（日単位に切り下げる）
+        category_id: 動画カテゴリID（videoCategoryId）
+        region_code: 地域コード（regionCode）
 
     Returns:
         検索結果のリスト
     """
-    youtube = get_youtube_client(api_key)
+    page = _search_page(
+        _api_key, query, min(max_results, 50), published_after,
+        category_id=category_id, region_code=region_code,
+    )
+    return page["items"]
+
+
+def iter_search_pages(
+    api_key: str,
+    query: str,
+    budget: QuotaBudget,
+    published_after: str | None = None,
+    reserve_per_page: int = SEARCH_DETAIL_UNITS_PER_PAGE,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> Iterator[list[dict]]:
+    """nextPageToken をたどって検索結果をページ単位（最大50件）で返す.
+
+    キャッシュ済みのページは無料で返す。未取得のページは、検索（100）と
+    そのページの詳細取得分（reserve_per_page）を予算内で払える場合だけ
+    取得する。呼び出し側がイテレーションを止めれば以降のページは取得しない。
+
+    Args:
+        api_key: YouTube API キー
+        query: 検索クエリ
+        budget: この検索で使ってよいクォータ
+        published_after: ISO 8601形式の日付フィルタ
+        reserve_per_page: 1ページの後続処理のために残しておくユニット数
+        category_id: 動画カテゴリID（videoCategoryId）
+        region_code: 地域コード（regionCode）
+
+    Yields:
+        検索結果（1ページ分）のリスト
+    """
+    page_token: str | None = None
+    while True:
+        page = _search_page(
+            api_key, query, 50, published_after, page_token,
+            budget=budget, required_units=SEARCH_UNITS + reserve_per_page,
+            category_id=category_id, region_code=region_code,
+        )
+        if page is None:
+            logger.info(
+                "iter_search_pages: budget exhausted (spent %d / %d)", budget.spent, budget.limit,
+            )
+            return
+        yield page["items"]
+        page_token = page.get("nextPageToken")
+        if not page_token or not page["items"]:
+            return
+
+
+def _search_page(
+    api_key: str,
+    query: str,
+    page_size: int,
+    published_after: str | None,
+    page_token: str | None = None,
+    budget: QuotaBudget | None = None,
+    required_units: int = SEARCH_UNITS,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> dict | None:
+    """search.list を1ページ分実行する（ディスクキャッシュ経由）.
+
+    Returns:
+        {"items": [...], "nextPageToken": str | None}。
+        未キャッシュで予算が足りない場合は None
+    """
+    cache = get_disk_cache()
+    cache_key = search_page_cache_key(
+        query, page_size, published_after, page_token, category_id, region_code,
+    )
+    cached = cache.get("search", cache_key)
+    if cached is not None:
+        logger.info("search_videos: query=%r page=%r served from disk cache", query, page_token)
+        return cached
+
+    if budget is not None and not budget.can_afford(required_units):
+        return None
+    # 同じページを取得中の呼び出しがあれば、その結果を待って共有する（クォータ消費なし）
+    return _search_flight.do(
+        cache_key,
+        lambda: _fetch_search_page(
+            api_key, search_params(
+                query, page_size, published_after, page_token, category_id, region_code,
+            ),
+            budget, cache_key,
+        ),
+    )
+
+
+def _fetch_search_page(
+    api_key: str,
+    params: dict,
+    budget: QuotaBudget | None,
+    cache_key: str,
+) -> dict:
+    def call(key: str, tracker: QuotaLedger) -> dict:
+        try:
+            logger.info(
+                "search_videos: query=%r, max_results=%d, page=%r (100 units)",
+                params["q"], params["maxResults"], params.get("pageToken"),
+            )
+            request = get_youtube_client(key).search().list(**params)
+            response = execute_with_retry("search.list", request.execute)
+        except HttpError as e:
+            raise classify_http_error(e, "search_videos") from e
+        _charge(tracker, budget, SEARCH_UNITS, "search.list")
+        return response
+
+    response = with_key_failover(api_key, SEARCH_UNITS, call)
+    return store_search_page(get_disk_cache(), cache_key, response)
+
+
+def search_params(
+    query: str,
+    page_size: int,
+    published_after: str | None,
+    page_token: str | None,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> dict:
+    """search.list のパラメータ（再生数順の動画検索）.
+
+    publishedAfter は日単位に切り下げて送る（キャッシュキーと揃えるため）。
+    """
     params = {
         "q": query,
         "part": "snippet",
         "type": "video",
-        "maxResults": min(max_results, 50),
+        "maxResults": page_size,
         "order": "viewCount",
+        "fields": YOUTUBE_FIELDS["search"],
     }
     if published_after:
-        params["publishedAfter"] = published_after
+        params["publishedAfter"] = bucket_published_after(published_after)
+    if category_id:
+        params["videoCategoryId"] = category_id
+    if region_code:
+        params["regionCode"] = region_code
+    if page_token:
+        params["pageToken"] = page_token
+    return params
 
-    try:
-        logger.info("search_videos: query=%r, max_results=%d (100 units)", query, max_results)
-        response = youtube.search().list(**params).execute()
-        tracker = get_quota_tracker()
-        tracker.add(100)
-        items = response.get("items", [])
-        logger.info("search_videos: %d results returned", len(items))
-        return items
-    except HttpError as e:
-        logger.error("search_videos: HttpError %s", e.resp.status)
-        if e.resp.status == 403:
-            raise QuotaExceededError("APIクォータを超過しました。明日リセットされます。") from e
-        raise
+
+def store_search_page(cache, cache_key: str, response: dict) -> dict:
+    """search.list のレスポンスを1ページ分の形にしてキャッシュに保存する."""
+    page = {
+        "items": response.get("items", []),
+        "nextPageToken": response.get("nextPageToken"),
+    }
+    logger.info("search_videos: %d results returned", len(page["items"]))
+    cache.set("search", cache_key, page)
+    return page
+
+
+def search_page_cache_key(
+    query: str,
+    page_size: int,
+    published_after: str | None,
+    page_token: str | None,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> str:
+    """検索結果1ページ分の永続キャッシュキー（publishedAfter は日単位）."""
+    return make_cache_key(
+        query, page_size, bucket_published_after(published_after), page_token,
+        category_id, region_code,
+    )
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def get_video_details(api_key: str, video_ids: tuple[str, ...]) -> dict[str, dict]:
     """動画の詳細情報を取得する（1ユニット/回、50件バッチ）.
 
+    動画ID単位でキャッシュし、未取得のIDだけをAPIに問い合わせる。
+
     Returns:
         {video_id: {viewCount, ...}} の辞書
     """
-    youtube = get_youtube_client(api_key)
-    result: dict[str, dict] = {}
-    tracker = get_quota_tracker()
-
-    logger.info("get_video_details: %d videos (1 unit/batch)", len(video_ids))
-    for i in range(0, len(video_ids), 50):
-        batch = video_ids[i : i + 50]
-        try:
-            response = (
-                youtube.videos()
-                .list(part="statistics", id=",".join(batch))
-                .execute()
-            )
-            tracker.add(1)
-            for item in response.get("items", []):
-                result[item["id"]] = item["statistics"]
-        except HttpError as e:
-            logger.error("get_video_details: HttpError %s", e.resp.status)
-            if e.resp.status == 403:
-                raise QuotaExceededError(
-                    "APIクォータを超過しました。明日リセットされます。"
-                ) from e
-            raise
+    return fetch_statistics(api_key, {"videos": video_ids})["videos"]
 
-    return result
 
-
-@st.cache_data(ttl=3600, show_spinner=False)
 def get_channel_details(
     api_key: str, channel_ids: tuple[str, ...]
 ) -> dict[str, dict]:
     """チャンネルの詳細情報を取得する（1ユニット/回、50件バッチ）.
 
+    チャンネルID単位でキャッシュし、未取得のIDだけをAPIに問い合わせる。
+
     Returns:
         {channel_id: {subscriberCount, ...}} の辞書
     """
+    return fetch_statistics(api_key, {"channels": channel_ids})["channels"]
+
+
+def fetch_statistics(
+    api_key: str,
+    ids_by_resource: dict[str, tuple[str, ...]],
+    use_batch: bool = YOUTUBE_STATISTICS_USE_BATCH,
+    budget: QuotaBudget | None = None,
+) -> dict[str, dict[str, dict]]:
+    """複数リソースの statistics をID単位のキャッシュ経由でまとめて取得する.
+
+    キャッシュにないIDだけを50件ずつのバッチに分け、全リソースの
+    バッチを並列に発行する（videos と channels の取得が重なる）。
+    use_batch=True の場合は、全バッチを1つのマルチパートリクエスト
+    （BatchHttpRequest）にまとめて1往復で送る。クォータ消費は同じ。
+    期限切れのIDを含む取得済みバッチの ETag が残っていれば、消費ユニットが
+    増えない範囲で元のバッチを If-None-Match つきで送り直し、304 なら
+    キャッシュの値をそのまま延長して使う（検索ごとにバッチの組み合わせが
+    変わっても再検証できる）。
+
+    Args:
+        api_key: YouTube API キー
+        ids_by_resource: {"videos" | "channels": 取得対象のID（重複・順不同で可）}
+        use_batch: BatchHttpRequest でまとめて送信するか
+            （既定は YOUTUBE_STATISTICS_USE_BATCH）
+        budget: 消費ユニットを記録するクォータ予算（任意）。
+            全バッチを払えない場合は払える分のバッチだけを取得する
+
+    Returns:
+        {resource: {id: statistics}} の辞書
+
+    Raises:
+        QuotaExceededError: いずれかのバッチでクォータ超過した場合
+            （成功したバッチの結果はキャッシュに保存される）
+    """
+    cache = get_disk_cache()
+    results, jobs = plan_statistics(cache, ids_by_resource)
+    if not jobs:
+        return results
+
+    if budget is not None and not budget.can_afford(len(jobs)):
+        # 予算切れ（キャッシュのみモード等）では払える分のバッチだけを取得する
+        affordable = budget.remaining
+        logger.info(
+            "statistics: budget covers %d of %d batches (rest served from cache only)",
+            affordable, len(jobs),
+        )
+        jobs = jobs[:affordable]
+        if not jobs:
+            return results
+
+    ensure_quota(get_key_pool(api_key), len(jobs))
+    if use_batch and len(jobs) > 1:
+        outcomes = _fetch_statistics_multipart(api_key, jobs, budget)
+        for job, outcome in zip(jobs, outcomes):
+            if outcome.ok:
+                store_statistics_part(cache, job, outcome.value)
+    else:
+        # 他セッションが同じバッチを取得中なら、その結果（保存済み）を共有する
+        outcomes = parallel_map(
+            lambda job: _statistics_flight.do(
+                job.flight_key(),
+                lambda: store_statistics_part(cache, job, with_key_failover(
+                    api_key, 1,
+                    lambda key, tracker: _fetch_statistics_batch(key, job, tracker, budget),
+                )),
+            ),
+            jobs,
+        )
+    return merge_statistics(results, jobs, outcomes)
+
+
+def plan_statistics(
+    cache, ids_by_resource: dict[str, tuple[str, ...]],
+) -> tuple[dict[str, dict[str, dict]], list[StatisticsJob]]:
+    """キャッシュ済みの statistics と、未取得IDの50件ずつのバッチを返す."""
+    results: dict[str, dict[str, dict]] = {}
+    jobs: list[StatisticsJob] = []
+    for resource, ids in ids_by_resource.items():
+        unique_ids = list(dict.fromkeys(ids))
+        results[resource] = cache.get_many(resource, unique_ids)
+        revalidation_stats.record(resource, "hit", len(results[resource]))
+        missing = [i for i in unique_ids if i not in results[resource]]
+        logger.info(
+            "%s statistics: %d ids (%d cached, %d to fetch, 1 unit/batch)",
+            resource, len(unique_ids), len(results[resource]), len(missing),
+        )
+        revalidating: set[str] = set()
+        for batch, validator, requested in load_batch_validators(cache, resource, missing):
+            jobs.append(StatisticsJob(resource, batch, validator, requested))
+            revalidating.update(requested)
+        missing = [i for i in missing if i not in revalidating]
+        for i in range(0, len(missing), 50):
+            jobs.append(StatisticsJob(resource, missing[i : i + 50]))
+    return results, jobs
+
+
+def store_statistics_part(cache, job: StatisticsJob, part: StatisticsPart) -> StatisticsPart:
+    """1バッチの取得結果をキャッシュに保存する.
+
+    single-flight では実行した側だけが呼び、待っていた側は保存済みの
+    結果を受け取るだけにする（同じ行の書き直し・統計の重複計上を避ける）。
+    """
+    if part.revalidated:
+        saved = cache.touch(job.resource, job.batch)
+        revalidation_stats.record(job.resource, "revalidated", len(job.batch), saved)
+    else:
+        cache.set_many(job.resource, part.stats)
+        store_batch_etag(cache, job.resource, job.batch, part.etag)
+        revalidation_stats.record(job.resource, "miss", len(job.batch))
+    return part
+
+
+def merge_statistics(
+    results: dict[str, dict[str, dict]],
+    jobs: list[StatisticsJob],
+    outcomes: list[TaskResult],
+) -> dict[str, dict[str, dict]]:
+    """保存済みの各バッチの結果を results に加える.
+
+    Raises:
+        最初に失敗したバッチの例外（成功したバッチはキャッシュに保存済み）
+    """
+    error: BaseException | None = None
+    for job, outcome in zip(jobs, outcomes):
+        if not outcome.ok:
+            if error is None:
+                error = outcome.error
+            continue
+        # 一部のバッチが失敗しても、取得済みの分は支払ったクォータごと残す
+        part: StatisticsPart = outcome.value
+        results[job.resource].update(
+            part.stats if job.requested is None
+            else {i: part.stats[i] for i in job.requested if i in part.stats}
+        )
+
+    if error is not None:
+        raise error
+    return results
+
+
+@dataclass
+class StatisticsJob:
+    """statistics 取得の1バッチ（最大50件）.
+
+    requested は batch のうち呼び出し元が求めたID（None なら全て）。
+    再検証のため元のバッチを送り直すと、求めていないIDも含まれる。
+    """
+
+    resource: str
+    batch: list[str]
+    validator: StoredValidator | None = None
+    requested: list[str] | None = None
+
+    def flight_key(self) -> str:
+        """同じバッチの同時取得をまとめるためのキー."""
+        return make_cache_key(self.resource, self.batch)
+
+    def params(self) -> dict:
+        return {"part": "statistics", "id": ",".join(self.batch), "fields": YOUTUBE_FIELDS[self.resource]}
+
+    def request(self, youtube):
+        return getattr(youtube, self.resource)().list(**self.params())
+
+
+@dataclass
+class StatisticsPart:
+    """1バッチの取得結果。revalidated は 304 でキャッシュを再利用したことを示す."""
+
+    stats: dict[str, dict]
+    etag: str | None = None
+    revalidated: bool = False
+
+    @classmethod
+    def from_response(cls, response: dict | None, job: StatisticsJob) -> StatisticsPart:
+        if response is None:
+            return cls(stats=job.validator.stale, etag=job.validator.etag, revalidated=True)
+        return cls(
+            stats=_statistics_from_response(response, job.batch), etag=response.get("etag"),
+        )
+
+
+def _fetch_statistics_batch(
+    api_key: str,
+    job: StatisticsJob,
+    tracker: QuotaLedger,
+    budget: QuotaBudget | None = None,
+) -> StatisticsPart:
+    """videos.list / channels.list を1バッチ（最大50件）実行する."""
     youtube = get_youtube_client(api_key)
-    result: dict[str, dict] = {}
-    tracker = get_quota_tracker()
+    request = job.request(youtube)
+    try:
+        response = execute_with_retry(
+            f"{job.resource}.list", lambda: execute_conditional(request, job.validator),
+        )
+    except HttpError as e:
+        raise classify_http_error(e, f"{job.resource} statistics") from e
+    _charge(tracker, budget, 1, f"{job.resource}.list")
+    return StatisticsPart.from_response(response, job)
+
+
+def _fetch_statistics_multipart(
+    api_key: str,
+    jobs: list[StatisticsJob],
+    budget: QuotaBudget | None = None,
+) -> list[TaskResult]:
+    """全バッチを BatchHttpRequest にまとめて実行する.
 
-    logger.info("get_channel_details: %d channels (1 unit/batch)", len(channel_ids))
-    for i in range(0, len(channel_ids), 50):
-        batch = channel_ids[i : i + 50]
+    全パートを払えるキーを1つ選んで送る。パート単位のフェイルオーバーは
+    行わず、クォータ超過のパートがあればそのキーを使い切った扱いにする。
+    パートごとの成否を jobs と同じ順序の TaskResult で返す。
+    """
+    pool = get_key_pool(api_key)
+    key = pool.select(len(jobs))
+    if key is None:
+        raise no_spendable_key_error(pool)
+    tracker = get_quota_tracker(key)
+    youtube = get_youtube_client(key)
+    outcomes = [TaskResult() for _ in jobs]
+
+    def on_part(request_id: str, response: dict, exception: Exception | None) -> None:
+        idx = int(request_id)
+        job = jobs[idx]
+        not_modified = (
+            job.validator is not None
+            and isinstance(exception, HttpError)
+            and exception.resp.status == 304
+        )
+        if exception is None or not_modified:
+            _charge(tracker, budget, 1, f"{job.resource}.list")
+            part = StatisticsPart.from_response(None if not_modified else response, job)
+            outcomes[idx] = TaskResult(value=part)
+        else:
+            outcomes[idx] = TaskResult(error=_part_error(job.resource, exception))
+
+    for start in range(0, len(jobs), YOUTUBE_BATCH_MAX_PARTS):
+        indexes = range(start, min(start + YOUTUBE_BATCH_MAX_PARTS, len(jobs)))
+        multipart = _new_batch(youtube, on_part)
+        for idx in indexes:
+            request = with_validator(jobs[idx].request(youtube), jobs[idx].validator)
+            multipart.add(request, request_id=str(idx))
+        logger.info("statistics: %d calls in one batch request", len(indexes))
         try:
-            response = (
-                youtube.channels()
-                .list(part="statistics", id=",".join(batch))
-                .execute()
-            )
-            tracker.add(1)
-            for item in response.get("items", []):
-                result[item["id"]] = item["statistics"]
+            multipart.execute()
         except HttpError as e:
-            logger.error("get_channel_details: HttpError %s", e.resp.status)
-            if e.resp.status == 403:
-                raise QuotaExceededError(
-                    "APIクォータを超過しました。明日リセットされます。"
-                ) from e
-            raise
-
-    return result
+            # バッチ全体が失敗した場合は含まれる全パートを失敗扱いにする
+            for idx in indexes:
+                outcomes[idx] = TaskResult(error=_part_error("batch", e))
+
+    # 一時的なエラーで失敗したパートは、個別のリクエスト（リトライ付き）で取り直す
+    for idx, outcome in enumerate(outcomes):
+        if outcome.error is None or not is_transient_error(outcome.error):
+            continue
+        job = jobs[idx]
+        retry_stats.record(f"{job.resource}.list", _retry_reason(outcome.error), "retries")
+        try:
+            outcomes[idx] = TaskResult(value=_fetch_statistics_batch(key, job, tracker, budget))
+        except Exception as e:
+            outcomes[idx] = TaskResult(error=e)
+    if any(isinstance(o.error, QuotaExceededError) for o in outcomes):
+        pool.mark_exhausted(key)
+    return outcomes
+
+
+def _new_batch(youtube, callback):
+    # api_endpoint の指定はマルチパートの送信先に反映されないため明示する
+    if upstream_base() is not None:
+        return BatchHttpRequest(callback=callback, batch_uri=resolve_url(YOUTUBE_BATCH_URL))
+    return youtube.new_batch_http_request(callback=callback)
+
+
+def _part_error(context: str, exception: Exception) -> Exception:
+    """バッチのパートで発生した例外を呼び出し側に返す形に変換する."""
+    if isinstance(exception, HttpError):
+        return classify_http_error(exception, f"{context} statistics")
+    return exception
+
+
+def _statistics_from_response(response: dict, batch: list[str]) -> dict[str, dict]:
+    # fields 指定時、要求した統計値が1つも無いと statistics 自体が省略される
+    stats = {item["id"]: item.get("statistics", {}) for item in response.get("items", [])}
+    # 削除・非公開で返ってこないIDも空の統計として記録し、再取得を避ける
+    for missing_id in batch:
+        stats.setdefault(missing_id, {})
+    return stats
@@ -0,0 +1,470 @@
+"""YouTube Data API v3 の asyncio クライアント（httpx）.
+
+同期版（src.youtube_api / src.trending）と同じ操作・同じ戻り値の形を持ち、
+永続キャッシュ・キープール（クォータ台帳）・ETag 再検証・リトライの規則も
+同期版と共有する。同期版は httplib2.Http をリクエストごとに貸し出すため
+同時リクエスト数だけスレッドと接続が要るが、こちらは1つの接続プールを共有し、
+カテゴリ・IDバッチの多数の呼び出しを1スレッドから同時に発行できる。
+永続キャッシュ・クォータ台帳（SQLite）の読み書きはロック待ちでループ全体を
+止めないよう asyncio.to_thread で実行する。
+
+Streamlit のタブからは同期ラッパー（search_videos / get_video_details /
+get_channel_details / fetch_trending_videos / fetch_trending_all_categories）
+を呼ぶ。処理はプロセス共通のイベントループ（専用スレッド）で実行する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+import httplib2
+import httpx
+from googleapiclient.errors import HttpError
+from tenacity import AsyncRetrying
+
+import src.trending as trending
+import src.youtube_api as youtube_api
+from src.api_keys import get_key_pool
+from src.concurrency import TaskResult
+from src.constants import (
+    SEARCH_UNITS,
+    YOUTUBE_API_BASE_URL,
+    YOUTUBE_ASYNC_MAX_CONNECTIONS,
+    YOUTUBE_USER_AGENT,
+)
+from src.disk_cache import get_disk_cache
+from src.memory_cache import same_cache_as
+from src.quota_ledger import QuotaLedger
+from src.single_flight import get_flight
+from src.trending import (
+    CATEGORY_MAP,
+    merge_category_outcomes,
+    store_trending,
+    trending_cache_key,
+    trending_params,
+)
+from src.upstream import resolve_url
+from src.youtube_api import (
+    KeyFailover,
+    QuotaExceededError,
+    StatisticsJob,
+    StatisticsPart,
+    StoredValidator,
+    classify_http_error,
+    ensure_quota,
+    get_quota_tracker,
+    load_validator,
+    merge_statistics,
+    plan_statistics,
+    record_gave_up,
+    retry_policy,
+    revalidation_stats,
+    search_page_cache_key,
+    search_params,
+    store_search_page,
+    store_statistics_part,
+)
+
+logger = logging.getLogger("youtube_analyzer")
+
+T = TypeVar("T")
+
+# 同期版と同じグループを使い、同期・非同期をまたいで同じ取得を1回にまとめる
+_search_flight = get_flight("youtube.search")
+_statistics_flight = get_flight("youtube.statistics")
+_trending_flight = get_flight("youtube.trending")
+
+
+class AsyncYouTubeClient:
+    """YouTube Data API の非同期クライアント.
+
+    APIキーは呼び出しごとにキープールから選ぶため、1つのクライアント
+    （1つの接続プール）を全キーで共有できる。キーはURLに載せず
+    X-Goog-Api-Key ヘッダーで送る。
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        max_connections: int = YOUTUBE_ASYNC_MAX_CONNECTIONS,
+        timeout: float = 30,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.max_connections = max_connections
+        self._http = httpx.AsyncClient(
+            base_url=base_url or resolve_url(YOUTUBE_API_BASE_URL),
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections,
+            ),
+            # "gzip" を含む User-Agent と Accept-Encoding で gzip 圧縮レスポンスを受け取る
+            headers={"User-Agent": f"{YOUTUBE_USER_AGENT} (gzip)", "Accept-Encoding": "gzip"},
+            transport=transport,
+        )
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def __aenter__(self) -> AsyncYouTubeClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    # ─── 検索 ──────────────────────────────────────
+
+    @same_cache_as(youtube_api.search_videos)
+    async def search_videos(
+        self,
+        _api_key: str,
+        query: str,
+        max_results: int = 50,
+        published_after: str | None = None,
+        category_id: str | None = None,
+        region_code: str | None = None,
+    ) -> list[dict]:
+        """動画を検索する（100ユニット/回）. youtube_api.search_videos と同じ結果を返す.
+
+        メモリキャッシュは同期版と共有する。
+        """
+        page = await self.search_page(
+            _api_key, query, min(max_results, 50), published_after,
+            category_id=category_id, region_code=region_code,
+        )
+        return page["items"]
+
+    async def search_page(
+        self,
+        api_key: str,
+        query: str,
+        page_size: int = 50,
+        published_after: str | None = None,
+        page_token: str | None = None,
+        category_id: str | None = None,
+        region_code: str | None = None,
+    ) -> dict:
+        """search.list を1ページ分実行する（同期版と同じディスクキャッシュを使う）.
+
+        Returns:
+            {"items": [...], "nextPageToken": str | None}
+        """
+        cache = get_disk_cache()
+        cache_key = search_page_cache_key(
+            query, page_size, published_after, page_token, category_id, region_code,
+        )
+        cached = await asyncio.to_thread(cache.get, "search", cache_key)
+        if cached is not None:
+            logger.info("async search: query=%r page=%r served from disk cache", query, page_token)
+            return cached
+
+        async def fetch() -> dict:
+            logger.info(
+                "async search: query=%r, max_results=%d, page=%r (100 units)",
+                query, page_size, page_token,
+            )
+            response = await self._call(
+                api_key, "search.list", "/search",
+                search_params(
+                    query, page_size, published_after, page_token, category_id, region_code,
+                ),
+                SEARCH_UNITS,
+            )
+            return await asyncio.to_thread(store_search_page, cache, cache_key, response)
+
+        # 同期版を含め、同じページを取得中の呼び出しがあればその結果を共有する
+        return await _search_flight.do_async(cache_key, fetch)
+
+    # ─── statistics ───────────────────────────────
+
+    async def get_video_details(self, api_key: str, video_ids: tuple[str, ...]) -> dict[str, dict]:
+        """動画の statistics を取得する（1ユニット/50件）. {video_id: statistics}"""
+        return (await self.fetch_statistics(api_key, {"videos": video_ids}))["videos"]
+
+    async def get_channel_details(
+        self, api_key: str, channel_ids: tuple[str, ...],
+    ) -> dict[str, dict]:
+        """チャンネルの statistics を取得する（1ユニット/50件）. {channel_id: statistics}"""
+        return (await self.fetch_statistics(api_key, {"channels": channel_ids}))["channels"]
+
+    async def fetch_statistics(
+        self, api_key: str, ids_by_resource: dict[str, tuple[str, ...]],
+    ) -> dict[str, dict[str, dict]]:
+        """複数リソースの statistics をID単位のキャッシュ経由で取得する.
+
+        youtube_api.fetch_statistics と同じ規則（キャッシュ・ETag 再検証・
+        一部失敗時の扱い）で、未取得の全バッチを同時に発行する。
+
+        Raises:
+            QuotaExceededError: いずれかのバッチでクォータ超過した場合
+        """
+        cache = get_disk_cache()
+        results, jobs = await asyncio.to_thread(plan_statistics, cache, ids_by_resource)
+        if not jobs:
+            return results
+
+        await asyncio.to_thread(lambda: ensure_quota(get_key_pool(api_key), len(jobs)))
+        outcomes = await _gather_outcomes(
+            self._fetch_statistics_batch(api_key, cache, job) for job in jobs
+        )
+        return merge_statistics(results, jobs, outcomes)
+
+    async def _fetch_statistics_batch(
+        self, api_key: str, cache, job: StatisticsJob,
+    ) -> StatisticsPart:
+        async def fetch() -> StatisticsPart:
+            response = await self._call(
+                api_key, f"{job.resource}.list", f"/{job.resource}", job.params(), 1, job.validator,
+            )
+            part = StatisticsPart.from_response(response, job)
+            return await asyncio.to_thread(store_statistics_part, cache, job, part)
+
+        return await _statistics_flight.do_async(job.flight_key(), fetch)
+
+    # ─── 急上昇 ────────────────────────────────────
+
+    @same_cache_as(trending.fetch_trending_videos)
+    async def fetch_trending_videos(
+        self,
+        _api_key: str,
+        region_code: str = "JP",
+        max_results: int = 50,
+        category_id: str = "0",
+    ) -> list[dict]:
+        """急上昇動画を取得する（1ユニット/回）. trending.fetch_trending_videos と同じ結果を返す.
+
+        失敗時の扱い（短時間の再取得抑止・最後の成功結果・クォータ超過以外は
+        空のリスト）とメモリキャッシュは同期版と共有する。
+        """
+        return (await self.fetch_trending_snapshot(_api_key, region_code, category_id))[:max_results]
+
+    async def fetch_trending_snapshot(
+        self, api_key: str, region_code: str = "JP", category_id: str = "0",
+    ) -> list[dict]:
+        """カテゴリの急上昇動画を上限件数で取得する. trending.fetch_trending_snapshot と同じキャッシュを使う."""
+        cache = get_disk_cache()
+        cache_key = trending_cache_key(region_code, category_id)
+        cached = await asyncio.to_thread(cache.get, "trending", cache_key)
+        if cached is not None:
+            revalidation_stats.record("trending", "hit")
+            return cached
+
+        async def fetch() -> list[dict]:
+            validator = await asyncio.to_thread(load_validator, cache, "trending", [cache_key])
+            response = await self._call(
+                api_key, "videos.list (mostPopular)", "/videos",
+                trending_params(region_code, category_id), 1, validator,
+            )
+            return await asyncio.to_thread(store_trending, cache, cache_key, response, validator)
+
+        return await _trending_flight.do_async(cache_key, fetch)
+
+    async def fetch_trending_all_categories(
+        self,
+        api_key: str,
+        region_code: str = "JP",
+        max_per_category: int = 10,
+    ) -> dict[str, list[dict]]:
+        """全カテゴリの急上昇動画を同時に取得する. {カテゴリ名: 動画リスト}"""
+        outcomes = await _gather_outcomes(
+            self.fetch_trending_videos(
+                api_key, region_code=region_code, max_results=max_per_category, category_id=cat_id,
+            )
+            for cat_id in CATEGORY_MAP
+        )
+        return merge_category_outcomes(outcomes)
+
+    # ─── HTTP ──────────────────────────────────────
+
+    async def _call(
+        self,
+        api_key: str,
+        endpoint: str,
+        path: str,
+        params: dict,
+        units: int,
+        validator: StoredValidator | None = None,
+    ) -> dict | None:
+        """キー選択・リトライ・エラー分類・クォータ記録つきでGETする. 304 なら None."""
+
+        async def call(key: str, tracker: QuotaLedger) -> dict | None:
+            try:
+                response = await _execute_with_retry(
+                    endpoint, lambda: self._get(key, path, params, validator),
+                )
+            except HttpError as e:
+                raise classify_http_error(e, f"async {endpoint}") from e
+            await asyncio.to_thread(tracker.add, units, endpoint)
+            return response
+
+        return await _with_key_failover(api_key, units, call)
+
+    async def _get(
+        self, key: str, path: str, params: dict, validator: StoredValidator | None,
+    ) -> dict | None:
+        headers = {"X-Goog-Api-Key": key}
+        if validator is not None:
+            headers["If-None-Match"] = validator.etag
+        if self._semaphore is None:
+            # Python 3.9 の Semaphore は生成時のイベントループに紐づくため実行中に作る
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        try:
+            async with self._semaphore:
+                response = await self._http.get(path, params=params, headers=headers)
+        except httpx.TimeoutException as e:
+            raise TimeoutError(str(e)) from e
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+        if response.status_code == 304 and validator is not None:
+            return None
+        if response.status_code >= 300:
+            # 同期版と同じ規則で分類・リトライできるよう googleapiclient の例外にそろえる
+            raise HttpError(
+                httplib2.Response({"status": response.status_code}),
+                response.content,
+                uri=str(response.url),
+            )
+        return response.json()
+
+
+async def _execute_with_retry(endpoint: str, execute: Callable[[], Awaitable[T]]) -> T:
+    """youtube_api.execute_with_retry の非同期版（同じリトライ設定・統計）."""
+    try:
+        return await AsyncRetrying(**retry_policy(endpoint))(execute)
+    except Exception as e:
+        record_gave_up(endpoint, e)
+        raise
+
+
+async def _with_key_failover(
+    api_key: str,
+    units: int,
+    call: Callable[[str, QuotaLedger], Awaitable[T]],
+) -> T:
+    """youtube_api.with_key_failover の非同期版（キー選択は KeyFailover を共有する）."""
+    failover = await asyncio.to_thread(KeyFailover, api_key, units)
+    while True:
+        key = await asyncio.to_thread(failover.next_key)
+        try:
+            return await call(key, await asyncio.to_thread(get_quota_tracker, key))
+        except QuotaExceededError as e:
+            await asyncio.to_thread(failover.exhausted, key, e)
+
+
+async def _gather_outcomes(aws) -> list[TaskResult]:
+    """awaitable を同時に実行し、入力と同じ順序の TaskResult で返す."""
+    values = await asyncio.gather(*aws, return_exceptions=True)
+    return [
+        TaskResult(error=v) if isinstance(v, BaseException) else TaskResult(value=v)
+        for v in values
+    ]
+
+
+# ─── 同期ラッパー ──────────────────────────────────
+
+class _EventLoopThread:
+    """専用スレッドで動くプロセス共通のイベントループとクライアント.
+
+    呼び出しごとに asyncio.run するとループと一緒に接続プールも捨てることに
+    なるため、ループとクライアントを使い続けて keep-alive 接続を再利用する。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: AsyncYouTubeClient | None = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="yta-async-loop", daemon=True,
+                )
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, factory: Callable[[AsyncYouTubeClient], Coroutine[Any, Any, T]]) -> T:
+        """factory(client) のコルーチンをループで実行し、完了まで待つ.
+
+        quota_scope などの contextvars は呼び出し元の値を引き継ぐ。
+        """
+        loop = self._ensure_started()
+        context = contextvars.copy_context()
+
+        async def task() -> T:
+            for var, value in context.items():
+                var.set(value)
+            if self._client is None:
+                self._client = AsyncYouTubeClient()
+            return await factory(self._client)
+
+        return asyncio.run_coroutine_threadsafe(task(), loop).result()
+
+    def close(self) -> None:
+        """クライアントの接続を閉じ、ループを止める."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_loop_thread = _EventLoopThread()
+
+
+def search_videos(
+    api_key: str,
+    query: str,
+    max_results: int = 50,
+    published_after: str | None = None,
+    category_id: str | None = None,
+    region_code: str | None = None,
+) -> list[dict]:
+    """AsyncYouTubeClient.search_videos の同期版."""
+    return _loop_thread.run(
+        lambda client: client.search_videos(
+            api_key, query, max_results, published_after, category_id, region_code,
+        ),
+    )
+
+
+def get_video_details(api_key: str, video_ids: tuple[str, ...]) -> dict[str, dict]:
+    """AsyncYouTubeClient.get_video_details の同期版."""
+    return _loop_thread.run(lambda client: client.get_video_details(api_key, video_ids))
+
+
+def get_channel_details(api_key: str, channel_ids: tuple[str, ...]) -> dict[str, dict]:
+    """AsyncYouTubeClient.get_channel_details の同期版."""
+    return _loop_thread.run(lambda client: client.get_channel_details(api_key, channel_ids))
+
+
+def fetch_trending_videos(
+    api_key: str,
+    region_code: str = "JP",
+    max_results: int = 50,
+    category_id: str = "0",
+) -> list[dict]:
+    """AsyncYouTubeClient.fetch_trending_videos の同期版."""
+    return _loop_thread.run(
+        lambda client: client.fetch_trending_videos(api_key, region_code, max_results, category_id),
+    )
+
+
+def fetch_trending_all_categories(
+    api_key: str,
+    region_code: str = "JP",
+    max_per_category: int = 10,
+) -> dict[str, list[dict]]:
+    """AsyncYouTubeClient.fetch_trending_all_categories の同期版."""
+    return _loop_thread.run(
+        lambda client: client.fetch_trending_all_categories(api_key, region_code, max_per_category),
+    )
@@ -0,0 +1,42 @@
+"""テスト共通フィクスチャ."""
+
+import pytest
+
+import src.api_keys as api_keys
+import src.disk_cache as disk_cache
+import src.memory_cache as memory_cache
+import src.quota_ledger as quota_ledger
+import src.youtube_api as youtube_api
+from src.constants import QUOTA_LEDGER_PATH_ENV
+from src.youtube_api import retry_stats, revalidation_stats
+
+
+@pytest.fixture(autouse=True)
+def isolated_disk_cache(tmp_path, monkeypatch):
+    """永続キャッシュを一時ディレクトリに隔離し、メモリキャッシュも空にする."""
+    cache = disk_cache.DiskCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(disk_cache, "_default_cache", cache)
+    monkeypatch.setattr(memory_cache, "_default_cache", memory_cache.MemoryCache())
+    revalidation_stats.reset()
+    retry_stats.reset()
+    yield cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_quota_ledger(tmp_path, monkeypatch):
+    """クォータ台帳とキープールを一時ディレクトリに隔離する.
+
+    テストで使うキー "KEY" の台帳を返す。
+    """
+    monkeypatch.setenv(QUOTA_LEDGER_PATH_ENV, str(tmp_path / "quota.sqlite3"))
+    monkeypatch.setattr(quota_ledger, "_ledgers", {})
+    monkeypatch.setattr(api_keys, "_configured_pool", None)
+    monkeypatch.setattr(api_keys, "_single_pools", {})
+    yield quota_ledger.get_quota_ledger(api_keys.key_fingerprint("KEY"))
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    """YouTube API のリトライで待機しない."""
+    monkeypatch.setattr(youtube_api, "YOUTUBE_RETRY_INITIAL_WAIT", 0)
+    monkeypatch.setattr(youtube_api, "YOUTUBE_RETRY_MAX_WAIT", 0)
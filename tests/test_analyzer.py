@@ -1,7 +1,17 @@
 """src/analyzer.py のテスト."""
 
-from src.youtube_api import VideoInfo
-from src.analyzer import filter_videos, sort_by_vs_ratio, videos_to_dataframe
+from unittest.mock import patch
+
+from src.youtube_api import ChannelInfo, VideoInfo, search_page_cache_key
+from src.analyzer import (
+    fetch_and_analyze,
+    fetch_and_analyze_batch,
+    fetch_and_analyze_deep,
+    iter_analyze_deep,
+    filter_videos,
+    sort_by_vs_ratio,
+    videos_to_dataframe,
+)
 
 
 def _make_video(
@@ -14,16 +24,240 @@ def _make_video(
     return VideoInfo(
         video_id=video_id,
         title=title,
-        channel_id="ch1",
-        channel_title="TestChannel",
+        channel=ChannelInfo("ch1", "TestChannel", subscriber_count),
         published_at="2026-01-01T00:00:00Z",
         thumbnail_url="https://example.com/thumb.jpg",
         view_count=view_count,
-        subscriber_count=subscriber_count,
         vs_ratio=vs_ratio,
     )
 
 
+def _make_search_item(video_id: str, channel_id: str) -> dict:
+    return {
+        "id": {"videoId": video_id},
+        "snippet": {
+            "title": f"title-{video_id}",
+            "channelId": channel_id,
+            "channelTitle": f"channel-{channel_id}",
+            "publishedAt": "2026-01-01T00:00:00Z",
+            "thumbnails": {"high": {"url": "https://example.com/high.jpg"}},
+        },
+    }
+
+
+class TestFetchAndAnalyze:
+    @patch("src.analyzer.fetch_statistics")
+    @patch("src.analyzer.search_videos")
+    def test_vs_ratio(self, mock_search, mock_stats):
+        mock_search.return_value = [
+            _make_search_item("v1", "ch1"),
+            _make_search_item("v2", "ch1"),
+            _make_search_item("v3", "ch2"),
+        ]
+        mock_stats.return_value = {
+            "videos": {
+                "v1": {"viewCount": "5000"},
+                "v2": {"viewCount": "100"},
+                "v3": {"viewCount": "300"},
+            },
+            "channels": {
+                "ch1": {"subscriberCount": "1000"},
+                "ch2": {"hiddenSubscriberCount": True},
+            },
+        }
+
+        videos = fetch_and_analyze("KEY", "query")
+        assert [v.vs_ratio for v in videos] == [5.0, 0.1, 0.0]
+
+        requested = mock_stats.call_args.args[1]
+        assert requested["videos"] == ("v1", "v2", "v3")
+        assert set(requested["channels"]) == {"ch1", "ch2"}
+
+    @patch("src.analyzer.fetch_statistics")
+    @patch("src.analyzer.search_videos")
+    def test_no_results(self, mock_search, mock_stats):
+        mock_search.return_value = []
+        assert len(fetch_and_analyze("KEY", "query")) == 0
+        mock_stats.assert_not_called()
+
+
+def _fake_statistics(api_key, ids_by_resource, use_batch=False, budget=None):
+    return {
+        "videos": {vid: {"viewCount": "2000"} for vid in ids_by_resource["videos"]},
+        "channels": {ch: {"subscriberCount": "1000"} for ch in ids_by_resource["channels"]},
+    }
+
+
+class TestFetchAndAnalyzeDeep:
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_dedup_across_pages(self, mock_pages, mock_stats):
+        mock_pages.return_value = iter([
+            [_make_search_item("v1", "ch1"), _make_search_item("v2", "ch1")],
+            [_make_search_item("v2", "ch1"), _make_search_item("v3", "ch2")],
+        ])
+
+        videos = fetch_and_analyze_deep("KEY", "query", quota_budget=500)
+        assert [v.video_id for v in videos] == ["v1", "v2", "v3"]
+        assert mock_stats.call_args.args[1]["videos"] == ("v3",)
+
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_stops_when_target_reached(self, mock_pages, mock_stats):
+        pages_consumed = []
+
+        def pages():
+            for page in range(5):
+                pages_consumed.append(page)
+                yield [_make_search_item(f"p{page}-v{i}", "ch1") for i in range(3)]
+
+        mock_pages.return_value = pages()
+
+        videos = fetch_and_analyze_deep(
+            "KEY", "query", quota_budget=1000, min_vs_ratio=1.0, target_count=5,
+        )
+        assert len(videos) == 6
+        assert pages_consumed == [0, 1]
+
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_no_filters_reads_all_pages(self, mock_pages, mock_stats):
+        mock_pages.return_value = iter([
+            [_make_search_item(f"p{page}-v{i}", "ch1") for i in range(3)] for page in range(3)
+        ])
+
+        videos = fetch_and_analyze_deep("KEY", "query", quota_budget=1000, target_count=3)
+        assert len(videos) == 9
+
+
+class TestIterAnalyzeDeep:
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_search_results_yielded_before_statistics(self, mock_pages, mock_stats):
+        events = []
+
+        def pages():
+            for page in range(2):
+                events.append(f"search-{page}")
+                yield [_make_search_item(f"p{page}-v{i}", "ch1") for i in range(2)]
+
+        def statistics(*args, **kwargs):
+            events.append("statistics")
+            return _fake_statistics(*args, **kwargs)
+
+        mock_pages.return_value = pages()
+        mock_stats.side_effect = statistics
+
+        for progress in iter_analyze_deep("KEY", "query", quota_budget=1000, target_count=100):
+            kind = "page" if progress.has_statistics else "preview"
+            events.append(f"{kind}-{progress.analyzed}")
+
+        assert events == [
+            "search-0", "preview-0", "statistics", "page-2",
+            "search-1", "preview-2", "statistics", "page-4",
+        ]
+
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_progress_counts(self, mock_pages, mock_stats):
+        mock_pages.return_value = iter([
+            [_make_search_item(f"v{i}", "ch1") for i in range(3)],
+        ])
+
+        preview, progress = iter_analyze_deep(
+            "KEY", "query", quota_budget=100, min_views=5000, target_count=4,
+        )
+
+        assert not preview.has_statistics
+        assert [v.title for v in preview.page] == ["title-v0", "title-v1", "title-v2"]
+        assert preview.page.view_count.tolist() == [0, 0, 0]
+        assert progress.has_statistics
+        assert (progress.analyzed, progress.matched) == (3, 0)
+        assert [v.video_id for v in progress.page] == ["v0", "v1", "v2"]
+        assert progress.fraction == 0.0
+
+
+class TestFetchAndAnalyzeBatch:
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_dedup_across_queries_with_provenance(self, mock_pages, mock_stats):
+        pages = {
+            "猫": [_make_search_item("v1", "ch1"), _make_search_item("v2", "ch1")],
+            "子猫": [_make_search_item("v2", "ch1"), _make_search_item("v3", "ch2")],
+        }
+        mock_pages.side_effect = lambda api_key, query, budget, *args, **kwargs: iter([pages[query]])
+
+        result = fetch_and_analyze_batch("KEY", ["猫", "子猫", "猫", " "], quota_budget=1000)
+
+        assert mock_pages.call_count == 2
+        assert mock_stats.call_count == 1
+        ids = mock_stats.call_args.args[1]
+        assert ids == {"videos": ("v1", "v2", "v3"), "channels": ("ch1", "ch2")}
+        assert sorted(v.video_id for v in result.videos) == ["v1", "v2", "v3"]
+        assert result.keywords["v2"] == ("猫", "子猫")
+        assert (result.detail_batches, result.naive_detail_batches) == (2, 4)
+        df = result.to_dataframe()
+        assert df.loc[df["動画URL"].str.endswith("v2"), "キーワード"].tolist() == ["猫、子猫"]
+
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_only_affordable_queries_search_live(self, mock_pages, mock_stats):
+        budgets = {}
+
+        def pages(api_key, query, budget, *args, **kwargs):
+            budgets[query] = budget.limit
+            return iter([[_make_search_item(query, "ch1")]] if budget.limit else [])
+
+        mock_pages.side_effect = pages
+
+        result = fetch_and_analyze_batch("KEY", ["a", "b", "c"], quota_budget=250)
+
+        assert budgets == {"a": 100, "b": 100, "c": 0}
+        assert result.skipped_queries == ("c",)
+        assert len(result.videos) == 2
+
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_cached_queries_reserve_details_not_search_slots(
+        self, mock_pages, mock_stats, isolated_disk_cache,
+    ):
+        cached_items = [_make_search_item(f"q3-v{i}", f"ch{i}") for i in range(50)]
+        isolated_disk_cache.set(
+            "search", search_page_cache_key("q3", 50, None, None), {"items": cached_items},
+        )
+
+        def pages(api_key, query, budget, *args, **kwargs):
+            if query == "q3":
+                return iter([cached_items])
+            if not budget.can_afford(100):
+                return iter([])
+            budget.spend(100)
+            return iter([[_make_search_item(f"{query}-v{i}", "shared") for i in range(50)]])
+
+        mock_pages.side_effect = pages
+
+        result = fetch_and_analyze_batch("KEY", ["q1", "q2", "q3"], quota_budget=204)
+
+        # q3 の詳細取得（2ユニット）を先に確保し、残りで q1 だけを検索する
+        assert result.skipped_queries == ("q2",)
+        assert mock_stats.call_args.kwargs["budget"].limit == 104
+        # q1 の50件 + q3 の50件・51チャンネルは 1 + 1 + 2 = 4 バッチ必要
+        assert result.detail_shortfall == 0
+        assert len(result.videos) == 100
+
+    @patch("src.analyzer.fetch_statistics", side_effect=_fake_statistics)
+    @patch("src.analyzer.iter_search_pages")
+    def test_detail_shortfall_reported(self, mock_pages, mock_stats, isolated_disk_cache):
+        items = [_make_search_item(f"v{i}", f"ch{i}") for i in range(50)]
+        isolated_disk_cache.set("search", search_page_cache_key("a", 50, None, None), {"items": items})
+        mock_pages.side_effect = lambda *args, **kwargs: iter([items])
+
+        result = fetch_and_analyze_batch("KEY", ["a"], quota_budget=1)
+
+        assert result.detail_shortfall == 1
+        assert mock_stats.call_args.kwargs["budget"].limit == 1
+
+
 class TestFilterVideos:
     def test_no_filter(self):
         videos = [_make_video()]
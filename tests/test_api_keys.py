@@ -0,0 +1,102 @@
+"""src/api_keys.py のテスト."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.api_keys import (
+    ApiKeyPool,
+    configure_key_pool,
+    get_key_pool,
+    key_fingerprint,
+    load_api_keys,
+)
+from src.youtube_api import QuotaExceededError, search_videos
+
+
+class TestLoadApiKeys:
+    def test_list_and_legacy_key(self):
+        secrets = {"YOUTUBE_API_KEYS": ["K1", "K2"], "YOUTUBE_API_KEY": "K1"}
+        assert load_api_keys(secrets) == ["K1", "K2"]
+
+    def test_comma_separated(self):
+        assert load_api_keys({"YOUTUBE_API_KEYS": "K1, K2,"}) == ["K1", "K2"]
+
+    def test_legacy_only(self):
+        assert load_api_keys({"YOUTUBE_API_KEY": "K1"}) == ["K1"]
+
+    def test_empty(self):
+        assert load_api_keys({}) == []
+
+
+class TestApiKeyPool:
+    def test_selects_least_used_key(self):
+        pool = ApiKeyPool(["K1", "K2", "K3"])
+        pool.ledger("K1").add(300, "search.list")
+        pool.ledger("K2").add(100, "search.list")
+        pool.ledger("K3").add(200, "search.list")
+        assert pool.select(100) == "K2"
+
+    def test_skips_exhausted_and_low_keys(self):
+        pool = ApiKeyPool(["K1", "K2"])
+        pool.mark_exhausted("K1")
+        pool.ledger("K2").add(9_850, "search.list")
+        assert pool.select(100) is None
+        assert pool.select(1) == "K2"
+
+    def test_totals(self):
+        pool = ApiKeyPool(["K1", "K2"])
+        pool.ledger("K1").add(1_000, "search.list")
+        assert pool.daily_limit == 20_000
+        assert pool.used == 1_000
+        assert pool.spendable == 20_000 - 1_000 - 2 * 100
+
+    def test_ledger_does_not_store_raw_key(self):
+        pool = ApiKeyPool(["secret-key"])
+        assert pool.ledger("secret-key").key_id == key_fingerprint("secret-key")
+        assert "secret" not in key_fingerprint("secret-key")
+
+    def test_get_key_pool(self):
+        pool = configure_key_pool(["K1", "K2"])
+        assert get_key_pool("K2") is pool
+        assert get_key_pool().keys == ["K1", "K2"]
+        assert get_key_pool("OTHER").keys == ["OTHER"]
+
+
+class TestKeyFailover:
+    @patch("src.youtube_api.get_youtube_client")
+    def test_quota_403_fails_over_to_next_key(self, mock_client):
+        exhausted = MagicMock()
+        exhausted.search().list().execute.side_effect = HttpError(MagicMock(status=403), b"quota")
+        healthy = MagicMock()
+        healthy.search().list().execute.return_value = {"items": [{"id": {"videoId": "v1"}}]}
+        mock_client.side_effect = lambda key: {"K1": exhausted, "K2": healthy}[key]
+        pool = configure_key_pool(["K1", "K2"])
+
+        assert search_videos("K1", "q") == [{"id": {"videoId": "v1"}}]
+        assert pool.ledger("K1").exhausted
+        assert pool.ledger("K2").used == 100
+        assert pool.ledger("K1").used == 0
+
+    @patch("src.youtube_api.get_youtube_client")
+    def test_all_keys_exhausted(self, mock_client):
+        youtube = MagicMock()
+        youtube.search().list().execute.side_effect = HttpError(MagicMock(status=403), b"quota")
+        mock_client.return_value = youtube
+        configure_key_pool(["K1", "K2"])
+
+        with pytest.raises(QuotaExceededError):
+            search_videos("K1", "q")
+        assert youtube.search().list().execute.call_count == 2
+
+    @patch("src.youtube_api.get_youtube_client")
+    def test_cache_shared_across_keys(self, mock_client):
+        youtube = MagicMock()
+        youtube.search().list().execute.return_value = {"items": []}
+        mock_client.return_value = youtube
+        configure_key_pool(["K1", "K2"])
+
+        search_videos("K1", "q")
+        search_videos("K2", "q")
+        assert youtube.search().list().execute.call_count == 1
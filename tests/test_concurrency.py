@@ -0,0 +1,66 @@
+"""src/concurrency.py のテスト."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from src.concurrency import parallel_map
+from src.constants import API_MAX_WORKERS
+
+
+class TestParallelMap:
+    def test_preserves_order(self):
+        def slow_square(x):
+            time.sleep(0.01 * (5 - x))
+            return x * x
+
+        results = parallel_map(slow_square, range(5))
+        assert [r.value for r in results] == [0, 1, 4, 9, 16]
+
+    def test_captures_errors(self):
+        def maybe_fail(x):
+            if x == 2:
+                raise ValueError("boom")
+            return x
+
+        results = parallel_map(maybe_fail, [1, 2, 3])
+        assert [r.ok for r in results] == [True, False, True]
+        assert isinstance(results[1].error, ValueError)
+        assert results[2].value == 3
+
+    def test_runs_concurrently(self):
+        start = time.perf_counter()
+        parallel_map(lambda _: time.sleep(0.1), range(4))
+        assert time.perf_counter() - start < 0.3
+
+    def test_nested_call_runs_inline(self):
+        def outer(x):
+            inner = parallel_map(lambda y: threading.current_thread().name, [1, 2])
+            return {r.value for r in inner} == {threading.current_thread().name}
+
+        results = parallel_map(outer, [1, 2])
+        assert all(r.value for r in results)
+
+    def test_empty(self):
+        assert parallel_map(lambda x: x, []) == []
+
+    def test_script_context_not_left_on_workers(self):
+        def current_ctx(_):
+            time.sleep(0.01)
+            return get_script_run_ctx(suppress_warning=True)
+
+        session_ctx = MagicMock()
+        main = threading.current_thread()
+        add_script_run_ctx(main, session_ctx)
+        try:
+            results = parallel_map(current_ctx, range(API_MAX_WORKERS))
+        finally:
+            setattr(main, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        assert all(r.value is session_ctx for r in results)
+
+        # 同じワーカーで動く、コンテキストなしの後続タスクには引き継がれない
+        results = parallel_map(current_ctx, range(API_MAX_WORKERS * 2))
+        assert all(r.value is None for r in results)
@@ -0,0 +1,120 @@
+"""src/disk_cache.py のテスト."""
+
+import time
+
+from src.disk_cache import DiskCache, make_cache_key
+
+
+def _make_cache(tmp_path, **kwargs) -> DiskCache:
+    return DiskCache(str(tmp_path / "test.sqlite3"), **kwargs)
+
+
+class TestMakeCacheKey:
+    def test_stable(self):
+        assert make_cache_key("a", 1, None) == make_cache_key("a", 1, None)
+
+    def test_distinct(self):
+        assert make_cache_key("a", 1) != make_cache_key("a", 2)
+
+
+class TestDiskCache:
+    def test_set_and_get(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("search", "k1", [{"id": "v1"}])
+        assert cache.get("search", "k1") == [{"id": "v1"}]
+        assert cache.hits == 1
+
+    def test_miss(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        assert cache.get("search", "missing") is None
+        assert cache.misses == 1
+
+    def test_namespaces_are_separate(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("search", "k", 1)
+        assert cache.get("videos", "k") is None
+
+    def test_expired_entry(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("search", "k", "value", ttl=-1)
+        assert cache.get("search", "k") is None
+
+    def test_survives_reopen(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("search", "k", {"a": 1})
+        reopened = _make_cache(tmp_path)
+        assert reopened.get("search", "k") == {"a": 1}
+
+    def test_max_entries_evicts_lru(self, tmp_path):
+        cache = _make_cache(tmp_path, max_entries={"search": 2})
+        cache.set("search", "k1", 1)
+        time.sleep(0.01)
+        cache.set("search", "k2", 2)
+        time.sleep(0.01)
+        cache.get("search", "k1")
+        time.sleep(0.01)
+        cache.set("search", "k3", 3)
+        assert cache.get("search", "k1") == 1
+        assert cache.get("search", "k2") is None
+        assert cache.get("search", "k3") == 3
+
+    def test_max_bytes(self, tmp_path):
+        cache = _make_cache(tmp_path, max_bytes=30)
+        cache.set("search", "k1", "x" * 20)
+        time.sleep(0.01)
+        cache.set("search", "k2", "y" * 20)
+        assert cache.get("search", "k1") is None
+        assert cache.get("search", "k2") == "y" * 20
+
+    def test_stats_and_clear(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("search", "k1", 1)
+        cache.set("videos", "k2", 2)
+        stats = {s["namespace"]: s for s in cache.stats()}
+        assert stats["search"]["entries"] == 1
+        assert stats["videos"]["entries"] == 1
+
+        assert cache.clear("search") == 1
+        assert cache.get("videos", "k2") == 2
+        assert cache.clear() == 1
+        assert cache.stats() == []
+
+    def test_get_many_and_set_many(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set_many("videos", {"v1": {"viewCount": "1"}, "v2": {}})
+        found = cache.get_many("videos", ["v1", "v2", "v3"])
+        assert found == {"v1": {"viewCount": "1"}, "v2": {}}
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+
+class TestPeek:
+    def test_peek_does_not_touch_stats(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("videos", "v1", {"viewCount": "1"})
+        assert cache.peek("videos", "v1") == {"viewCount": "1"}
+        assert cache.peek_keys("videos", ["v1", "v2"]) == {"v1"}
+        assert cache.hits == 0
+        assert cache.misses == 0
+
+
+class TestStaleEntries:
+    def test_expired_entry_kept_for_revalidation(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("trending", "k", [1, 2], ttl=-1)
+        cache.set("trending", "other", [])  # 書き込み時の削除処理を走らせる
+        assert cache.get("trending", "k") is None
+        assert cache.get_stale_many("trending", ["k"]) == {"k": [1, 2]}
+
+    def test_purged_after_retention(self, tmp_path):
+        cache = _make_cache(tmp_path, stale_retention=0)
+        cache.set("trending", "k", [1, 2], ttl=-1)
+        cache.set("trending", "other", [])
+        assert cache.get_stale_many("trending", ["k"]) == {}
+
+    def test_touch_refreshes_expiry(self, tmp_path):
+        cache = _make_cache(tmp_path)
+        cache.set("trending", "k", [1, 2], ttl=-1)
+        saved = cache.touch("trending", ["k"])
+        assert cache.get("trending", "k") == [1, 2]
+        assert saved == len("[1, 2]")
@@ -0,0 +1,119 @@
+"""src/fake_upstream.py と接続先の切り替え（src/upstream.py）のテスト.
+
+アプリのクライアントを実際のHTTPでフェイクサーバーに接続する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from googleapiclient.errors import HttpError
+
+import src.youtube_api as youtube_api
+from src.constants import UPSTREAM_URL_ENV, YOUTUBE_RETRY_ATTEMPTS
+from src.fake_upstream import FakeUpstream, FakeUpstreamConfig
+from src.hatena_api import get_hotentry
+from src.suggest_api import fetch_suggestions
+from src.trends_api import get_related_queries, get_trending_searches
+from src.upstream import resolve_url
+from src.youtube_api import (
+    QuotaExceededError,
+    YouTubeClientPool,
+    fetch_statistics,
+    revalidation_stats,
+    search_videos,
+)
+from src.youtube_async import AsyncYouTubeClient
+
+
+@pytest.fixture
+def upstream(request, monkeypatch):
+    config = getattr(request, "param", None) or FakeUpstreamConfig()
+    with FakeUpstream(config) as server:
+        monkeypatch.setenv(UPSTREAM_URL_ENV, server.url)
+        # 本番向けに作られたクライアントを使い回さないよう新しいプールにする
+        pool = YouTubeClientPool()
+        monkeypatch.setattr(youtube_api, "_client_pool", pool)
+        yield server
+        pool.close()
+
+
+class TestResolveUrl:
+    def test_unchanged_without_upstream(self, monkeypatch):
+        monkeypatch.delenv(UPSTREAM_URL_ENV, raising=False)
+        assert resolve_url("https://b.hatena.ne.jp/hotentry.rss") == "https://b.hatena.ne.jp/hotentry.rss"
+
+    def test_host_becomes_path_prefix(self, monkeypatch):
+        monkeypatch.setenv(UPSTREAM_URL_ENV, "http://127.0.0.1:8765/")
+        assert resolve_url("https://trends.google.com/trending/rss?geo=JP") == (
+            "http://127.0.0.1:8765/trends.google.com/trending/rss?geo=JP"
+        )
+
+
+class TestYouTubeAgainstFake:
+    def test_search_and_quota_accounting(self, upstream, isolated_quota_ledger):
+        items = search_videos("KEY", "猫")
+
+        assert len(items) == 50
+        assert items[0]["snippet"]["title"].startswith("猫")
+        assert upstream.stats.snapshot()["units"] == {"KEY": 100}
+        assert isolated_quota_ledger.used == 100
+
+    def test_multipart_statistics_and_revalidation(self, upstream, isolated_disk_cache):
+        ids = {"videos": tuple(f"v{i}" for i in range(60)), "channels": ("c1",)}
+        first = fetch_statistics("KEY", ids, use_batch=True)
+        isolated_disk_cache.touch("videos", list(ids["videos"]), ttl=-1)
+
+        second = fetch_statistics("KEY", ids, use_batch=True)
+
+        assert first == second
+        assert len(first["videos"]) == 60
+        snapshot = upstream.stats.snapshot()
+        assert snapshot["requests"]["youtube.batch"] == 2
+        assert snapshot["statuses"][304] == 2
+        assert {c["namespace"]: c["revalidated"] for c in revalidation_stats.snapshot()}["videos"] == 60
+
+    @pytest.mark.parametrize("upstream", [FakeUpstreamConfig(error_rate=1.0)], indirect=True)
+    def test_errors_are_retried(self, upstream):
+        with pytest.raises(HttpError):
+            search_videos("KEY", "q")
+        assert upstream.stats.snapshot()["requests"]["youtube.search"] == YOUTUBE_RETRY_ATTEMPTS
+
+    @pytest.mark.parametrize("upstream", [FakeUpstreamConfig(daily_quota=150)], indirect=True)
+    def test_server_side_quota(self, upstream):
+        search_videos("KEY", "a")
+        with pytest.raises(QuotaExceededError):
+            search_videos("KEY", "b")
+
+    def test_async_client(self, upstream):
+        async def main():
+            async with AsyncYouTubeClient() as client:
+                return await client.fetch_trending_all_categories("KEY", max_per_category=5)
+
+        result = asyncio.run(main())
+
+        assert all(len(videos) == 5 for videos in result.values())
+        assert upstream.stats.snapshot()["requests"]["youtube.trending"] == len(result)
+
+
+class TestOtherServicesAgainstFake:
+    def test_suggest(self, upstream):
+        suggestions = fetch_suggestions("猫")
+        assert len(suggestions) == 10
+        assert all(s.startswith("猫 ") for s in suggestions)
+
+    def test_trends_rss(self, upstream):
+        trends = get_trending_searches("JP")
+        assert len(trends) == 20
+        assert trends[0]["news"][0]["source"] == "Fake News"
+
+    def test_pytrends_related_queries(self, upstream):
+        related = get_related_queries("猫")
+        assert len(related["top"]) == 10
+        assert list(related["rising"].columns) == ["query", "value"]
+
+    def test_hatena(self, upstream):
+        entries = get_hotentry("it")
+        assert len(entries) == 30
+        assert entries[0]["bookmarks"] >= entries[-1]["bookmarks"]
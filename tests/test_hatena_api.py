@@ -90,6 +90,13 @@ class TestGetHotentry:
         result = get_hotentry()
         assert result == []
 
+    @patch("src.hatena_api.feedparser.parse")
+    def test_failure_not_retried_immediately(self, mock_parse):
+        mock_parse.side_effect = Exception("network error")
+        assert get_hotentry("it") == []
+        assert get_hotentry("it") == []
+        assert mock_parse.call_count == 1
+
     @patch("src.hatena_api.feedparser.parse")
     def test_sorted_by_bookmarks(self, mock_parse):
         mock_parse.return_value = _make_feed(entries=[
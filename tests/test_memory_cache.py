@@ -0,0 +1,177 @@
+"""src/memory_cache.py のテスト."""
+
+from __future__ import annotations
+
+import asyncio
+import pickle
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.memory_cache as memory_cache
+from src.memory_cache import MemoryCache, get_memory_cache
+
+
+def _size(value) -> int:
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class TestMemoryCache:
+    def test_get_returns_copy(self):
+        cache = MemoryCache()
+        cache.set("ns", "k", {"items": [1]}, ttl=60)
+
+        found, value = cache.get("ns", "k")
+        value["items"].append(2)
+
+        assert found
+        assert cache.get("ns", "k") == (True, {"items": [1]})
+
+    def test_expired_entry_is_miss(self):
+        cache = MemoryCache()
+        cache.set("ns", "k", "v", ttl=-1)
+
+        assert cache.get("ns", "k") == (False, None)
+        assert cache.resident_bytes == 0
+
+    def test_lru_eviction_within_budget(self):
+        value = "x" * 100
+        cache = MemoryCache(max_bytes=_size(value) * 2)
+        cache.set("ns", "a", value, ttl=60)
+        cache.set("ns", "b", value, ttl=60)
+        cache.get("ns", "a")  # a を最近使ったことにする
+
+        cache.set("ns", "c", value, ttl=60)
+
+        assert cache.get("ns", "b") == (False, None)
+        assert cache.get("ns", "a")[0] and cache.get("ns", "c")[0]
+        assert cache.resident_bytes <= cache.max_bytes
+        assert cache.stats()[0]["evictions"] == 1
+
+    def test_oversized_value_not_cached(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.set("ns", "k", "x" * 100, ttl=60)
+
+        assert cache.resident_bytes == 0
+        assert cache.get("ns", "k") == (False, None)
+
+    def test_stats_per_namespace(self):
+        cache = MemoryCache()
+        cache.set("a", "k", [1, 2, 3], ttl=60)
+        cache.get("a", "k")
+        cache.get("a", "missing")
+        cache.get("b", "missing")
+
+        stats = {row["namespace"]: row for row in cache.stats()}
+
+        assert stats["a"]["entries"] == 1
+        assert stats["a"]["bytes"] == _size([1, 2, 3])
+        assert stats["a"]["hit_rate"] == 0.5
+        assert stats["b"]["entries"] == 0
+        assert stats["b"]["hit_rate"] == 0.0
+
+
+class TestMemoryCacheDecorator:
+    def test_underscore_args_excluded_from_key(self):
+        func = MagicMock(side_effect=lambda _api_key, query, limit=10: f"{query}:{limit}")
+
+        @memory_cache.memory_cache(ttl=60)
+        def fetch(_api_key: str, query: str, limit: int = 10) -> str:
+            return func(_api_key, query, limit)
+
+        assert fetch("K1", "猫") == "猫:10"
+        assert fetch("K2", "猫", limit=10) == "猫:10"
+        assert fetch("K1", "猫", 20) == "猫:20"
+        assert func.call_count == 2
+
+    def test_exceptions_not_cached_and_clear(self):
+        func = MagicMock(side_effect=[RuntimeError("boom"), "ok", "again"])
+
+        @memory_cache.memory_cache(ttl=60)
+        def fetch(query: str) -> str:
+            return func(query)
+
+        with pytest.raises(RuntimeError):
+            fetch("q")
+        assert fetch("q") == "ok"
+        assert fetch("q") == "ok"
+
+        fetch.clear()
+
+        assert fetch("q") == "again"
+        assert get_memory_cache().stats()[0]["hits"] == 1
+
+
+class TestErrorAwareCaching:
+    def _decorate(self, func, **policy):
+        @memory_cache.memory_cache(ttl=60, **policy)
+        def fetch(query: str):
+            return func(query)
+
+        return fetch
+
+    def test_failure_is_negatively_cached(self):
+        func = MagicMock(side_effect=[RuntimeError("503"), ["ok"]])
+        fetch = self._decorate(func, error_ttl=30, fallback=lambda error: [])
+
+        assert fetch("q") == []
+        assert fetch("q") == []  # 再実行を控えている間は上流を呼ばない
+        assert func.call_count == 1
+
+    def test_backoff_doubles_and_retries_after_expiry(self):
+        func = MagicMock(side_effect=[RuntimeError("a"), RuntimeError("b"), ["ok"]])
+        fetch = self._decorate(func, error_ttl=30, fallback=lambda error: [])
+
+        with patch("src.memory_cache.time.time", return_value=1000.0):
+            fetch("q")
+        with patch("src.memory_cache.time.time", return_value=1031.0):
+            fetch("q")  # 30秒後に再試行 → 再び失敗
+        with patch("src.memory_cache.time.time", return_value=1080.0):
+            assert fetch("q") == []  # 2回目の失敗から60秒経つまでは控える
+        with patch("src.memory_cache.time.time", return_value=1092.0):
+            assert fetch("q") == ["ok"]
+        assert func.call_count == 3
+        assert get_memory_cache().stats()[0]["errors"] == 2
+
+    def test_last_good_value_served_on_failure(self):
+        func = MagicMock(side_effect=[["old"], RuntimeError("503")])
+        fetch = self._decorate(func, error_ttl=30, stale_ttl=3600, fallback=lambda error: [])
+
+        with patch("src.memory_cache.time.time", return_value=1000.0):
+            assert fetch("q") == ["old"]
+        with patch("src.memory_cache.time.time", return_value=1100.0):
+            assert fetch("q") == ["old"]
+        assert func.call_count == 2
+        assert get_memory_cache().stats()[0]["stale"] == 1
+
+    def test_failure_reraised_without_fallback(self):
+        fetch = self._decorate(MagicMock(side_effect=RuntimeError("429")), error_ttl=30)
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="429"):
+                fetch("q")
+
+    def test_empty_result_uses_short_ttl(self):
+        func = MagicMock(side_effect=[[], ["new"]])
+        fetch = self._decorate(func, empty_ttl=5)
+
+        with patch("src.memory_cache.time.time", return_value=1000.0):
+            assert fetch("q") == []
+        with patch("src.memory_cache.time.time", return_value=1010.0):
+            assert fetch("q") == ["new"]
+
+    def test_coroutine_shares_cache_with_sync_version(self):
+        sync_func = MagicMock(side_effect=RuntimeError("503"))
+        async_func = MagicMock(return_value=["async"])
+        sync_fetch = self._decorate(sync_func, error_ttl=30, fallback=lambda error: [])
+
+        class Client:
+            @memory_cache.same_cache_as(sync_fetch)
+            async def fetch(self, query: str):
+                return async_func(query)
+
+        assert sync_fetch("q") == []
+        assert asyncio.run(Client().fetch("q")) == []  # 同期版の失敗記録を共有する
+        assert asyncio.run(Client().fetch("other")) == ["async"]
+        assert sync_fetch("other") == ["async"]
+        assert async_func.call_count == 1
@@ -0,0 +1,104 @@
+"""src/quota_ledger.py のテスト."""
+
+import threading
+from datetime import datetime, timezone
+
+from src.quota_ledger import PACIFIC, QuotaLedger, pacific_day, quota_scope
+
+
+class _Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _make_ledger(tmp_path, **kwargs) -> QuotaLedger:
+    return QuotaLedger(str(tmp_path / "quota.sqlite3"), **kwargs)
+
+
+class TestPacificDay:
+    def test_jst_afternoon_is_next_pacific_day(self):
+        # 日本時間 2026-03-02 16:30 = 太平洋時間 2026-03-01 23:30（PST）
+        now = datetime(2026, 3, 2, 7, 30, tzinfo=timezone.utc)
+        assert pacific_day(now) == "2026-03-01"
+
+    def test_after_pacific_midnight(self):
+        now = datetime(2026, 3, 2, 8, 30, tzinfo=timezone.utc)
+        assert pacific_day(now) == "2026-03-02"
+
+
+class TestQuotaLedger:
+    def test_initial_state(self, tmp_path):
+        ledger = _make_ledger(tmp_path)
+        assert ledger.used == 0
+        assert ledger.remaining == 10_000
+
+    def test_add(self, tmp_path):
+        ledger = _make_ledger(tmp_path)
+        ledger.add(100, "search.list")
+        ledger.add(1, "videos.list")
+        assert ledger.used == 101
+        assert ledger.usage_percent == 1.01
+
+    def test_shared_between_instances(self, tmp_path):
+        _make_ledger(tmp_path).add(100, "search.list")
+        assert _make_ledger(tmp_path).used == 100
+
+    def test_resets_at_pacific_midnight(self, tmp_path):
+        clock = _Clock(datetime(2026, 3, 1, 23, 0, tzinfo=PACIFIC))
+        ledger = _make_ledger(tmp_path, clock=clock)
+        ledger.add(500, "search.list")
+        clock.now = datetime(2026, 3, 2, 0, 1, tzinfo=PACIFIC)
+        assert ledger.used == 0
+        assert ledger.next_reset() == datetime(2026, 3, 3, tzinfo=PACIFIC)
+
+    def test_breakdown_by_endpoint_and_tab(self, tmp_path):
+        ledger = _make_ledger(tmp_path)
+        with quota_scope("buzz"):
+            ledger.add(100, "search.list")
+            ledger.add(100, "search.list")
+        with quota_scope("trending"):
+            ledger.add(1, "videos.list")
+
+        rows = {(r["endpoint"], r["tab"]): r for r in ledger.breakdown()}
+        assert rows[("search.list", "buzz")]["units"] == 200
+        assert rows[("search.list", "buzz")]["calls"] == 2
+        assert rows[("videos.list", "trending")]["units"] == 1
+
+    def test_can_spend_keeps_reserve(self, tmp_path):
+        ledger = _make_ledger(tmp_path, daily_limit=1000, reserve=100)
+        ledger.add(800, "search.list")
+        assert ledger.can_spend(100)
+        assert not ledger.can_spend(101)
+
+    def test_concurrent_adds(self, tmp_path):
+        ledger = _make_ledger(tmp_path)
+
+        def worker():
+            for _ in range(50):
+                ledger.add(1, "videos.list")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert ledger.used == 200
+
+
+class TestPerKeyLedger:
+    def test_keys_are_separate(self, tmp_path):
+        first = _make_ledger(tmp_path, key_id="k1")
+        second = _make_ledger(tmp_path, key_id="k2")
+        first.add(100, "search.list")
+        assert first.used == 100
+        assert second.used == 0
+
+    def test_exhausted_key_cannot_spend(self, tmp_path):
+        ledger = _make_ledger(tmp_path, key_id="k1")
+        ledger.mark_exhausted()
+        assert ledger.exhausted
+        assert not ledger.can_spend(1)
+        assert not _make_ledger(tmp_path, key_id="k2").exhausted
@@ -0,0 +1,79 @@
+"""src/quota_planner.py のテスト."""
+
+from __future__ import annotations
+
+from src.quota_planner import (
+    MODE_CACHED_ONLY,
+    MODE_LIVE,
+    MODE_REDUCED,
+    plan_search_analysis,
+    plan_trending,
+)
+from src.trending import trending_cache_key
+from src.youtube_api import search_page_cache_key
+
+
+def _page(ids: list[str], next_token: str | None = None) -> dict:
+    items = [
+        {"id": {"videoId": vid}, "snippet": {"channelId": f"ch_{vid}"}} for vid in ids
+    ]
+    return {"items": items, "nextPageToken": next_token}
+
+
+class TestPlanSearchAnalysis:
+    def test_uncached_pages(self):
+        plan = plan_search_analysis("q", 306, available=5000)
+        assert plan.mode == MODE_LIVE
+        assert plan.pages == 3
+        assert plan.expected_units == 306
+        assert plan.saved_units == 0
+
+    def test_cached_page_counts_only_missing_details(self, isolated_disk_cache):
+        isolated_disk_cache.set("search", search_page_cache_key("q", 50, None, None), _page(["v1", "v2"]))
+        isolated_disk_cache.set_many("videos", {"v1": {}, "v2": {}})
+
+        plan = plan_search_analysis("q", 306, available=5000)
+        assert plan.pages == 1
+        assert plan.saved_units == 100
+        assert plan.expected_units == 1  # チャンネル詳細の1バッチのみ
+
+    def test_reduced_when_quota_low(self):
+        plan = plan_search_analysis("q", 510, available=250)
+        assert plan.mode == MODE_REDUCED
+        assert plan.budget == 250
+        assert plan.pages == 2
+
+    def test_cached_only_when_quota_exhausted(self, isolated_disk_cache):
+        isolated_disk_cache.set("search", search_page_cache_key("q", 50, None, None), _page(["v1"]))
+
+        plan = plan_search_analysis("q", 102, available=50)
+        assert plan.mode == MODE_CACHED_ONLY
+        assert plan.budget == 0
+        assert plan.expected_units == 0
+        assert plan.saved_units == 100
+
+    def test_genre_filters_match_cached_page(self, isolated_disk_cache):
+        key = search_page_cache_key("q", 50, "2024-05-03T00:00:00Z", None, "20", "JP")
+        isolated_disk_cache.set("search", key, _page(["v1"]))
+
+        plan = plan_search_analysis(
+            "q", 101, "2024-05-03T12:00:00Z", include_channels=False,
+            available=5000, category_id="20", region_code="JP",
+        )
+        assert plan.saved_units == 100
+        assert plan.expected_units == 1
+
+
+class TestPlanTrending:
+    def test_cached_categories_are_free(self, isolated_disk_cache):
+        isolated_disk_cache.set("trending", trending_cache_key("JP", "1"), [])
+
+        plan = plan_trending(["1", "2", "10"], available=5000)
+        assert plan.mode == MODE_LIVE
+        assert plan.expected_units == 2
+        assert plan.saved_units == 1
+
+    def test_cached_only_when_quota_exhausted(self):
+        plan = plan_trending(["1", "2"], available=0)
+        assert plan.mode == MODE_CACHED_ONLY
+        assert plan.expected_units == 0
@@ -0,0 +1,147 @@
+"""src/single_flight.py のテスト."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.single_flight import SingleFlight, coalesce, flight_stats
+
+
+def _run_concurrently(func, n: int) -> list:
+    results: list = [None] * n
+
+    def target(i: int) -> None:
+        try:
+            results[i] = func()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def _wait_for(condition) -> None:
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test")
+        release = threading.Event()
+        calls = []
+
+        def upstream():
+            calls.append(1)
+            release.wait(timeout=5)
+            return {"items": [1]}
+
+        threads, results = _run_concurrently(lambda: flight.do("k", upstream), 5)
+        _wait_for(lambda: flight.deduplicated == 4)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert (flight.executed, flight.deduplicated) == (1, 4)
+
+    def test_error_is_shared(self):
+        flight = SingleFlight("test")
+        release = threading.Event()
+
+        def upstream():
+            release.wait(timeout=5)
+            raise ValueError("boom")
+
+        threads, results = _run_concurrently(lambda: flight.do("k", upstream), 3)
+        _wait_for(lambda: flight.deduplicated == 2)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.executed == 1
+
+    def test_sequential_calls_not_coalesced(self):
+        flight = SingleFlight("test")
+        assert flight.do("k", lambda: 1) == 1
+        assert flight.do("k", lambda: 2) == 2
+        assert flight.deduplicated == 0
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight("test")
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("b", lambda: 2) == 2
+        assert flight.executed == 2
+
+
+class TestDoAsync:
+    def test_waiters_share_leader_result(self):
+        flight = SingleFlight("test")
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)  # 待つ側が先に揃ってから
+            # 実行する側もスレッドプールを使う
+            return await asyncio.to_thread(lambda: {"items": [1]})
+
+        async def main():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+            calls_ = [flight.do_async("k", upstream) for _ in range(8)]
+            return await asyncio.wait_for(asyncio.gather(*calls_), timeout=5)
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert (flight.executed, flight.deduplicated) == (1, 7)
+
+    def test_async_waiter_joins_sync_call(self):
+        flight = SingleFlight("test")
+        release = threading.Event()
+        threads, results = _run_concurrently(
+            lambda: flight.do("k", lambda: release.wait(timeout=5) and "sync"), 1,
+        )
+        _wait_for(lambda: flight.executed == 1)
+
+        async def main():
+            waiter = asyncio.ensure_future(flight.do_async("k", lambda: None))
+            await asyncio.sleep(0)
+            release.set()
+            return await asyncio.wait_for(waiter, timeout=5)
+
+        assert asyncio.run(main()) == "sync"
+        threads[0].join()
+        assert results == ["sync"]
+
+
+class TestCoalesce:
+    def test_keys_by_arguments(self):
+        calls = []
+
+        @coalesce("test.decorator")
+        def fetch(query, geo="JP"):
+            calls.append((query, geo))
+            return query
+
+        assert fetch("a") == "a"
+        assert fetch("b", geo="US") == "b"
+        assert calls == [("a", "JP"), ("b", "US")]
+        stats = {s["group"]: s for s in flight_stats()}
+        assert stats["test.decorator"]["executed"] == 2
+
+    def test_preserves_exception(self):
+        @coalesce("test.error")
+        def fetch():
+            raise KeyError("x")
+
+        with pytest.raises(KeyError):
+            fetch()
@@ -1,14 +1,23 @@
 """src/trending.py のテスト."""
 
+from unittest.mock import MagicMock, patch
+
 import pandas as pd
+from googleapiclient.errors import HttpError
 
+from src.constants import MEMORY_CACHE_ERROR_TTL
+from src.memory_cache import clear_memory_cache
 from src.trending import (
     CATEGORY_MAP,
+    fetch_trending_all_categories,
+    fetch_trending_videos,
+    trending_cache_key,
     flatten_category_videos,
     extract_keywords_from_titles,
     analyze_trending_categories,
     trending_to_dataframe,
 )
+from src.youtube_api import revalidation_stats
 
 
 # ─── ヘルパー ─────────────────────────────────────────
@@ -39,6 +48,97 @@ def _make_video(
     }
 
 
+# ─── fetch_trending_videos ───────────────────────────
+
+class TestFetchTrendingVideosEtag:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.trending.get_youtube_client")
+    def test_not_modified_reuses_cached_items(self, mock_client, mock_tracker, isolated_disk_cache):
+        request = mock_client.return_value.videos().list.return_value
+        request.headers = {}
+        request.execute.return_value = {"etag": "E1", "items": [_make_video("v1")]}
+        first = fetch_trending_videos("KEY", category_id="24")
+
+        isolated_disk_cache.touch("trending", [trending_cache_key("JP", "24")], ttl=-1)
+        clear_memory_cache()
+        request.execute.side_effect = HttpError(MagicMock(status=304), b"")
+        second = fetch_trending_videos("KEY", category_id="24")
+
+        assert second == first
+        assert request.headers["If-None-Match"] == "E1"
+        counts = revalidation_stats.snapshot()[0]
+        assert (counts["miss"], counts["revalidated"]) == (1, 1)
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.trending.get_youtube_client")
+    def test_smaller_slices_share_one_snapshot(self, mock_client, mock_tracker):
+        request = mock_client.return_value.videos().list.return_value
+        request.headers = {}
+        request.execute.return_value = {"items": [_make_video(f"v{i}") for i in range(50)]}
+
+        full = fetch_trending_videos("KEY", category_id="24", max_results=50)
+        top10 = fetch_trending_videos("KEY", category_id="24", max_results=10)
+
+        assert top10 == full[:10]
+        assert request.execute.call_count == 1
+        assert mock_client.return_value.videos().list.call_args.kwargs["maxResults"] == 50
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.trending.get_youtube_client")
+    def test_transient_failure_not_cached_for_an_hour(self, mock_client, mock_tracker):
+        request = mock_client.return_value.videos().list.return_value
+        request.headers = {}
+        request.execute.side_effect = HttpError(MagicMock(status=400), b"")
+
+        with patch("src.memory_cache.time.time", return_value=1000.0):
+            assert fetch_trending_videos("KEY", category_id="24") == []
+            assert fetch_trending_videos("KEY", category_id="24") == []
+        assert request.execute.call_count == 1
+
+        request.execute.side_effect = None
+        request.execute.return_value = {"items": [_make_video("v1")]}
+        with patch("src.memory_cache.time.time", return_value=1000.0 + MEMORY_CACHE_ERROR_TTL):
+            assert [v["id"] for v in fetch_trending_videos("KEY", category_id="24")] == ["v1"]
+
+
+# ─── fetch_trending_all_categories ───────────────────
+
+class TestFetchTrendingAllCategories:
+    @patch("src.trending.fetch_trending_videos")
+    def test_preserves_category_order(self, mock_fetch):
+        mock_fetch.side_effect = lambda api_key, category_id, **kw: [_make_video(f"v{category_id}")]
+
+        result = fetch_trending_all_categories("KEY")
+        assert list(result) == list(CATEGORY_MAP.values())
+        assert mock_fetch.call_count == len(CATEGORY_MAP)
+
+    @patch("src.trending.fetch_trending_videos")
+    def test_partial_failure(self, mock_fetch):
+        def fetch(api_key, category_id, **kw):
+            if category_id == "10":
+                raise RuntimeError("backendError")
+            if category_id == "20":
+                return []
+            return [_make_video(f"v{category_id}")]
+
+        mock_fetch.side_effect = fetch
+
+        result = fetch_trending_all_categories("KEY")
+        assert "音楽" not in result
+        assert "ゲーム" not in result
+        assert len(result) == len(CATEGORY_MAP) - 2
+
+    @patch("src.trending.fetch_trending_videos")
+    def test_failed_categories_not_pinned(self, mock_fetch):
+        mock_fetch.side_effect = ConnectionError("reset")
+        assert fetch_trending_all_categories("KEY") == {}
+
+        mock_fetch.side_effect = lambda api_key, category_id, **kw: [_make_video(f"v{category_id}")]
+
+        assert len(fetch_trending_all_categories("KEY")) == len(CATEGORY_MAP)
+        assert mock_fetch.call_count == 2 * len(CATEGORY_MAP)
+
+
 # ─── flatten_category_videos ─────────────────────────
 
 class TestFlattenCategoryVideos:
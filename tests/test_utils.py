@@ -1,6 +1,15 @@
 """src/utils.py のテスト."""
 
-from src.utils import format_number, video_url, channel_url, truncate_text
+from datetime import datetime, timezone
+
+from src.utils import (
+    bucket_published_after,
+    channel_url,
+    format_number,
+    published_after_days,
+    truncate_text,
+    video_url,
+)
 
 
 class TestFormatNumber:
@@ -49,3 +58,21 @@ class TestTruncateText:
         result = truncate_text(text, 40)
         assert len(result) == 40
         assert result.endswith("…")
+
+
+class TestPublishedAfter:
+    def test_days_bucketed_to_utc_midnight(self):
+        now = datetime(2024, 5, 10, 15, 42, 7, tzinfo=timezone.utc)
+        assert published_after_days(7, now) == "2024-05-03T00:00:00Z"
+
+    def test_same_day_gives_same_value(self):
+        morning = datetime(2024, 5, 10, 0, 0, 1, tzinfo=timezone.utc)
+        night = datetime(2024, 5, 10, 23, 59, 59, tzinfo=timezone.utc)
+        assert published_after_days(30, morning) == published_after_days(30, night)
+
+    def test_bucket_normalizes_offset(self):
+        assert bucket_published_after("2024-05-03T01:30:00+09:00") == "2024-05-02T00:00:00Z"
+
+    def test_bucket_passthrough(self):
+        assert bucket_published_after(None) is None
+        assert bucket_published_after("not-a-date") == "not-a-date"
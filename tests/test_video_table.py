@@ -0,0 +1,121 @@
+"""src/video_table.py のテスト."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.video_table import VideoIndex, VideoTable, compute_vs_ratio
+from src.youtube_api import ChannelInfo, VideoInfo
+
+
+def _table(view_counts: list[int], subscriber_counts: list[int]) -> VideoTable:
+    n = len(view_counts)
+    return VideoTable.from_columns(
+        video_id=[f"v{i}" for i in range(n)],
+        title=[f"title-{i}" for i in range(n)],
+        channel_id=[f"ch{i}" for i in range(n)],
+        channel_title=["ch"] * n,
+        published_at=[f"2026-01-{i + 1:02d}T00:00:00Z" for i in range(n)],
+        thumbnail_url=[""] * n,
+        view_count=view_counts,
+        subscriber_count=subscriber_counts,
+    )
+
+
+class TestVideoTable:
+    def test_vs_ratio_computed_per_column(self):
+        table = _table([500, 100, 300], [100, 0, 1000])
+        assert table.vs_ratio.tolist() == [5.0, 0.0, 0.3]
+        assert table.view_count.dtype == np.int64
+
+    def test_row_access_returns_video_info(self):
+        table = _table([500, 100], [100, 10])
+        assert table[1] == VideoInfo(
+            video_id="v1", title="title-1", channel=ChannelInfo("ch1", "ch", 10),
+            published_at="2026-01-02T00:00:00Z", thumbnail_url="",
+            view_count=100, vs_ratio=10.0,
+        )
+        assert [v.video_id for v in table[:1]] == ["v0"]
+
+    def test_round_trip_from_videos(self):
+        table = _table([1, 2], [1, 1])
+        assert list(VideoTable.from_videos(table)) == list(table)
+
+    def test_compound_mask(self):
+        table = _table([5000, 5000, 100, 9000], [500, 10000, 500, 100])
+        mask = table.mask(max_subscribers=1000, min_views=1000, min_vs_ratio=1.0)
+        assert mask.tolist() == [True, False, False, True]
+        assert table.mask(published_after="2026-01-03T00:00:00Z").tolist() == [
+            False, False, True, True,
+        ]
+
+    def test_sort_is_stable(self):
+        table = _table([10, 30, 10, 20], [1, 1, 1, 1])
+        assert [v.video_id for v in table.sort_by()] == ["v1", "v3", "v0", "v2"]
+        assert [v.video_id for v in table.sort_by(descending=False)] == ["v0", "v2", "v3", "v1"]
+
+    def test_top_matches_full_sort(self):
+        rng = np.random.default_rng(0)
+        views = rng.integers(0, 50, size=500).tolist()
+        table = _table(views, [1] * 500)
+        full = [v.video_id for v in table.sort_by("view_count")]
+        for k in (0, 1, 7, 100, 500, 600):
+            assert [v.video_id for v in table.top(k, "view_count")] == full[:k]
+
+    def test_concat_and_dataframe(self):
+        table = VideoTable.concat([_table([100], [10]), VideoTable.empty(), _table([5], [0])])
+        df = table.to_dataframe()
+        assert len(table) == 2
+        assert df["V/S比率"].tolist() == [10.0, 0.0]
+        assert df["公開日"].tolist() == ["2026-01-01", "2026-01-01"]
+        assert df["動画URL"][0] == "https://www.youtube.com/watch?v=v0"
+        assert len(VideoTable.empty().to_dataframe()) == 0
+
+    def test_channels_and_thumbnail_prefixes_shared(self):
+        table = VideoTable.from_columns(
+            video_id=["a1", "b2"],
+            title=["x", "y"],
+            channel_id=["".join(["c", "h"]), "".join(["c", "h"])],
+            channel_title=["".join(["C", "h"]), "".join(["C", "h"])],
+            published_at=["bad-date", "2026-01-01T09:00:00+09:00"],
+            thumbnail_url=[
+                "https://i.ytimg.com/vi/a1/hqdefault.jpg", "https://i.ytimg.com/vi/b2/hqdefault.jpg",
+            ],
+            view_count=[1, 2],
+            subscriber_count=[1, 1],
+        )
+        assert table.channel_title[0] is table.channel_title[1]
+        assert table.thumbnail_template[0] is table.thumbnail_template[1]
+
+        first, second = list(table)
+        assert first.channel is second.channel
+        assert second.thumbnail_url == "https://i.ytimg.com/vi/b2/hqdefault.jpg"
+        assert (first.published_at, second.published_at) == ("", "2026-01-01T00:00:00Z")
+
+    def test_compute_vs_ratio_ignores_zero_subscribers(self):
+        ratio = compute_vs_ratio(np.array([10, 10]), np.array([0, 5]))
+        assert ratio.tolist() == [0.0, 2.0]
+
+
+class TestVideoIndex:
+    def test_query_matches_filter_then_sort(self):
+        rng = np.random.default_rng(1)
+        table = _table(
+            rng.integers(0, 5000, size=300).tolist(), rng.integers(0, 2000, size=300).tolist(),
+        )
+        index = VideoIndex(table)
+        for conditions in (
+            {},
+            {"max_subscribers": 1000},
+            {"min_views": 2500, "min_vs_ratio": 1.0},
+            {"max_subscribers": 500, "min_views": 100, "min_vs_ratio": 3.0},
+            {"min_views": 10_000},
+        ):
+            expected = [v.video_id for v in table.filter(**conditions).sort_by()]
+            assert [v.video_id for v in index.query(**conditions)] == expected
+
+    def test_thresholds_are_inclusive(self):
+        index = VideoIndex(_table([100, 200, 300], [100, 100, 200]))
+        assert [v.video_id for v in index.query(max_subscribers=100, min_views=200)] == ["v1"]
+        assert [v.video_id for v in index.query(min_vs_ratio=1.5)] == ["v1", "v2"]
+        assert len(VideoIndex(VideoTable.empty()).query(min_views=1)) == 0
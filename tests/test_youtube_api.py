@@ -1,6 +1,39 @@
 """src/youtube_api.py のテスト."""
 
-from src.youtube_api import QuotaTracker, VideoInfo
+from __future__ import annotations
+
+import dataclasses
+import json
+import pickle
+import socket
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.constants import YOUTUBE_FIELDS, YOUTUBE_RETRY_ATTEMPTS
+from src.memory_cache import clear_memory_cache
+from src.single_flight import get_flight
+from src.youtube_api import (
+    QuotaExceededError,
+    YouTubeForbiddenError,
+    error_reason,
+    retry_stats,
+    QuotaTracker,
+    ChannelInfo,
+    VideoInfo,
+    YouTubeClientPool,
+    QuotaBudget,
+    revalidation_stats,
+    fetch_statistics,
+    iter_search_pages,
+    get_channel_details,
+    get_video_details,
+    search_videos,
+)
 
 
 class TestQuotaTracker:
@@ -32,11 +65,722 @@ class TestVideoInfo:
         v = VideoInfo(
             video_id="v1",
             title="Test",
-            channel_id="ch1",
-            channel_title="Channel",
+            channel=ChannelInfo(channel_id="ch1", channel_title="Channel"),
             published_at="2026-01-01",
             thumbnail_url="https://example.com/thumb.jpg",
         )
         assert v.view_count == 0
         assert v.subscriber_count == 0
         assert v.vs_ratio == 0.0
+        assert (v.channel_id, v.channel_title) == ("ch1", "Channel")
+
+    def test_slotted_frozen_and_picklable(self):
+        channel = ChannelInfo("ch1", "Channel", 100)
+        v = VideoInfo("v1", "Test", channel, "2026-01-01", "", view_count=5)
+
+        assert not hasattr(v, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            v.view_count = 1
+        restored = pickle.loads(pickle.dumps(v))
+        assert restored == v
+        assert restored.subscriber_count == 100
+
+    def test_non_field_attributes_are_frozen(self):
+        channel = ChannelInfo("ch1", "Channel", 100)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            channel.extra = 1
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            del channel.channel_title
+        assert channel.channel_title == "Channel"
+
+
+class TestSearchVideosDiskCache:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_second_call_served_from_disk(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+        youtube.search().list().execute.return_value = {"items": [{"id": {"videoId": "v1"}}]}
+        mock_client.return_value = youtube
+
+        first = search_videos("KEY", "不動産投資")
+        clear_memory_cache()
+        second = search_videos("KEY", "不動産投資")
+
+        assert first == second == [{"id": {"videoId": "v1"}}]
+        assert mock_client.call_count == 1
+        mock_tracker.return_value.add.assert_called_once_with(100, "search.list")
+        assert youtube.search().list.call_args.kwargs["fields"] == YOUTUBE_FIELDS["search"]
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_filters_and_day_bucketed_date(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+        youtube.search().list().execute.return_value = {"items": [{"id": {"videoId": "v1"}}]}
+        mock_client.return_value = youtube
+
+        search_videos("KEY", "猫", 50, "2024-05-03T09:15:00Z", category_id="20", region_code="JP")
+        clear_memory_cache()
+        # 同じ日の別時刻は同じキャッシュエントリを使う
+        items = search_videos(
+            "KEY", "猫", 50, "2024-05-03T18:40:00Z", category_id="20", region_code="JP",
+        )
+
+        assert items == [{"id": {"videoId": "v1"}}]
+        assert mock_client.call_count == 1
+        kwargs = youtube.search().list.call_args.kwargs
+        assert kwargs["publishedAfter"] == "2024-05-03T00:00:00Z"
+        assert kwargs["videoCategoryId"] == "20"
+        assert kwargs["regionCode"] == "JP"
+
+        # カテゴリが違えば別の検索
+        search_videos("KEY", "猫", 50, "2024-05-03T09:15:00Z", category_id="10", region_code="JP")
+        assert mock_client.call_count == 2
+
+
+def _stats_client(resource: str) -> MagicMock:
+    """ids に応じた statistics を返すモッククライアント."""
+    youtube = MagicMock()
+
+    def list_(part, id, fields):
+        assert fields == YOUTUBE_FIELDS[resource]
+        request = MagicMock()
+        request.execute.return_value = {
+            "items": [
+                {"id": i, "statistics": {"viewCount": "10", "subscriberCount": "5"}}
+                for i in id.split(",")
+            ]
+        }
+        return request
+
+    getattr(youtube, resource)().list.side_effect = list_
+    return youtube
+
+
+class TestEntityCache:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_only_missing_ids_fetched(self, mock_client, mock_tracker):
+        youtube = _stats_client("videos")
+        mock_client.return_value = youtube
+
+        get_video_details("KEY", ("v1", "v2"))
+        result = get_video_details("KEY", ("v3", "v2", "v1"))
+
+        assert set(result) == {"v1", "v2", "v3"}
+        calls = youtube.videos().list.call_args_list
+        assert [c.kwargs["id"] for c in calls] == ["v1,v2", "v3"]
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_full_hit_skips_client(self, mock_client, mock_tracker):
+        mock_client.return_value = _stats_client("channels")
+
+        get_channel_details("KEY", ("c1", "c2"))
+        get_channel_details("KEY", ("c2", "c1"))
+
+        assert mock_client.call_count == 1
+        assert mock_tracker.return_value.add.call_count == 1
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_batches_of_50(self, mock_client, mock_tracker):
+        youtube = _stats_client("videos")
+        mock_client.return_value = youtube
+
+        ids = tuple(f"v{i}" for i in range(120))
+        result = get_video_details("KEY", ids)
+
+        assert len(result) == 120
+        assert youtube.videos().list.call_count == 3
+        assert mock_tracker.return_value.add.call_count == 3
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_quota_error(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+        youtube.videos().list().execute.side_effect = HttpError(
+            MagicMock(status=403), b"quota"
+        )
+        mock_client.return_value = youtube
+
+        with pytest.raises(QuotaExceededError):
+            get_video_details("KEY", ("v1",))
+
+
+class TestYouTubeClientPool:
+    @patch("src.youtube_api.build")
+    def test_reuses_client_per_key(self, mock_build):
+        mock_build.side_effect = lambda *a, **kw: MagicMock()
+        pool = YouTubeClientPool()
+
+        first = pool.get("KEY1")
+        assert pool.get("KEY1") is first
+        assert pool.get("KEY2") is not first
+        assert mock_build.call_count == 2
+        assert mock_build.call_args.kwargs["static_discovery"] is True
+
+    @patch("src.youtube_api.build")
+    def test_shares_client_across_threads(self, mock_build):
+        mock_build.side_effect = lambda *a, **kw: MagicMock()
+        pool = YouTubeClientPool()
+        main_client = pool.get("KEY")
+
+        other: list = []
+        thread = threading.Thread(target=lambda: other.append(pool.get("KEY")))
+        thread.start()
+        thread.join()
+
+        assert other[0] is main_client
+        assert mock_build.call_count == 1
+
+    def test_concurrent_requests_use_separate_http(self):
+        used: list = []
+        barrier = threading.Barrier(2)
+
+        def fake_request(self, uri, method="GET", body=None, headers=None, **kwargs):
+            used.append(self)
+            barrier.wait(timeout=5)
+            raise ConnectionError
+
+        def call(youtube):
+            with pytest.raises(ConnectionError):
+                youtube.videos().list(part="statistics", id="v1").execute()
+
+        with patch.object(httplib2.Http, "request", fake_request):
+            youtube = YouTubeClientPool().get("KEY")
+            threads = [threading.Thread(target=call, args=(youtube,)) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert used[0] is not used[1]
+
+            # 返却された Http は次のリクエストで再利用される
+            barrier = threading.Barrier(1)
+            call(youtube)
+            assert used[2] in used[:2]
+
+    def test_requests_gzip(self):
+        sent: dict = {}
+
+        def fake_request(self, uri, method="GET", body=None, headers=None, **kwargs):
+            sent.update(headers)
+            raise ConnectionError
+
+        with patch.object(httplib2.Http, "request", fake_request):
+            youtube = YouTubeClientPool().get("KEY")
+            with pytest.raises(ConnectionError):
+                youtube.videos().list(part="statistics", id="v1").execute()
+
+        assert "gzip" in sent["accept-encoding"]
+        assert sent["user-agent"].endswith("(gzip)")
+
+
+class TestFetchStatistics:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_video_and_channel_batches_overlap(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+
+        def slow_list(part, id, fields):
+            request = MagicMock()
+
+            def execute():
+                time.sleep(0.2)
+                return {"items": [{"id": i, "statistics": {}} for i in id.split(",")]}
+
+            request.execute.side_effect = execute
+            return request
+
+        youtube.videos().list.side_effect = slow_list
+        youtube.channels().list.side_effect = slow_list
+        mock_client.return_value = youtube
+
+        start = time.perf_counter()
+        result = fetch_statistics("KEY", {"videos": ("v1",), "channels": ("c1",)})
+        elapsed = time.perf_counter() - start
+
+        assert set(result["videos"]) == {"v1"}
+        assert set(result["channels"]) == {"c1"}
+        assert elapsed < 0.35
+        assert mock_tracker.return_value.add.call_count == 2
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_successful_batches_cached_on_error(self, mock_client, mock_tracker):
+        youtube = _stats_client("videos")
+        youtube.channels().list().execute.side_effect = HttpError(
+            MagicMock(status=500), b"backendError"
+        )
+        mock_client.return_value = youtube
+
+        with pytest.raises(HttpError):
+            fetch_statistics("KEY", {"videos": ("v1",), "channels": ("c1",)})
+
+        cached = get_video_details("KEY", ("v1",))
+        assert "v1" in cached
+        assert youtube.videos().list.call_count == 1
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_exhausted_budget_returns_cached_only(self, mock_client, mock_tracker):
+        youtube = _stats_client("videos")
+        mock_client.return_value = youtube
+        get_video_details("KEY", ("v1",))
+
+        result = fetch_statistics("KEY", {"videos": ("v1", "v2")}, budget=QuotaBudget(0))
+
+        assert set(result["videos"]) == {"v1"}
+        assert youtube.videos().list.call_count == 1
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_partial_budget_fetches_affordable_batches(self, mock_client, mock_tracker):
+        youtube = _stats_client("videos")
+        mock_client.return_value = youtube
+        ids = tuple(f"v{i}" for i in range(60))
+
+        result = fetch_statistics("KEY", {"videos": ids}, budget=QuotaBudget(1))
+
+        assert set(result["videos"]) == set(ids[:50])
+        assert youtube.videos().list.call_count == 1
+
+
+class TestStatisticsSingleFlight:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_waiters_do_not_store_again(self, mock_client, mock_tracker, isolated_disk_cache):
+        flight = get_flight("youtube.statistics")
+        joined = flight.deduplicated
+        release = threading.Event()
+        youtube = MagicMock()
+
+        def execute():
+            release.wait(timeout=5)
+            return {"etag": "E1", "items": [{"id": "v1", "statistics": {"viewCount": "7"}}]}
+
+        youtube.videos().list.return_value.execute.side_effect = execute
+        mock_client.return_value = youtube
+        results: list = []
+        threads = [
+            threading.Thread(target=lambda: results.append(fetch_statistics("KEY", {"videos": ("v1",)})))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while flight.deduplicated == joined and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert results[0] == results[1] == {"videos": {"v1": {"viewCount": "7"}}}
+        assert revalidation_stats.snapshot()[0]["miss"] == 1
+        assert youtube.videos().list.return_value.execute.call_count == 1
+
+
+class TestEtagRevalidation:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_not_modified_refreshes_cache(self, mock_client, mock_tracker, isolated_disk_cache):
+        youtube = MagicMock()
+        request = youtube.videos().list.return_value
+        request.headers = {}
+        request.execute.return_value = {
+            "etag": "E1", "items": [{"id": "v1", "statistics": {"viewCount": "7"}}],
+        }
+        mock_client.return_value = youtube
+        fetch_statistics("KEY", {"videos": ("v1",)})
+
+        # TTL切れ後は If-None-Match で再検証し、304 ならキャッシュの値を返す
+        isolated_disk_cache.touch("videos", ["v1"], ttl=-1)
+        request.execute.side_effect = HttpError(MagicMock(status=304), b"")
+        result = fetch_statistics("KEY", {"videos": ("v1",)})
+
+        assert result["videos"] == {"v1": {"viewCount": "7"}}
+        assert request.headers["If-None-Match"] == "E1"
+        assert isolated_disk_cache.get("videos", "v1") == {"viewCount": "7"}
+        assert mock_tracker.return_value.add.call_count == 2
+        counts = revalidation_stats.snapshot()[0]
+        assert (counts["miss"], counts["revalidated"], counts["hit"]) == (1, 1, 0)
+        assert counts["saved_bytes"] > 0
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_no_etag_without_stale_entry(self, mock_client, mock_tracker):
+        youtube = _stats_client("videos")
+        mock_client.return_value = youtube
+        result = fetch_statistics("KEY", {"videos": ("v1",)})
+
+        assert "v1" in result["videos"]
+        assert revalidation_stats.snapshot()[0]["miss"] == 1
+
+
+def _conditional_stats_client() -> tuple[MagicMock, list]:
+    """If-None-Match があれば 304、無ければ ID列ごとの ETag つきで返すクライアント."""
+    youtube = MagicMock()
+    sent: list = []
+
+    def list_(part, id, fields):
+        request = MagicMock(headers={})
+
+        def execute():
+            sent.append((id.split(","), request.headers.get("If-None-Match")))
+            if "If-None-Match" in request.headers:
+                raise HttpError(MagicMock(status=304), b"")
+            items = [{"id": i, "statistics": {"viewCount": "1"}} for i in id.split(",")]
+            return {"etag": f"E:{id}", "items": items}
+
+        request.execute.side_effect = execute
+        return request
+
+    youtube.videos().list.side_effect = list_
+    return youtube, sent
+
+
+class TestEtagRebatching:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_partial_overlap_revalidates_original_batch(
+        self, mock_client, mock_tracker, isolated_disk_cache,
+    ):
+        youtube, sent = _conditional_stats_client()
+        mock_client.return_value = youtube
+        first = [f"v{i}" for i in range(50)]
+        fetch_statistics("KEY", {"videos": tuple(first)})
+        isolated_disk_cache.touch("videos", first, ttl=-1)
+
+        # 別の検索: 先の40件（順不同）と新しい20件。バッチ数は2のまま
+        second = [f"w{i}" for i in range(20)] + first[:9:-1]
+        result = fetch_statistics("KEY", {"videos": tuple(second)})
+
+        assert set(result["videos"]) == set(second)
+        assert sorted(sent[1:]) == sorted([
+            (first, f"E:{','.join(first)}"),
+            (second[:20], None),
+        ])
+        counts = revalidation_stats.snapshot()[0]
+        assert (counts["revalidated"], counts["miss"]) == (50, 70)
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_no_revalidation_when_it_costs_an_extra_batch(
+        self, mock_client, mock_tracker, isolated_disk_cache,
+    ):
+        youtube, sent = _conditional_stats_client()
+        mock_client.return_value = youtube
+        first = [f"v{i}" for i in range(50)]
+        fetch_statistics("KEY", {"videos": tuple(first)})
+        isolated_disk_cache.touch("videos", first, ttl=-1)
+
+        second = first[:10] + [f"w{i}" for i in range(40)]
+        fetch_statistics("KEY", {"videos": tuple(second)})
+
+        assert sent[1:] == [(second, None)]  # 1バッチで済むものを2バッチに分けない
+
+
+class _FakeBatch:
+    """BatchHttpRequest の模擬。execute() で各パートのコールバックを呼ぶ."""
+
+    def __init__(self, callback, fail_ids=()):
+        self.callback = callback
+        self.fail_ids = set(fail_ids)
+        self.parts: list = []
+
+    def add(self, request, request_id):
+        self.parts.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.parts:
+            ids = request.kwargs["id"].split(",")
+            if "If-None-Match" in request.headers:
+                self.callback(request_id, None, HttpError(MagicMock(status=304), b""))
+            elif self.fail_ids & set(ids):
+                self.callback(request_id, None, HttpError(MagicMock(status=403), b"quota"))
+            else:
+                items = [{"id": i, "statistics": {"viewCount": "1"}} for i in ids]
+                self.callback(request_id, {"etag": f"E{request_id}", "items": items}, None)
+
+
+def _multipart_client(fail_ids=()):
+    youtube = MagicMock()
+    batches: list = []
+
+    def new_batch(callback):
+        batch = _FakeBatch(callback, fail_ids)
+        batches.append(batch)
+        return batch
+
+    youtube.new_batch_http_request.side_effect = new_batch
+    for resource in ("videos", "channels"):
+        getattr(youtube, resource)().list.side_effect = lambda part, id, fields: MagicMock(kwargs={"id": id}, headers={})
+    return youtube, batches
+
+
+class TestFetchStatisticsMultipart:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_single_batch_request(self, mock_client, mock_tracker):
+        youtube, batches = _multipart_client()
+        mock_client.return_value = youtube
+
+        video_ids = tuple(f"v{i}" for i in range(120))
+        result = fetch_statistics(
+            "KEY", {"videos": video_ids, "channels": ("c1",)}, use_batch=True,
+        )
+
+        assert len(result["videos"]) == 120
+        assert set(result["channels"]) == {"c1"}
+        assert len(batches) == 1
+        assert len(batches[0].parts) == 4
+        assert mock_tracker.return_value.add.call_count == 4
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_part_quota_error(self, mock_client, mock_tracker):
+        youtube, _ = _multipart_client(fail_ids={"c1"})
+        mock_client.return_value = youtube
+
+        with pytest.raises(QuotaExceededError):
+            fetch_statistics(
+                "KEY", {"videos": ("v1",), "channels": ("c1",)}, use_batch=True,
+            )
+
+        # 成功したパートはキャッシュされている
+        assert "v1" in get_video_details("KEY", ("v1",))
+        assert youtube.new_batch_http_request.call_count == 1
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_parts_revalidated(self, mock_client, mock_tracker, isolated_disk_cache):
+        youtube, batches = _multipart_client()
+        mock_client.return_value = youtube
+        ids = {"videos": ("v1",), "channels": ("c1",)}
+        fetch_statistics("KEY", ids, use_batch=True)
+        isolated_disk_cache.touch("videos", ["v1"], ttl=-1)
+        isolated_disk_cache.touch("channels", ["c1"], ttl=-1)
+
+        result = fetch_statistics("KEY", ids, use_batch=True)
+
+        assert result == {"videos": {"v1": {"viewCount": "1"}}, "channels": {"c1": {"viewCount": "1"}}}
+        assert {r.headers["If-None-Match"] for _, r in batches[1].parts} == {"E0", "E1"}
+        assert {c["namespace"]: c["revalidated"] for c in revalidation_stats.snapshot()} == {
+            "channels": 1, "videos": 1,
+        }
+
+
+def _paged_search_client(pages: int) -> MagicMock:
+    """pageToken に応じて pages ページ分の検索結果を返すモッククライアント."""
+    youtube = MagicMock()
+
+    def list_(**params):
+        page = int(params.get("pageToken") or 0)
+        request = MagicMock()
+        response = {"items": [{"id": {"videoId": f"p{page}-v{i}"}} for i in range(50)]}
+        if page + 1 < pages:
+            response["nextPageToken"] = str(page + 1)
+        request.execute.return_value = response
+        return request
+
+    youtube.search().list.side_effect = list_
+    return youtube
+
+
+class TestIterSearchPages:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_follows_page_tokens(self, mock_client, mock_tracker):
+        mock_client.return_value = _paged_search_client(pages=3)
+
+        pages = list(iter_search_pages("KEY", "q", QuotaBudget(1000)))
+        assert len(pages) == 3
+        assert pages[2][0]["id"]["videoId"] == "p2-v0"
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_stops_at_budget(self, mock_client, mock_tracker):
+        youtube = _paged_search_client(pages=10)
+        mock_client.return_value = youtube
+        budget = QuotaBudget(250)
+
+        pages = list(iter_search_pages("KEY", "q", budget))
+        assert len(pages) == 2
+        assert budget.spent == 200
+        assert youtube.search().list.call_count == 2
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_cached_pages_are_free(self, mock_client, mock_tracker):
+        mock_client.return_value = _paged_search_client(pages=2)
+        list(iter_search_pages("KEY", "q", QuotaBudget(1000)))
+
+        budget = QuotaBudget(0)
+        pages = list(iter_search_pages("KEY", "q", budget))
+        assert len(pages) == 2
+        assert budget.spent == 0
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_search_videos_shares_first_page(self, mock_client, mock_tracker):
+        youtube = _paged_search_client(pages=2)
+        mock_client.return_value = youtube
+
+        items = search_videos("KEY", "q")
+        pages = iter_search_pages("KEY", "q", QuotaBudget(0))
+        assert next(pages) == items
+        assert youtube.search().list.call_count == 1
+
+
+class TestSearchCoalescing:
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_concurrent_identical_searches_share_one_call(self, mock_client, mock_tracker):
+        release = threading.Event()
+        youtube = MagicMock()
+
+        def execute():
+            release.wait(timeout=5)
+            return {"items": [{"id": {"videoId": "v1"}}]}
+
+        youtube.search().list().execute.side_effect = execute
+        mock_client.return_value = youtube
+
+        results: list = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(list(iter_search_pages("KEY", "同時", QuotaBudget(102))))
+            )
+            for _ in range(3)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(results) == 3
+        assert youtube.search().list().execute.call_count == 1
+        mock_tracker.return_value.add.assert_called_once_with(100, "search.list")
+
+
+class TestEnsureQuota:
+    @patch("src.youtube_api.get_youtube_client")
+    def test_refuses_when_reserve_reached(self, mock_client, isolated_quota_ledger):
+        isolated_quota_ledger.add(9_850, "search.list")
+
+        with pytest.raises(QuotaExceededError):
+            search_videos("KEY", "q")
+        mock_client.assert_not_called()
+
+
+def _http_error(status: int, reason: str | None = None) -> HttpError:
+    content = b"" if reason is None else json.dumps(
+        {"error": {"code": status, "errors": [{"reason": reason}]}}
+    ).encode()
+    return HttpError(MagicMock(status=status), content)
+
+
+class TestRetryAndErrorClassification:
+    def test_error_reason(self):
+        assert error_reason(_http_error(403, "quotaExceeded")) == "quotaExceeded"
+        assert error_reason(_http_error(403)) == ""
+        assert error_reason(HttpError(MagicMock(status=500), b"<html>")) == ""
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_transient_errors_retried(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+        youtube.search().list().execute.side_effect = [
+            _http_error(503, "backendError"),
+            _http_error(403, "rateLimitExceeded"),
+            {"items": [{"id": {"videoId": "v1"}}]},
+        ]
+        mock_client.return_value = youtube
+
+        assert search_videos("KEY", "q") == [{"id": {"videoId": "v1"}}]
+        mock_tracker.return_value.add.assert_called_once_with(100, "search.list")
+        assert retry_stats.snapshot() == [
+            {"endpoint": "search.list", "reason": "backendError", "retries": 1, "gave_up": 0},
+            {"endpoint": "search.list", "reason": "rateLimitExceeded", "retries": 1, "gave_up": 0},
+        ]
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_socket_timeout_retried(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+        youtube.search().list().execute.side_effect = [
+            socket.timeout("timed out"),
+            {"items": [{"id": {"videoId": "v1"}}]},
+        ]
+        mock_client.return_value = youtube
+
+        assert search_videos("KEY", "q") == [{"id": {"videoId": "v1"}}]
+        assert youtube.search().list().execute.call_count == 2
+        mock_tracker.return_value.add.assert_called_once_with(100, "search.list")
+
+    @patch("src.youtube_api.get_youtube_client")
+    def test_gives_up_after_max_attempts(self, mock_client):
+        youtube = MagicMock()
+        youtube.search().list().execute.side_effect = _http_error(500)
+        mock_client.return_value = youtube
+
+        with pytest.raises(HttpError):
+            search_videos("KEY", "q")
+        assert youtube.search().list().execute.call_count == YOUTUBE_RETRY_ATTEMPTS
+        assert retry_stats.snapshot()[0]["gave_up"] == 1
+
+    @patch("src.youtube_api.get_youtube_client")
+    def test_quota_exceeded_not_retried(self, mock_client, isolated_quota_ledger):
+        youtube = MagicMock()
+        youtube.search().list().execute.side_effect = _http_error(403, "quotaExceeded")
+        mock_client.return_value = youtube
+
+        with pytest.raises(QuotaExceededError):
+            search_videos("KEY", "q")
+        assert youtube.search().list().execute.call_count == 1
+        assert isolated_quota_ledger.exhausted
+
+    @patch("src.youtube_api.get_youtube_client")
+    def test_forbidden_is_not_quota(self, mock_client, isolated_quota_ledger):
+        youtube = MagicMock()
+        youtube.search().list().execute.side_effect = _http_error(403, "forbidden")
+        mock_client.return_value = youtube
+
+        with pytest.raises(YouTubeForbiddenError):
+            search_videos("KEY", "q")
+        assert youtube.search().list().execute.call_count == 1
+        assert not isolated_quota_ledger.exhausted
+
+    @patch("src.youtube_api.get_quota_tracker")
+    @patch("src.youtube_api.get_youtube_client")
+    def test_transient_multipart_part_refetched(self, mock_client, mock_tracker):
+        youtube = MagicMock()
+
+        def new_batch(callback):
+            batch = MagicMock()
+            batch.execute.side_effect = lambda: [
+                callback("0", None, _http_error(503)),
+                callback("1", {"items": [{"id": "c1", "statistics": {"viewCount": "1"}}]}, None),
+            ]
+            return batch
+
+        def list_(part, id, fields):
+            request = MagicMock(headers={})
+            request.execute.return_value = {"items": [{"id": id, "statistics": {"viewCount": "5"}}]}
+            return request
+
+        youtube.new_batch_http_request.side_effect = new_batch
+        youtube.videos().list.side_effect = list_
+        youtube.channels().list.side_effect = list_
+        mock_client.return_value = youtube
+
+        result = fetch_statistics("KEY", {"videos": ("v1",), "channels": ("c1",)}, use_batch=True)
+
+        assert result["videos"] == {"v1": {"viewCount": "5"}}
+        assert result["channels"] == {"c1": {"viewCount": "1"}}
+        assert retry_stats.snapshot() == [
+            {"endpoint": "videos.list", "reason": "503", "retries": 1, "gave_up": 0},
+        ]
@@ -0,0 +1,216 @@
+"""src/youtube_async.py のテスト."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import src.youtube_async as youtube_async
+from src.api_keys import configure_key_pool, key_fingerprint
+from src.constants import YOUTUBE_FIELDS
+from src.memory_cache import clear_memory_cache
+from src.quota_ledger import get_quota_ledger, quota_scope
+from src.trending import CATEGORY_MAP, trending_cache_key
+from src.youtube_api import revalidation_stats
+from src.youtube_async import AsyncYouTubeClient
+
+
+class _FakeYouTube:
+    """httpx.MockTransport 用の模擬 YouTube Data API."""
+
+    def __init__(self, quota_keys=(), failing_categories=()):
+        self.requests: list[httpx.Request] = []
+        self.quota_keys = set(quota_keys)
+        self.failing_categories = set(failing_categories)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        params = request.url.params
+        if request.headers["X-Goog-Api-Key"] in self.quota_keys:
+            return _error(403, "quotaExceeded")
+        if request.url.path.endswith("/search"):
+            items = [{"id": {"videoId": f"{params['q']}-{i}"}} for i in range(3)]
+            return httpx.Response(200, json={"items": items})
+        if params.get("chart") == "mostPopular":
+            category = params.get("videoCategoryId", "0")
+            if category in self.failing_categories:
+                return _error(500, "backendError")
+            if request.headers.get("If-None-Match") == f"T{category}":
+                return httpx.Response(304)
+            items = [{"id": f"t{category}", "snippet": {"categoryId": category}}]
+            return httpx.Response(200, json={"etag": f"T{category}", "items": items})
+        ids = params["id"].split(",")
+        items = [{"id": i, "statistics": {"viewCount": "7"}} for i in ids]
+        return httpx.Response(200, json={"etag": "S", "items": items})
+
+
+def _error(status: int, reason: str) -> httpx.Response:
+    return httpx.Response(status, json={"error": {"code": status, "errors": [{"reason": reason}]}})
+
+
+def _run(fake: _FakeYouTube, factory):
+    async def main():
+        async with AsyncYouTubeClient(transport=httpx.MockTransport(fake)) as client:
+            return await factory(client)
+
+    return asyncio.run(main())
+
+
+class TestAsyncSearch:
+    def test_search_and_disk_cache(self, isolated_quota_ledger):
+        fake = _FakeYouTube()
+
+        first = _run(fake, lambda c: c.search_videos("KEY", "猫"))
+        second = _run(fake, lambda c: c.search_videos("KEY", "猫"))
+
+        assert first == second == [{"id": {"videoId": f"猫-{i}"}} for i in range(3)]
+        assert len(fake.requests) == 1
+        request = fake.requests[0]
+        assert request.url.params["fields"] == YOUTUBE_FIELDS["search"]
+        assert "key" not in request.url.params
+        assert "gzip" in request.headers["User-Agent"]
+        assert isolated_quota_ledger.used == 100
+
+    def test_quota_error_fails_over_to_next_key(self):
+        fake = _FakeYouTube(quota_keys={"K1"})
+        pool = configure_key_pool(["K1", "K2"])
+
+        assert len(_run(fake, lambda c: c.search_videos("K1", "q"))) == 3
+        assert pool.ledger("K1").exhausted
+        assert pool.ledger("K2").used == 100
+
+
+class TestBlockingIO:
+    def test_disk_cache_runs_off_event_loop(self, isolated_disk_cache, monkeypatch):
+        fake = _FakeYouTube()
+        get = isolated_disk_cache.get
+        threads = []
+
+        def slow_get(*args):
+            threads.append(threading.current_thread())
+            time.sleep(0.2)  # SQLite のロック待ちを模擬する
+            return get(*args)
+
+        monkeypatch.setattr(isolated_disk_cache, "get", slow_get)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            async with AsyncYouTubeClient(transport=httpx.MockTransport(fake)) as client:
+                await asyncio.gather(client.search_videos("KEY", "q"), ticker())
+
+        asyncio.run(main())
+
+        assert threads and threading.main_thread() not in threads
+        assert ticks[-1] - ticks[0] < 0.15  # 待ちの間もループは止まらない
+
+
+class TestSharedPolicy:
+    def test_concurrent_pages_coalesced(self):
+        fake = _FakeYouTube()
+
+        pages = _run(fake, lambda c: asyncio.gather(
+            c.search_page("KEY", "猫"), c.search_page("KEY", "猫"),
+        ))
+
+        assert pages[0] == pages[1]
+        assert len(fake.requests) == 1
+
+    def test_trending_failure_negatively_cached(self):
+        fake = _FakeYouTube(failing_categories={"10"})
+
+        assert _run(fake, lambda c: c.fetch_trending_videos("KEY", category_id="10")) == []
+        requests = len(fake.requests)
+        assert _run(fake, lambda c: c.fetch_trending_videos("KEY", category_id="10")) == []
+
+        assert len(fake.requests) == requests  # error_ttl の間は再取得しない
+
+    def test_coalesced_waiters_do_not_hold_executor_threads(self, isolated_disk_cache):
+        fake = _FakeYouTube()
+
+        async def main():
+            # 待つ側がスレッドを占有すると、実行する側の to_thread が進めず止まる
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+            async with AsyncYouTubeClient(transport=httpx.MockTransport(fake)) as client:
+                calls = [client.fetch_trending_snapshot("KEY") for _ in range(10)]
+                return await asyncio.wait_for(asyncio.gather(*calls), timeout=5)
+
+        snapshots = asyncio.run(main())
+
+        assert all(s == snapshots[0] for s in snapshots)
+        assert len(fake.requests) == 1
+
+
+class TestAsyncStatistics:
+    def test_batches_fetched_concurrently(self, isolated_quota_ledger):
+        fake = _FakeYouTube()
+        video_ids = tuple(f"v{i}" for i in range(120))
+
+        result = _run(fake, lambda c: c.fetch_statistics(
+            "KEY", {"videos": video_ids, "channels": ("c1", "c1")},
+        ))
+
+        assert len(result["videos"]) == 120
+        assert result["channels"] == {"c1": {"viewCount": "7"}}
+        assert len(fake.requests) == 4
+        assert isolated_quota_ledger.used == 4
+        # 2回目はキャッシュから返す
+        assert _run(fake, lambda c: c.get_video_details("KEY", video_ids[:2])) == {
+            "v0": {"viewCount": "7"}, "v1": {"viewCount": "7"},
+        }
+        assert len(fake.requests) == 4
+
+
+class TestAsyncTrending:
+    def test_all_categories_with_partial_failure(self):
+        fake = _FakeYouTube(failing_categories={"10"})
+
+        result = _run(fake, lambda c: c.fetch_trending_all_categories("KEY", max_per_category=5))
+
+        expected = [name for cat_id, name in CATEGORY_MAP.items() if cat_id != "10"]
+        assert list(result) == expected
+        assert result["ゲーム"] == [{"id": "t20", "snippet": {"categoryId": "20"}}]
+
+    def test_not_modified_reuses_cached_items(self, isolated_disk_cache):
+        fake = _FakeYouTube()
+        first = _run(fake, lambda c: c.fetch_trending_videos("KEY", category_id="20"))
+        isolated_disk_cache.touch("trending", [trending_cache_key("JP", "20")], ttl=-1)
+        clear_memory_cache()
+
+        second = _run(fake, lambda c: c.fetch_trending_videos("KEY", category_id="20"))
+
+        assert first == second
+        assert fake.requests[1].headers["If-None-Match"] == "T20"
+        assert revalidation_stats.snapshot()[0]["revalidated"] == 1
+
+
+class TestSyncWrappers:
+    @pytest.fixture
+    def loop_thread(self, monkeypatch):
+        fake = _FakeYouTube()
+        loop_thread = youtube_async._EventLoopThread()
+        loop_thread._client = AsyncYouTubeClient(transport=httpx.MockTransport(fake))
+        monkeypatch.setattr(youtube_async, "_loop_thread", loop_thread)
+        yield fake
+        loop_thread.close()
+
+    def test_search_records_caller_tab(self, loop_thread):
+        with quota_scope("genre"):
+            items = youtube_async.search_videos("KEY", "q")
+
+        assert len(items) == 3
+        breakdown = get_quota_ledger(key_fingerprint("KEY")).breakdown()
+        assert breakdown == [{"endpoint": "search.list", "tab": "genre", "units": 100, "calls": 1}]
+
+    def test_channel_details(self, loop_thread):
+        assert youtube_async.get_channel_details("KEY", ("c1",)) == {"c1": {"viewCount": "7"}}
+        assert loop_thread.requests[0].url.params["id"] == "c1"